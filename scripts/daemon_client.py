@@ -0,0 +1,60 @@
+"""
+Apex Dashboard Project Manager - daemon client
+What scripts/project-manager.py needs to hand a CLI call to the --serve
+daemon, kept apart from project_manager.py so forwarded calls import only this.
+"""
+
+import hashlib
+import json
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+# Unix socket the --serve daemon listens on. Socket paths are limited to
+# ~100 bytes, so deep checkouts fall back to a per-project temp path.
+DAEMON_SOCKET = Path(__file__).resolve().parent.parent / ".claude" / "project-manager.sock"
+if len(str(DAEMON_SOCKET)) > 100:
+    DAEMON_SOCKET = Path(tempfile.gettempdir()) / f"apex-pm-{hashlib.sha1(str(DAEMON_SOCKET).encode()).hexdigest()[:12]}.sock"
+
+# Seconds a CLI call waits for the daemon to accept it before running
+# in-process; the daemon answers at once, so only a wedged one hits this
+DAEMON_ACCEPT_TIMEOUT = 2
+
+# Flags of commands that always run in the calling process instead of the daemon
+LOCAL_FLAGS = ('--serve', '--startup', '--shutdown', '--bench-tree', '--bench-client', '--no-daemon')
+
+
+def runs_locally(argv):
+    """Whether argv holds one of LOCAL_FLAGS, or a prefix of one (argparse accepts those too)"""
+    for arg in argv:
+        name = arg.split("=", 1)[0]
+        if len(name) > 2 and name.startswith("--") and any(flag.startswith(name) for flag in LOCAL_FLAGS):
+            return True
+    return False
+
+
+def send_to_daemon(request, timeout=None):
+    """Send a request to the --serve daemon, returns its reply or None if none is running
+
+    A CLI call ({"argv": ...}) also gets None when the daemon is busy with
+    another call or does not accept it within DAEMON_ACCEPT_TIMEOUT, so the
+    caller can run it in-process; once accepted, timeout bounds the call.
+    """
+    forwarded = "argv" in request
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(DAEMON_ACCEPT_TIMEOUT if forwarded else timeout)
+            client.connect(str(DAEMON_SOCKET))
+            client.sendall(json.dumps(request).encode() + b"\n")
+            with client.makefile("rb") as reply:
+                if forwarded:
+                    answer = json.loads(reply.readline())
+                    if not answer.get("accepted"):
+                        print(f"⏳ Daemon busy with {answer.get('busy')}, running in this process", file=sys.stderr)
+                        return None
+                    client.settimeout(timeout)
+                    client.sendall(b"go\n")
+                return json.loads(reply.readline())
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Apex Dashboard Mock CDP Server - Chrome DevTools Protocol stand-in for project-manager.py
+Serves the HTTP discovery endpoints and browser/page WebSockets on one port,
+with configurable latency and scripted events, so the client can be run and
+benchmarked on a machine without Chrome.
+
+Needs websockets 14 or newer (the same package the client uses).
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import sys
+import zlib
+from urllib.parse import unquote, urlsplit
+
+try:
+    from websockets.asyncio.server import serve
+except ImportError:
+    print("❌ The mock CDP server needs websockets 14+ (pip install -r scripts/requirements.txt)")
+    sys.exit(1)
+
+
+# ===== CANNED RESPONSES =====
+
+# Runtime.evaluate values picked by a substring of the expression, checked
+# in order, for the page scripts project-manager.py evaluates
+EVALUATE_VALUES = [
+    ("MutationObserver", {"ok": True, "ms": 0}),
+    ("scrollX", [0, 500]),
+    ("largest-contentful-paint", {"ttfb": 12, "dom_content_loaded": 80, "load": 120, "first_paint": 60,
+                                  "fcp": 62, "lcp": 90, "transfer_kib": 40}),
+]
+
+
+def make_png(width, height, seed=b""):
+    """A solid-color RGB PNG, the color derived from seed"""
+    red, green, blue = hashlib.sha1(seed).digest()[:3]
+    row = b"\x00" + bytes((red, green, blue)) * width
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+def make_heap_snapshot():
+    """A tiny but well-formed .heapsnapshot: root -> Window -> two objects and a string"""
+    nodes = [9, 0, 1, 0, 1, 0, 0,
+             3, 1, 3, 50, 3, 0, 0,
+             3, 2, 5, 100, 1, 0, 0,
+             3, 2, 7, 100, 0, 0, 0,
+             2, 3, 9, 20, 0, 0, 0]
+    edges = [2, 4, 7,
+             2, 4, 14, 2, 4, 21, 2, 4, 28,
+             2, 4, 28]
+    return json.dumps({
+        "snapshot": {
+            "meta": {
+                "node_fields": ["type", "name", "id", "self_size", "edge_count", "trace_node_id", "detachedness"],
+                "node_types": [["hidden", "array", "string", "object", "code", "closure", "regexp", "number",
+                                "native", "synthetic", "concatenated string", "sliced string", "symbol", "bigint",
+                                "object shape"], "string", "number", "number", "number", "number", "number"],
+                "edge_fields": ["type", "name_or_index", "to_node"],
+                "edge_types": [["context", "element", "property", "internal", "hidden", "shortcut", "weak"],
+                               "string_or_number", "node"]
+            },
+            "node_count": len(nodes) // 7,
+            "edge_count": len(edges) // 3
+        },
+        "nodes": nodes, "edges": edges, "trace_function_infos": [], "trace_tree": [], "samples": [],
+        "locations": [], "strings": ["(GC roots)", "Window", "Item", "label", "x"]
+    })
+
+
+def make_cpu_profile():
+    """A three-node profile of 100 samples, 100µs apart"""
+    def frame(name):
+        return {"functionName": name, "url": "http://localhost:5173/src/main.ts" if name[0] != "(" else "",
+                "lineNumber": 1, "columnNumber": 0, "scriptId": "1"}
+    return {
+        "nodes": [{"id": 1, "callFrame": frame("(root)"), "children": [2, 3]},
+                  {"id": 2, "callFrame": frame("(idle)"), "children": []},
+                  {"id": 3, "callFrame": frame("render"), "children": []}],
+        "startTime": 0, "endTime": 10000, "samples": [2, 3] * 50, "timeDeltas": [100] * 100
+    }
+
+
+TRACE_EVENTS = json.dumps({"traceEvents": [
+    {"name": "TracingStartedInBrowser", "ph": "I", "pid": 1, "tid": 1, "ts": 0,
+     "args": {"data": {"frames": [{"processId": 1}]}}},
+    {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "CrRendererMain"}},
+    {"name": "RunTask", "ph": "X", "pid": 1, "tid": 1, "ts": 1000, "dur": 60000},
+    {"name": "FunctionCall", "ph": "X", "pid": 1, "tid": 1, "ts": 1000, "dur": 40000},
+]})
+
+
+# ===== MOCK BROWSER =====
+
+class MockBrowser:
+    """Targets, stats and CDP behaviour behind one mock endpoint
+
+    A scenario (JSON) can override replies and script extra events:
+    {"replies": {"Method": {...result} or {"error": {...}}},
+     "events": {"Method": [{"method": "...", "params": {...}, "delay_ms": 0}]},
+     "evaluate": [["substring", value], ...],
+     "selectors": {"css selector": match count}}
+    Events listed under a method are sent after every reply to it.
+    """
+
+    def __init__(self, host, port, latency_ms=0, http_latency_ms=0, nav_delay_ms=20, tabs=1, scenario=None):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.http_latency = http_latency_ms / 1000
+        self.nav_delay = nav_delay_ms / 1000
+        self.scenario = scenario or {}
+        self.evaluate_values = [tuple(rule) for rule in self.scenario.get("evaluate", [])] + EVALUATE_VALUES
+        self.targets = {}
+        self.page_sockets = {}
+        self.browser_sockets = set()
+        self.contexts = set()
+        self.streams = {}
+        self._next_id = 0
+        self.reset_stats()
+        for _ in range(tabs):
+            self.add_target("http://localhost:5173/")
+
+    def reset_stats(self):
+        self.stats = {"http": {}, "handshakes": {"page": 0, "browser": 0}, "commands": {}}
+
+    def new_id(self, prefix):
+        self._next_id += 1
+        return f"{prefix}{self._next_id:04d}"
+
+    def add_target(self, url, context_id=None):
+        target_id = self.new_id("MOCK")
+        self.targets[target_id] = {"id": target_id, "type": "page", "url": url, "title": "",
+                                   "context": context_id, "loader": 0}
+        self.broadcast("Target.targetCreated", {"targetInfo": self.target_info(target_id)})
+        return target_id
+
+    def remove_target(self, target_id):
+        if self.targets.pop(target_id, None) is not None:
+            self.broadcast("Target.targetDestroyed", {"targetId": target_id})
+        for ws in list(self.page_sockets.pop(target_id, ())):
+            asyncio.get_running_loop().create_task(ws.close())
+
+    def target_info(self, target_id):
+        target = self.targets[target_id]
+        return {"targetId": target_id, "type": "page", "url": target["url"], "title": target["title"],
+                "attached": bool(self.page_sockets.get(target_id)), "browserContextId": target["context"]}
+
+    def json_target(self, target_id):
+        target = self.targets[target_id]
+        return {"id": target_id, "type": "page", "url": target["url"], "title": target["title"],
+                "webSocketDebuggerUrl": f"ws://{self.host}:{self.port}/devtools/page/{target_id}"}
+
+    def broadcast(self, method, params):
+        for ws in list(self.browser_sockets):
+            self.emit(ws, method, params)
+
+    def emit(self, ws, method, params, delay=0):
+        asyncio.get_running_loop().create_task(self._send(ws, {"method": method, "params": params}, delay))
+
+    async def _send(self, ws, message, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await ws.send(json.dumps(message))
+        except Exception:
+            pass
+
+    # ===== HTTP =====
+
+    async def process_request(self, connection, request):
+        path = urlsplit(request.path).path
+        if request.headers.get("Upgrade", "").lower() == "websocket":
+            kind = "browser" if path.startswith("/devtools/browser/") else "page"
+            self.stats["handshakes"][kind] += 1
+            return None
+
+        if not path.startswith("/mock/"):
+            key = path.rsplit("/", 1)[0] if path.startswith(("/json/close/", "/json/activate/")) else path
+            self.stats["http"][key] = self.stats["http"].get(key, 0) + 1
+            if self.http_latency:
+                await asyncio.sleep(self.http_latency)
+
+        query = unquote(request.path.split("?", 1)[1]) if "?" in request.path else ""
+        if path == "/json/version":
+            body = {"Browser": "MockChrome/1.0", "Protocol-Version": "1.3",
+                    "webSocketDebuggerUrl": f"ws://{self.host}:{self.port}/devtools/browser/mock"}
+        elif path in ("/json", "/json/list"):
+            body = [self.json_target(target_id) for target_id in self.targets]
+        elif path == "/json/new":
+            body = self.json_target(self.add_target(query or "about:blank"))
+        elif path.startswith("/json/close/"):
+            self.remove_target(path.rsplit("/", 1)[1])
+            body = "Target is closing"
+        elif path.startswith("/json/activate/"):
+            body = "Target activated"
+        elif path == "/mock/stats":
+            body = self.stats
+        elif path == "/mock/reset":
+            self.reset_stats()
+            body = {"ok": True}
+        else:
+            return connection.respond(404, "Not found\n")
+
+        response = connection.respond(200, json.dumps(body))
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    # ===== WEBSOCKETS =====
+
+    async def handler(self, ws):
+        path = urlsplit(ws.request.path).path
+        if path.startswith("/devtools/browser/"):
+            await self.serve_socket(ws, None)
+            return
+        target_id = path.rsplit("/", 1)[1]
+        if target_id not in self.targets:
+            await ws.close(1011, "No such target")
+            return
+        await self.serve_socket(ws, target_id)
+
+    async def serve_socket(self, ws, target_id):
+        sockets = self.browser_sockets if target_id is None else self.page_sockets.setdefault(target_id, set())
+        sockets.add(ws)
+        enabled = set()
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                method = message.get("method", "")
+                self.stats["commands"][method] = self.stats["commands"].get(method, 0) + 1
+                params = message.get("params", {})
+                try:
+                    if method in self.scenario.get("replies", {}):
+                        reply = dict(self.scenario["replies"][method])
+                        result, events = (reply if "error" in reply else {"result": reply}), []
+                    else:
+                        handle = self.browser_command if target_id is None else self.page_command
+                        result, events = handle(ws, target_id, method, params, enabled)
+                        result = {"result": result}
+                except KeyError as e:
+                    result, events = {"error": {"code": -32602, "message": f"Invalid parameters: {e}"}}, []
+                # Events with no delay (like heap snapshot chunks) precede the reply, as in Chrome
+                for event_method, event_params, delay in events:
+                    if delay is None:
+                        self.emit(ws, event_method, event_params, self.latency)
+                asyncio.get_running_loop().create_task(self._send(ws, {"id": message["id"], **result}, self.latency))
+
+                for event_method, event_params, delay in events:
+                    if delay is not None:
+                        self.emit(ws, event_method, event_params, self.latency + delay)
+                for event in self.scenario.get("events", {}).get(method, []):
+                    self.emit(ws, event["method"], event.get("params", {}),
+                              self.latency + event.get("delay_ms", 0) / 1000)
+        except Exception:
+            pass
+        finally:
+            sockets.discard(ws)
+
+    def browser_command(self, ws, target_id, method, params, enabled):
+        events = []
+        if method == "Target.setDiscoverTargets":
+            events = [("Target.targetCreated", {"targetInfo": self.target_info(target)}, 0) for target in self.targets]
+            return {}, events
+        if method == "Target.getTargets":
+            return {"targetInfos": [self.target_info(target) for target in self.targets]}, events
+        if method == "Target.createBrowserContext":
+            context_id = self.new_id("CTX")
+            self.contexts.add(context_id)
+            return {"browserContextId": context_id}, events
+        if method == "Target.disposeBrowserContext":
+            self.contexts.discard(params["browserContextId"])
+            for target in [target for target, info in self.targets.items() if info["context"] == params["browserContextId"]]:
+                self.remove_target(target)
+            return {}, events
+        if method == "Target.createTarget":
+            return {"targetId": self.add_target(params.get("url", "about:blank"), params.get("browserContextId"))}, events
+        if method == "Target.closeTarget":
+            self.remove_target(params["targetId"])
+            return {"success": True}, events
+        if method == "Browser.getVersion":
+            return {"product": "MockChrome/1.0", "protocolVersion": "1.3"}, events
+        return {}, events
+
+    def page_command(self, ws, target_id, method, params, enabled):
+        target = self.targets[target_id]
+        domain, _, command = method.partition(".")
+        if command == "enable":
+            enabled.add(domain)
+        if method in ("Page.navigate", "Page.reload"):
+            return self.navigate(target_id, params.get("url", target["url"]), method == "Page.reload", enabled)
+        if method == "Page.captureScreenshot":
+            return {"data": base64.b64encode(make_png(64, 48, target["url"].encode())).decode()}, []
+        if method == "Page.close":
+            asyncio.get_running_loop().call_later(0.01, self.remove_target, target_id)
+            return {}, []
+        if method == "Runtime.evaluate":
+            expression = params.get("expression", "")
+            for needle, value in self.evaluate_values:
+                if needle in expression:
+                    return {"result": {"type": "object", "value": value}}, []
+            try:
+                return {"result": {"type": "object", "value": json.loads(expression)}}, []
+            except ValueError:
+                return {"result": {"type": "undefined"}}, []
+        if method == "DOM.getDocument":
+            return {"root": {"nodeId": 1, "nodeName": "#document", "childNodeCount": 1}}, []
+        if method == "DOM.querySelectorAll":
+            count = self.scenario.get("selectors", {}).get(params["selector"], 1)
+            base = int(hashlib.sha1(params["selector"].encode()).hexdigest()[:6], 16) * 8 + 2
+            return {"nodeIds": [base + index for index in range(count)]}, []
+        if method == "DOM.getBoxModel":
+            x = 20 + params["nodeId"] % 600
+            return {"model": {"content": [x, 100, x + 80, 100, x + 80, 132, x, 132], "width": 80, "height": 32}}, []
+        if method == "Performance.getMetrics":
+            return {"metrics": [{"name": "TaskDuration", "value": 0.05}, {"name": "ScriptDuration", "value": 0.02}]}, []
+        if method == "HeapProfiler.takeHeapSnapshot":
+            snapshot = make_heap_snapshot()
+            return {}, [("HeapProfiler.addHeapSnapshotChunk", {"chunk": snapshot[start:start + 256]}, None)
+                        for start in range(0, len(snapshot), 256)]
+        if method == "Profiler.stop":
+            return {"profile": make_cpu_profile()}, []
+        if method == "Profiler.takePreciseCoverage":
+            return {"result": []}, []
+        if method == "CSS.stopRuleUsageTracking":
+            return {"ruleUsage": []}, []
+        if method == "Tracing.end":
+            stream = self.new_id("STREAM")
+            self.streams[stream] = 0
+            return {}, [("Tracing.tracingComplete", {"dataLossOccurred": False, "stream": stream}, 0)]
+        if method == "IO.read":
+            offset = self.streams.get(params["handle"], 0)
+            chunk = TRACE_EVENTS[offset:offset + params.get("size", 1 << 20)]
+            self.streams[params["handle"]] = offset + len(chunk)
+            return {"data": chunk, "eof": offset + len(chunk) >= len(TRACE_EVENTS)}, []
+        if method == "IO.close":
+            self.streams.pop(params.get("handle"), None)
+        if method == "Network.getResponseBody":
+            return {"body": "", "base64Encoded": False}, []
+        return {}, []
+
+    def navigate(self, target_id, url, reload, enabled):
+        """Reply like Chrome and queue the lifecycle events of the new document"""
+        target = self.targets[target_id]
+        same_document = not reload and url.split("#")[0] == target["url"].split("#")[0] and "#" in url
+        target["url"] = url
+        self.broadcast("Target.targetInfoChanged", {"targetInfo": self.target_info(target_id)})
+        if same_document:
+            return {"frameId": target_id}, [("Page.navigatedWithinDocument", {"frameId": target_id, "url": url}, 0)]
+
+        target["loader"] += 1
+        loader_id = f"LOADER{target['loader']}"
+        events = [("Page.frameStartedLoading", {"frameId": target_id}, 0)]
+        if "DOM" in enabled:
+            events.append(("DOM.documentUpdated", {}, self.nav_delay / 2))
+        for name in ("DOMContentLoaded", "load", "networkIdle"):
+            events.append(("Page.lifecycleEvent", {"frameId": target_id, "loaderId": loader_id, "name": name,
+                                                   "timestamp": 0}, self.nav_delay))
+        events.append(("Page.loadEventFired", {"timestamp": 0}, self.nav_delay))
+        return ({} if reload else {"frameId": target_id, "loaderId": loader_id}), events
+
+
+# ===== MAIN =====
+
+async def run_server(browser):
+    async with serve(browser.handler, browser.host, browser.port, process_request=browser.process_request,
+                     max_size=None, compression=None, ping_interval=None):
+        print(f"🧪 Mock CDP server on http://{browser.host}:{browser.port} "
+              f"({len(browser.targets)} tabs, {browser.latency * 1000:.0f}ms latency)", flush=True)
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Chrome DevTools Protocol endpoint for project-manager.py')
+    parser.add_argument('--host', type=str, default='localhost', help='Interface to listen on (default: localhost)')
+    parser.add_argument('--port', type=int, default=9222, help='Port to listen on (default: 9222)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay before every CDP reply and event (default: 0)')
+    parser.add_argument('--http-latency-ms', type=float, default=0, help='Delay before every /json reply (default: 0)')
+    parser.add_argument('--nav-delay-ms', type=float, default=20, help='Time from a navigation reply to its load events (default: 20)')
+    parser.add_argument('--tabs', type=int, default=1, help='Tabs open at http://localhost:5173/ on start (default: 1)')
+    parser.add_argument('--scenario', type=str, metavar='FILE', help='JSON file of scripted replies and events')
+    args = parser.parse_args()
+
+    scenario = None
+    if args.scenario:
+        try:
+            with open(args.scenario) as f:
+                scenario = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load scenario: {e}")
+            return 1
+
+    browser = MockBrowser(args.host, args.port, args.latency_ms, args.http_latency_ms, args.nav_delay_ms,
+                          args.tabs, scenario)
+    try:
+        asyncio.run(run_server(browser))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"❌ Could not listen on {args.host}:{args.port}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5609 @@
+#!/usr/bin/env python3
+"""
+Apex Dashboard Project Manager - Consolidated script for all project operations
+Handles browser management, session coordination, and project maintenance
+
+Run it through scripts/project-manager.py, which forwards calls to a running
+daemon and only imports this module otherwise, so it is compiled once and
+loaded from cached bytecode instead of being recompiled on every call.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import subprocess
+import signal
+import socket
+import socketserver
+import threading
+import contextlib
+import contextvars
+import hashlib
+import heapq
+import itertools
+import array
+import gzip
+import tempfile
+import base64
+import binascii
+import collections
+import re
+import select
+import struct
+import ctypes
+import ctypes.util
+import tracemalloc
+import shutil
+from pathlib import Path
+from urllib.parse import urlsplit
+from datetime import datetime
+import argparse
+
+from daemon_client import DAEMON_SOCKET, send_to_daemon
+
+# asyncio, requests and websockets are imported on first use by
+# load_client_dependencies(), so CLI calls answered by the daemon never pay
+# for them
+asyncio = None
+requests = None
+websockets = None
+
+
+def load_client_dependencies():
+    """Import the browser client's heavier dependencies"""
+    global asyncio, requests, websockets
+    if websockets is None:
+        import asyncio
+        import requests
+        import websockets
+
+# The command line entry point, which the daemon is started through
+ENTRY_SCRIPT = Path(__file__).resolve().parent / "project-manager.py"
+
+# Ports probed for a Chrome debugging endpoint, in order. APEX_CDP_PORTS
+# (comma-separated) is tried first, then the port Chrome wrote to the dev
+# profile's DevToolsActivePort file.
+DEFAULT_CDP_PORTS = (9222, 9223, 9224, 9229)
+DEV_PROFILE_DIR = Path.home() / "chrome-dev-profile"
+
+# Event that marks each --wait-until condition: (CDP event, lifecycle name)
+WAIT_UNTIL_EVENTS = {
+    "load": ("Page.loadEventFired", None),
+    "domcontentloaded": ("Page.lifecycleEvent", "DOMContentLoaded"),
+    "networkidle": ("Page.lifecycleEvent", "networkIdle"),
+    "none": (None, None),
+}
+
+# Scrolls, then resolves once the scroll position has been stable for two
+# animation frames (or the page-side timeout passes), in a single round-trip
+SCROLL_AND_SETTLE_SCRIPT = """
+new Promise(resolve => {
+    const done = () => resolve([window.scrollX, window.scrollY]);
+    const timer = setTimeout(done, %(timeout_ms)d);
+    let last = null, stable = 0;
+    %(scroll)s
+    const check = () => {
+        const position = window.scrollX + ',' + window.scrollY;
+        stable = position === last ? stable + 1 : 0;
+        last = position;
+        if (stable >= 2) { clearTimeout(timer); done(); }
+        else requestAnimationFrame(check);
+    };
+    requestAnimationFrame(check);
+})
+"""
+
+# Resolves with {ok, ms} once condition() is truthy, or with ok false after
+# the page-side timeout. The condition is checked when the DOM changes (one
+# MutationObserver batch at a time) and on a short in-page interval for
+# state that mutations do not show (styles, layout, JS variables), so a wait
+# costs one Runtime.evaluate round-trip however long it takes.
+WAIT_FOR_SCRIPT = """
+new Promise(resolve => {
+    const start = performance.now();
+    const condition = %(condition)s;
+    let observer = null, timer = null, poll = null;
+    const finish = ok => {
+        if (observer) observer.disconnect();
+        clearTimeout(timer);
+        clearInterval(poll);
+        resolve({ok: ok, ms: performance.now() - start});
+    };
+    const check = () => {
+        let met = false;
+        try { met = !!condition(); } catch (e) {}
+        if (met) finish(true);
+        return met;
+    };
+    if (check()) return;
+    observer = new MutationObserver(check);
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    poll = setInterval(check, %(poll_ms)d);
+    timer = setTimeout(() => finish(false), %(timeout_ms)d);
+})
+"""
+
+# Condition functions for WAIT_FOR_SCRIPT, by selector state
+ELEMENT_VISIBLE = ("(el => !!el && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)"
+                   " && getComputedStyle(el).visibility !== 'hidden')")
+WAIT_FOR_SELECTOR = {
+    "attached": "() => document.querySelector(%(selector)s) !== null",
+    "visible": "() => " + ELEMENT_VISIBLE + "(document.querySelector(%(selector)s))",
+    "hidden": "() => !" + ELEMENT_VISIBLE + "(document.querySelector(%(selector)s))",
+}
+WAIT_FOR_TEXT = "() => !!document.body && document.body.innerText.includes(%(text)s)"
+
+# Quiet period that counts as network idle for wait_for (Chrome's networkIdle uses 500ms too)
+NETWORK_IDLE_MS = 500
+
+
+def box_center(model, node_id=None):
+    """Center point and size of a DOM.getBoxModel content quad"""
+    quad = model["content"]
+    return {
+        "x": round(sum(quad[0::2]) / 4),
+        "y": round(sum(quad[1::2]) / 4),
+        "width": model["width"],
+        "height": model["height"],
+        "node_id": node_id
+    }
+
+
+def wait_condition_label(selector=None, text=None, predicate=None, network_idle=False, state="visible"):
+    """Short description of a wait_for condition for messages and timings"""
+    if network_idle:
+        return "network idle"
+    if selector:
+        return f"{selector} {state}"
+    if text:
+        return f"text {text!r}"
+    return f"js {predicate}"
+
+
+def parse_wait_condition(spec):
+    """Turn a --wait-for value into wait_for keyword arguments
+
+    "text:Saved" waits for text, "js:window.app.ready" for a JS predicate,
+    "networkidle" for a quiet network; anything else (optionally prefixed
+    "css:") is a CSS selector.
+    """
+    if spec == "networkidle":
+        return {"network_idle": True}
+    for prefix, key in (("text:", "text"), ("js:", "predicate"), ("css:", "selector")):
+        if spec.startswith(prefix):
+            return {key: spec[len(prefix):]}
+    return {"selector": spec}
+
+
+# Navigation Timing, paint timings and LCP of the current document in ms,
+# read once load handlers have finished. Buffered LCP entries are taken
+# synchronously with takeRecords, so no observer has to be installed early.
+PAGE_TIMINGS_SCRIPT = """
+new Promise(resolve => setTimeout(() => {
+    const nav = performance.getEntriesByType('navigation')[0] || {};
+    const paints = {};
+    performance.getEntriesByType('paint').forEach(entry => { paints[entry.name] = entry.startTime; });
+    let lcp = null;
+    try {
+        const observer = new PerformanceObserver(() => {});
+        observer.observe({type: 'largest-contentful-paint', buffered: true});
+        const entries = observer.takeRecords();
+        observer.disconnect();
+        if (entries.length) lcp = entries[entries.length - 1].startTime;
+    } catch (e) {}
+    resolve({
+        ttfb: nav.responseStart,
+        dom_content_loaded: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+        first_paint: paints['first-paint'],
+        fcp: paints['first-contentful-paint'],
+        lcp: lcp,
+        transfer_kib: nav.transferSize !== undefined ? nav.transferSize / 1024 : null
+    });
+}, 0))
+"""
+
+# Performance.getMetrics counters reported by --bench-load, as the change over one load
+# (durations are in seconds and converted to ms)
+LOAD_METRICS = {
+    "TaskDuration": "task_ms",
+    "ScriptDuration": "script_ms",
+    "LayoutDuration": "layout_ms",
+    "RecalcStyleDuration": "style_ms",
+}
+
+# Metrics --bench-load compares against a baseline, at p50 and p90. A
+# metric regresses when it exceeds the baseline by more than the relative
+# tolerance and by more than LOAD_SLACK_MS, so sub-millisecond jitter on
+# tiny values never fails the gate.
+LOAD_GATED_METRICS = ("ttfb", "fcp", "lcp", "dom_content_loaded", "load", "task_ms")
+LOAD_SLACK_MS = 5
+
+
+def percentile(values, fraction):
+    """Linearly interpolated percentile of a non-empty list of numbers"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+# Client operations --bench-client times in process against
+# scripts/mock-cdp-server.py, as (name, AsyncApexProjectManager method, args, kwargs)
+CLIENT_BENCH_OPERATIONS = [
+    ("status", "browser_status", (), {}),
+    ("verify", "browser_verify", (), {}),
+    ("navigate", "browser_navigate", ("http://localhost:5173/",), {}),
+    ("reload", "browser_reload", (), {}),
+    ("screenshot", "browser_screenshot", (), {}),
+    ("click_xy", "browser_click", (100, 200), {}),
+    ("click_selector", "browser_click", (), {"selector": "#app"}),
+    ("type_insert", "browser_type", ("hello",), {}),
+    ("type_keys", "browser_type", ("hello", "keys"), {}),
+    ("key", "browser_key", ("Enter",), {}),
+    ("evaluate", "browser_evaluate", ("true",), {}),
+    ("scroll", "browser_scroll", ("down",), {}),
+    ("focus", "browser_focus", ("input",), {}),
+    ("locate", "browser_locate", (["#app", "button"],), {}),
+    ("wait_for", "browser_wait_for", (), {"selector": "#app"}),
+]
+
+# CLI entry points --bench-client times as subprocesses, with and without the daemon
+CLIENT_BENCH_COMMANDS = [
+    ("status", []),
+    ("verify", ["--verify"]),
+    ("navigate", ["--navigate", "http://localhost:5173/"]),
+    ("reload", ["--reload"]),
+    ("screenshot", ["--screenshot"]),
+    ("click_xy", ["--click", "100,200"]),
+    ("click_selector", ["--click", "#app"]),
+    ("type", ["--type", "hello"]),
+    ("key", ["--key", "Enter"]),
+    ("evaluate", ["--evaluate", "true"]),
+    ("scroll", ["--scroll", "down"]),
+    ("wait_for", ["--wait-for", "#app"]),
+    ("locate", ["--locate", "#app"]),
+]
+
+# Per-call protocol counts --bench-client gates exactly: any increase over the
+# baseline (beyond float noise from averaging) is a regression
+CLIENT_BENCH_COUNTS = ("http", "handshakes", "commands", "cold_http", "cold_handshakes")
+
+
+# windowsVirtualKeyCode for the named keys browser_key understands
+KEY_CODES = {
+    "Enter": 13,
+    "Escape": 27,
+    "Space": 32,
+    "ArrowUp": 38,
+    "ArrowDown": 40,
+    "ArrowLeft": 37,
+    "ArrowRight": 39,
+    "Tab": 9,
+    "Backspace": 8,
+    "Delete": 46
+}
+
+
+# Matches of a selector whose boxes are checked for the first visible one
+SELECTOR_CANDIDATES = 5
+
+
+# Set by run_flow(quiet=True) for the task running the flow, so the browser_*
+# methods it calls skip their status lines; load test users run many flows
+# at once and only the summary matters
+QUIET_OUTPUT = contextvars.ContextVar("quiet_output", default=False)
+
+
+def say(*args, **kwargs):
+    """print, unless the calling task runs quietly (see QUIET_OUTPUT)"""
+    if not QUIET_OUTPUT.get():
+        print(*args, **kwargs)
+
+
+# Flow step actions and the AsyncApexProjectManager method each one runs
+FLOW_ACTIONS = {
+    "navigate": "browser_navigate",
+    "reload": "browser_reload",
+    "screenshot": "browser_screenshot",
+    "scroll": "browser_scroll",
+    "click": "browser_click",
+    "type": "browser_type",
+    "key": "browser_key",
+    "focus": "browser_focus",
+    "evaluate": "evaluate",
+    "wait_for": "browser_wait_for",
+}
+
+
+def load_flow(path):
+    """Read flow steps from a JSONL, JSON or YAML file"""
+    path = Path(path)
+    if path.suffix in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("YAML flows need PyYAML (pip install pyyaml), or use JSONL")
+        steps = yaml.safe_load(path.read_text()) or []
+    elif path.suffix == '.json':
+        steps = json.loads(path.read_text())
+    else:
+        steps = [json.loads(line) for line in path.read_text().splitlines()
+                 if line.strip() and not line.lstrip().startswith('#')]
+
+    if not isinstance(steps, list) or not all(isinstance(step, dict) and 'action' in step for step in steps):
+        raise ValueError("A flow must be a list of objects with an 'action' key")
+    return steps
+
+
+# Named viewports for --capture-matrix: (width, height, device scale factor, mobile)
+VIEWPORT_PRESETS = {
+    'mobile': (390, 844, 3, True),
+    'tablet': (820, 1180, 2, True),
+    'desktop': (1440, 900, 1, False),
+}
+
+
+def parse_viewport(spec):
+    """Turn a preset name or "WxH[@scale]" into a (name, width, height, scale, mobile) tuple"""
+    spec = spec.strip()
+    if spec in VIEWPORT_PRESETS:
+        return (spec,) + VIEWPORT_PRESETS[spec]
+    match = re.fullmatch(r"(\d+)x(\d+)(?:@(\d+(?:\.\d+)?))?", spec)
+    if not match:
+        raise ValueError(f"Unknown viewport '{spec}', use {', '.join(VIEWPORT_PRESETS)} or WxH[@scale]")
+    width, height = int(match.group(1)), int(match.group(2))
+    return (spec, width, height, float(match.group(3) or 1), False)
+
+
+# ===== DIRECTORY TREE =====
+
+# Directories never shown in PROJECT_DIRECTORY.md, whatever .gitignore says
+TREE_SKIP_DIRS = {'.git', 'node_modules', 'dist', '.nuxt', '.next', 'coverage', '.pytest_cache', '__pycache__',
+                  '.serena'}
+
+# Working files of this script, left out so updating the tree or running the daemon never changes it
+TREE_SKIP_FILES = {'PROJECT_DIRECTORY.md.tmp', 'directory-index.json', 'directory-index.tmp', 'project-manager.sock'}
+
+
+class GitIgnore:
+    """Matches paths against the .gitignore files of a tree
+
+    Supports the common gitignore syntax: comments, ! negation, trailing /
+    for directories, leading or embedded / anchoring, *, ?, [...] and **.
+    Rules from a nested .gitignore only apply below its directory, and the
+    last matching rule wins.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.rules = []
+        self.load(self.root / ".gitignore", "")
+
+    def load(self, gitignore_path, base):
+        """Add the rules of a .gitignore found at relative directory base"""
+        try:
+            lines = Path(gitignore_path).read_text().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return
+
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            if line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            anchored = '/' in line
+            body = self._translate(line.lstrip('/'))
+            if not anchored:
+                body = f"(?:.*/)?{body}"
+            prefix = re.escape(base + "/") if base else ""
+            self.rules.append((re.compile(f"^{prefix}{body}$"), negate, dir_only))
+
+    def ignored(self, relative_path, is_dir):
+        """Check a POSIX path relative to the tree root"""
+        ignored = False
+        for pattern, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if pattern.match(relative_path):
+                ignored = not negate
+        return ignored
+
+    @staticmethod
+    def _translate(pattern):
+        regex = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith('**/', i):
+                regex.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                regex.append('.*')
+                i += 2
+                continue
+            if char == '*':
+                regex.append('[^/]*')
+            elif char == '?':
+                regex.append('[^/]')
+            elif char == '[':
+                end = pattern.find(']', i + 1)
+                if end == -1:
+                    regex.append('\\[')
+                else:
+                    group = pattern[i + 1:end]
+                    if group.startswith('!'):
+                        group = '^' + group[1:]
+                    regex.append(f"[{group}]")
+                    i = end
+            else:
+                regex.append(re.escape(char))
+            i += 1
+        return ''.join(regex)
+
+
+def scan_directory(path):
+    """List a directory as sorted (name, is_dir, is_link) tuples, directories first, or None if unreadable"""
+    try:
+        with os.scandir(path) as scan:
+            entries = [(entry.name, entry.is_dir(), entry.is_symlink()) for entry in scan]
+    except OSError:
+        return None
+    entries.sort(key=lambda entry: (not entry[1], entry[0]))
+    return entries
+
+
+class DirectoryIndex:
+    """Directory listings cached by directory mtime and persisted between runs
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so an unchanged mtime means its cached listing is still
+    right and only one stat is needed instead of a scandir. When a
+    DirectoryWatcher keeps the index current, trusted is set and cached
+    listings are used without even that stat.
+    """
+
+    VERSION = 1
+
+    def __init__(self, root, path=None):
+        self.root = Path(root)
+        self.path = Path(path) if path else None
+        self.dirs = {}
+        self.visited = set()
+        self.scanned = 0
+        self.trusted = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Read the persisted index, ignoring it if missing, stale or for another root"""
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.VERSION or data.get("root") != str(self.root.resolve()):
+            return
+        self.dirs = {relative_dir: (mtime, [tuple(entry) for entry in entries])
+                     for relative_dir, (mtime, entries) in data.get("dirs", {}).items()}
+
+    def save(self):
+        """Persist the listings of the directories visited since begin()"""
+        if self.path is None:
+            return
+        with self._lock:
+            dirs = {relative_dir: self.dirs[relative_dir] for relative_dir in self.visited if relative_dir in self.dirs}
+        temporary = self.path.with_suffix(".tmp")
+        with open(temporary, 'w') as f:
+            json.dump({"version": self.VERSION, "root": str(self.root.resolve()), "dirs": dirs}, f)
+        os.replace(temporary, self.path)
+
+    def begin(self):
+        """Start a walk: reset the visited set and scan counter"""
+        self.visited = set()
+        self.scanned = 0
+
+    def listing(self, relative_dir):
+        """Return the (name, is_dir, is_link) entries of a directory, rescanning only if it changed"""
+        self.visited.add(relative_dir)
+        with self._lock:
+            cached = self.dirs.get(relative_dir)
+        if cached is not None and self.trusted:
+            return cached[1]
+
+        path = self.root / relative_dir if relative_dir else self.root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        # Stat before scanning, so a change during the scan leaves a stale mtime and is rescanned next time
+        entries = scan_directory(path)
+        if entries is not None:
+            self.scanned += 1
+            with self._lock:
+                self.dirs[relative_dir] = (mtime, entries)
+        return entries
+
+    def invalidate(self, relative_dir):
+        """Forget one directory's listing so the next walk rescans it"""
+        with self._lock:
+            self.dirs.pop(relative_dir, None)
+
+
+class DirectoryWatcher:
+    """Keeps a DirectoryIndex current with Linux inotify
+
+    Each watched directory is invalidated in the index as soon as an entry
+    is created, deleted or moved in it, so a walk over a trusted index only
+    rescans directories that actually changed.
+    """
+
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_MOVED_FROM | IN_MOVED_TO
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, index):
+        self.index = index
+        self.watches = {}
+        self._watched = set()
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith("linux") and hasattr(os, "O_CLOEXEC")
+
+    def watch(self, relative_dir):
+        """Start watching one directory of the index root"""
+        if relative_dir in self._watched:
+            return
+        path = self.index.root / relative_dir if relative_dir else self.index.root
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd >= 0:
+            self.watches[wd] = relative_dir
+            self._watched.add(relative_dir)
+
+    def sync_watches(self, relative_dirs):
+        """Watch every directory in relative_dirs that is not watched yet"""
+        for relative_dir in list(relative_dirs):
+            self.watch(relative_dir)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="tree-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self._fd)
+
+    def _run(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                continue
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+                name = data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b"\0").decode(errors="replace")
+                offset += self.EVENT.size + length
+                self._handle(wd, mask, name)
+
+    def _handle(self, wd, mask, name):
+        if mask & self.IN_Q_OVERFLOW:
+            # Events were lost: fall back to checking mtimes
+            self.index.trusted = False
+            return
+
+        relative_dir = self.watches.get(wd)
+        if relative_dir is None or name in TREE_SKIP_FILES:
+            return
+        if mask & self.IN_IGNORED:
+            self._watched.discard(self.watches.pop(wd))
+            return
+
+        self.index.invalidate(relative_dir)
+        if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+            return
+        if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+            self.watch(f"{relative_dir}/{name}" if relative_dir else name)
+
+
+# ===== SCREENSHOT STORE =====
+
+# Size cap of .claude/screenshots/ before least recently used images are evicted
+# (APEX_SCREENSHOT_MAX_MB overrides it), and the most index entries kept
+SCREENSHOT_STORE_MAX_MB = 200
+SCREENSHOT_STORE_MAX_ENTRIES = 5000
+THUMBNAIL_WIDTH = 320
+
+
+class ScreenshotStore:
+    """Screenshots stored once per content hash, with a JSON index
+
+    Each distinct image is written once as <sha256>.png; index.json maps
+    capture names and times to those blobs, so capturing an unchanged page
+    only adds an index entry. Blobs remember when they were last captured
+    or fetched, and the least recently used are evicted (with their
+    entries) once the store outgrows max_bytes. Blobs used as --compare
+    baselines are pinned and never evicted. Optional thumbnails are kept
+    under thumbs/ and need Pillow.
+    """
+
+    def __init__(self, root, max_bytes=None):
+        self.root = Path(root)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("APEX_SCREENSHOT_MAX_MB", SCREENSHOT_STORE_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest):
+        return self.root / f"{digest}.png"
+
+    def thumbnail_path(self, digest):
+        return self.root / "thumbs" / f"{digest}.jpg"
+
+    def load(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if isinstance(index.get("blobs"), dict) and isinstance(index.get("entries"), list):
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"blobs": {}, "entries": []}
+
+    def save(self, index):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def put(self, data, name, thumbnail=False, created=None, **meta):
+        """Store PNG bytes under name, returns (blob path, whether the image was new, evicted blob count)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        with self._lock:
+            index = self.load()
+            blob = index["blobs"].get(digest)
+            new = blob is None or not path.exists()
+            if new:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(".tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                blob = index["blobs"][digest] = {"size": len(data), "created": datetime.now().isoformat()}
+                if data[:8] == b"\x89PNG\r\n\x1a\n":
+                    blob["width"], blob["height"] = struct.unpack(">II", data[16:24])
+            if thumbnail and not self.thumbnail_path(digest).exists():
+                blob["thumbnail"] = self._write_thumbnail(digest, data)
+            blob["last_used"] = time.time()
+            index["entries"].append({"name": name, "hash": digest, "created": created or datetime.now().isoformat(), **meta})
+            evicted = self._evict(index, self.max_bytes, keep=digest)
+            self.save(index)
+        return path, new, evicted
+
+    def _write_thumbnail(self, digest, data):
+        try:
+            from PIL import Image
+        except ImportError:
+            print("⚠️  Thumbnails need Pillow (pip install pillow), skipped")
+            return False
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+        image.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * image.height // max(image.width, 1)))
+        path = self.thumbnail_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        image.save(path, "JPEG", quality=70)
+        return True
+
+    def _drop_blob(self, index, digest):
+        blob = index["blobs"].pop(digest)
+        for path in (self.blob_path(digest), self.thumbnail_path(digest)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return blob["size"]
+
+    def _evict(self, index, max_bytes, keep=None):
+        """Drop old entries past SCREENSHOT_STORE_MAX_ENTRIES and LRU blobs past max_bytes"""
+        del index["entries"][:-SCREENSHOT_STORE_MAX_ENTRIES]
+        referenced = {entry["hash"] for entry in index["entries"]}
+        referenced.update(digest for digest, blob in index["blobs"].items() if blob.get("pinned"))
+        evicted = 0
+        for digest in [digest for digest in index["blobs"] if digest not in referenced]:
+            self._drop_blob(index, digest)
+            evicted += 1
+
+        total = sum(blob["size"] for blob in index["blobs"].values())
+        if total > max_bytes:
+            for digest in sorted(index["blobs"], key=lambda digest: index["blobs"][digest].get("last_used", 0)):
+                if total <= max_bytes:
+                    break
+                if digest == keep or index["blobs"][digest].get("pinned"):
+                    continue
+                total -= self._drop_blob(index, digest)
+                evicted += 1
+            remaining = index["blobs"]
+            index["entries"] = [entry for entry in index["entries"] if entry["hash"] in remaining]
+        return evicted
+
+    def resolve(self, ref=None):
+        """Find the newest entry named ref, or whose hash starts with ref (the newest entry if ref is None)
+
+        Returns (entry, blob path) and marks the blob as used, or None.
+        """
+        with self._lock:
+            index = self.load()
+            entries = index["entries"]
+            if ref:
+                entries = ([entry for entry in entries if entry["name"] == ref]
+                           or [entry for entry in entries if entry["hash"].startswith(ref)])
+                if len({entry["hash"] for entry in entries}) > 1 and not any(entry["name"] == ref for entry in entries):
+                    raise ValueError(f"Hash prefix {ref} is ambiguous")
+            if not entries:
+                return None
+            entry = entries[-1]
+            index["blobs"][entry["hash"]]["last_used"] = time.time()
+            self.save(index)
+        return entry, self.blob_path(entry["hash"])
+
+    def pin(self, ref, pinned=True):
+        """Pin (or unpin) the blob behind ref: a stored blob path, capture name or hash prefix
+
+        Returns the image path, or None if ref is not a capture. A file
+        outside the store is returned as is, since there is nothing to pin.
+        """
+        path = Path(ref)
+        with self._lock:
+            index = self.load()
+            if path.is_file():
+                digest = path.stem
+                if path.resolve().parent != self.root.resolve() or digest not in index["blobs"]:
+                    return path
+            else:
+                entries = ([entry for entry in index["entries"] if entry["name"] == ref]
+                           or [entry for entry in index["entries"] if entry["hash"].startswith(ref)])
+                if len({entry["hash"] for entry in entries}) > 1 and not any(entry["name"] == ref for entry in entries):
+                    raise ValueError(f"Hash prefix {ref} is ambiguous")
+                if not entries:
+                    return None
+                digest = entries[-1]["hash"]
+            blob = index["blobs"][digest]
+            if pinned:
+                blob["pinned"] = True
+            else:
+                blob.pop("pinned", None)
+            blob["last_used"] = time.time()
+            self.save(index)
+        return self.blob_path(digest)
+
+    def prune(self, max_bytes=None, older_than_days=None):
+        """Drop entries older than older_than_days and shrink to max_bytes, returns (blobs removed, bytes freed)"""
+        with self._lock:
+            index = self.load()
+            before = sum(blob["size"] for blob in index["blobs"].values())
+            if older_than_days is not None:
+                cutoff = datetime.now().timestamp() - older_than_days * 86400
+                index["entries"] = [entry for entry in index["entries"]
+                                    if datetime.fromisoformat(entry["created"]).timestamp() >= cutoff]
+            evicted = self._evict(index, self.max_bytes if max_bytes is None else max_bytes)
+            self.save(index)
+            after = sum(blob["size"] for blob in index["blobs"].values())
+        return evicted, before - after
+
+    def adopt(self, directory, pattern="screenshot_*.png"):
+        """Move loose screenshot files from directory into the store, returns how many were adopted
+
+        The originals are deleted, so paths to them (such as --compare
+        baselines) stop working; the captures keep their file names.
+        """
+        adopted = 0
+        for path in sorted(Path(directory).glob(pattern)):
+            self.put(path.read_bytes(), path.name,
+                     created=datetime.fromtimestamp(path.stat().st_mtime).isoformat())
+            path.unlink()
+            adopted += 1
+        return adopted
+
+    def stats(self):
+        index = self.load()
+        return {"entries": len(index["entries"]), "blobs": len(index["blobs"]),
+                "bytes": sum(blob["size"] for blob in index["blobs"].values())}
+
+
+# ===== SCREENSHOT DIFFING =====
+
+def load_image_dependencies():
+    """Import NumPy and Pillow for screenshot comparison"""
+    try:
+        import numpy
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Screenshot comparison needs NumPy and Pillow (pip install numpy pillow)")
+    return numpy, Image
+
+
+def tile_fingerprints(np, pixels, tile):
+    """Hash every tile x tile block of an RGBA array into one uint64
+
+    Each pixel is packed into a uint32 and the tile is reduced with a fixed
+    pseudo-random weight per position (wrapping uint64 arithmetic), so equal
+    tiles always match and any change almost surely alters the hash.
+    """
+    height, width = pixels.shape[:2]
+    words = pixels.view(np.uint32).reshape(height // tile, tile, width // tile, tile)
+    weights = np.random.default_rng(0x41504558).integers(1, 2 ** 63, size=(tile, tile), dtype=np.uint64) | 1
+    return (words.astype(np.uint64) * weights[None, :, None, :]).sum(axis=(1, 3), dtype=np.uint64)
+
+
+def changed_regions(changed_tiles, tile):
+    """Group 4-connected changed tiles into pixel rectangles (x, y, width, height)"""
+    rows, cols = changed_tiles.shape
+    seen = set()
+    regions = []
+    for start in zip(*changed_tiles.nonzero()):
+        start = (int(start[0]), int(start[1]))
+        if start in seen:
+            continue
+        seen.add(start)
+        stack = [start]
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        while stack:
+            row, col = stack.pop()
+            top, left, bottom, right = min(top, row), min(left, col), max(bottom, row), max(right, col)
+            for neighbour in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if (0 <= neighbour[0] < rows and 0 <= neighbour[1] < cols
+                        and neighbour not in seen and changed_tiles[neighbour]):
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        regions.append({
+            "x": left * tile,
+            "y": top * tile,
+            "width": (right - left + 1) * tile,
+            "height": (bottom - top + 1) * tile
+        })
+    return regions
+
+
+def compare_images(baseline_path, candidate_path, mask_path=None, tile=32, tolerance=8):
+    """Diff two screenshots, computing per-pixel differences only inside changed tiles
+
+    Both images are decoded to RGBA arrays and zero-padded to a common
+    multiple of tile, so a size change shows up as changed tiles. A pixel
+    counts as changed when any channel differs by more than tolerance.
+    Writes a grayscale mask image (changed pixels white) to mask_path when
+    given, and returns the summary dict.
+    """
+    np, Image = load_image_dependencies()
+
+    with Image.open(baseline_path) as image:
+        baseline = np.asarray(image.convert("RGBA"))
+    with Image.open(candidate_path) as image:
+        candidate = np.asarray(image.convert("RGBA"))
+
+    height = max(baseline.shape[0], candidate.shape[0])
+    width = max(baseline.shape[1], candidate.shape[1])
+    padded_height = -(-height // tile) * tile
+    padded_width = -(-width // tile) * tile
+
+    def pad(pixels):
+        padded = np.zeros((padded_height, padded_width, 4), dtype=np.uint8)
+        padded[:pixels.shape[0], :pixels.shape[1]] = pixels
+        return padded
+
+    baseline, candidate = pad(baseline), pad(candidate)
+
+    changed_tiles = tile_fingerprints(np, baseline, tile) != tile_fingerprints(np, candidate, tile)
+    tile_rows, tile_cols = changed_tiles.nonzero()
+
+    # Per-pixel comparison of the changed tiles only: (n, tile, tile, 4)
+    shape = (padded_height // tile, tile, padded_width // tile, tile, 4)
+    baseline_tiles = baseline.reshape(shape)[tile_rows, :, tile_cols]
+    candidate_tiles = candidate.reshape(shape)[tile_rows, :, tile_cols]
+    delta = np.abs(baseline_tiles.astype(np.int16) - candidate_tiles.astype(np.int16)).max(axis=-1)
+    pixel_masks = delta > tolerance
+
+    # Tiles whose hash changed but whose pixels are all within tolerance are not regions
+    really_changed = np.zeros_like(changed_tiles)
+    really_changed[tile_rows, tile_cols] = pixel_masks.any(axis=(1, 2))
+
+    changed_pixels = int(pixel_masks.sum())
+    summary = {
+        "baseline": str(baseline_path),
+        "candidate": str(candidate_path),
+        "width": width,
+        "height": height,
+        "tile": tile,
+        "tolerance": tolerance,
+        "changed_tiles": int(really_changed.sum()),
+        "total_tiles": int(changed_tiles.size),
+        "changed_pixels": changed_pixels,
+        "changed_ratio": changed_pixels / float(width * height),
+        "max_delta": int(delta.max()) if delta.size else 0,
+        "regions": changed_regions(really_changed, tile)
+    }
+
+    if mask_path:
+        mask = np.zeros((padded_height, padded_width), dtype=bool)
+        mask.reshape(shape[:4])[tile_rows, :, tile_cols] = pixel_masks
+        Image.fromarray(mask[:height, :width].view(np.uint8) * np.uint8(255)).save(mask_path, compress_level=1)
+        summary["mask"] = str(mask_path)
+
+    return summary
+
+
+# ===== TRACE ANALYSIS =====
+
+# Trace categories recorded by --trace: the DevTools Performance panel set
+TRACE_CATEGORIES = [
+    "-*", "toplevel", "devtools.timeline", "disabled-by-default-devtools.timeline",
+    "disabled-by-default-devtools.timeline.frame", "blink.user_timing", "loading", "v8.execute"
+]
+
+# Main thread trace events counted towards each summary bucket
+TRACE_BUCKETS = {
+    "UpdateLayoutTree": "style_ms",
+    "Layout": "layout_ms",
+    "PrePaint": "paint_ms",
+    "Paint": "paint_ms",
+    "Layerize": "paint_ms",
+    "CompositeLayers": "paint_ms",
+    "EvaluateScript": "script_ms",
+    "FunctionCall": "script_ms",
+    "TimerFire": "script_ms",
+    "EventDispatch": "script_ms",
+    "FireAnimationFrame": "script_ms",
+    "ParseHTML": "parse_ms",
+    "GCEvent": "gc_ms",
+    "MajorGC": "gc_ms",
+    "MinorGC": "gc_ms",
+}
+
+TRACE_TASK_EVENTS = {"RunTask", "ThreadControllerImpl::RunTask"}
+LONG_TASK_MS = 50
+
+
+class TraceSummary:
+    """Incremental summary of a Chrome JSON trace, fed chunk by chunk
+
+    The trace is parsed one event at a time with raw_decode as chunks
+    arrive, so only the tail of an unfinished event is ever buffered.
+    Complete ("X") events, and begin/end ("B"/"E") pairs matched per
+    thread, are aggregated per thread: top-level tasks give busy time and
+    long tasks (over LONG_TASK_MS, with the excess counted as blocking
+    time), and TRACE_BUCKETS events give style, layout, paint, script,
+    parse and GC time. Only the outermost event of a bucket counts, so a
+    FunctionCall inside a TimerFire is not counted twice; events of
+    different buckets may still overlap (a forced layout inside a script).
+    Chrome writes a thread's events in start order, which this relies on.
+    """
+
+    def __init__(self, top=5):
+        self.top = top
+        self.events = 0
+        self.first_ts = None
+        self.threads = {}
+        self.thread_names = {}
+        self._open = {}
+        self._bucket_end = {}
+        self._buffer = ""
+        self._in_array = False
+        self._done = False
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        """Parse every complete event in text plus whatever was left from the last chunk"""
+        if self._done:
+            return
+        buffer = self._buffer + text
+        position = 0
+        if not self._in_array:
+            # Either {"traceEvents": [...], ...} or a bare array of events
+            position = buffer.find("[")
+            if position < 0:
+                self._buffer = buffer
+                return
+            position += 1
+            self._in_array = True
+
+        length = len(buffer)
+        while True:
+            while position < length and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= length:
+                break
+            if buffer[position] == "]":
+                self._done = True
+                break
+            try:
+                event, position_after = self._decoder.raw_decode(buffer, position)
+            except ValueError:
+                # Event continues in the next chunk
+                break
+            self.add(event)
+            position = position_after
+        self._buffer = buffer[position:]
+
+    def add(self, event):
+        """Aggregate one trace event"""
+        self.events += 1
+        key = (event.get("pid"), event.get("tid"))
+        phase = event.get("ph")
+        if phase == "M":
+            if event.get("name") == "thread_name":
+                self.thread_names[key] = event.get("args", {}).get("name")
+            return
+        if phase not in ("X", "B", "E"):
+            return
+
+        ts = event.get("ts", 0)
+        stats = self.threads.get(key)
+        if stats is None:
+            stats = self.threads[key] = dict.fromkeys(
+                ["busy_ms", "long_tasks", "blocking_ms"] + sorted(set(TRACE_BUCKETS.values())), 0)
+            stats["longest"] = []
+
+        if phase == "E":
+            if not self._open.get(key):
+                return
+            name, start, bucket = self._open[key].pop()
+            self._add_complete(stats, name, start, (ts - start) / 1000, bucket)
+            if bucket:
+                self._bucket_end[key, bucket] = ts
+            return
+
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        name = event.get("name")
+        bucket = TRACE_BUCKETS.get(name)
+        if bucket and ts < self._bucket_end.get((key, bucket), ts):
+            # Nested inside an event of the same bucket, already counted
+            bucket = None
+        if phase == "B":
+            self._open.setdefault(key, []).append((name, ts, bucket))
+            if bucket:
+                self._bucket_end[key, bucket] = float("inf")
+            return
+
+        self._add_complete(stats, name, ts, event.get("dur", 0) / 1000, bucket)
+        if bucket:
+            self._bucket_end[key, bucket] = ts + event.get("dur", 0)
+
+    def _add_complete(self, stats, name, ts, duration, bucket):
+        if name in TRACE_TASK_EVENTS:
+            stats["busy_ms"] += duration
+            if duration > LONG_TASK_MS:
+                stats["long_tasks"] += 1
+                stats["blocking_ms"] += duration - LONG_TASK_MS
+                entry = (duration, ts)
+                if len(stats["longest"]) < self.top:
+                    heapq.heappush(stats["longest"], entry)
+                else:
+                    heapq.heappushpop(stats["longest"], entry)
+        if bucket:
+            stats[bucket] += duration
+
+    def main_thread(self):
+        """Key of the busiest renderer main thread (or busiest thread if none is named)"""
+        renderer = [key for key in self.threads if self.thread_names.get(key) == "CrRendererMain"]
+        candidates = renderer or list(self.threads)
+        if not candidates:
+            return None
+        return max(candidates, key=lambda key: self.threads[key]["busy_ms"])
+
+    def result(self):
+        """Summary dict of the main thread, times in milliseconds"""
+        key = self.main_thread()
+        summary = {"events": self.events}
+        if key is None:
+            return summary
+
+        stats = dict(self.threads[key])
+        longest = sorted(stats.pop("longest"), reverse=True)
+        summary["main_thread"] = {"pid": key[0], "tid": key[1], "name": self.thread_names.get(key)}
+        summary.update({name: round(value, 1) for name, value in stats.items()})
+        summary["longest_tasks"] = [{"start_ms": round((ts - self.first_ts) / 1000, 1), "duration_ms": round(duration, 1)}
+                                    for duration, ts in longest]
+        return summary
+
+
+# ===== NETWORK CAPTURE =====
+
+# Distinct request URLs counted for duplicate detection before the rarest are forgotten
+NETWORK_URL_LIMIT = 10000
+
+# Response bodies fetched at once; finished requests beyond this are written without one
+NETWORK_BODY_FETCHES = 16
+
+
+class NetworkRecorder:
+    """Streams Network domain events into a HAR file as requests complete
+
+    Only requests still in flight are held in memory; each finished (or
+    failed) request is written as one HAR entry and dropped. The summary
+    keeps top-N heaps for duration and transfer size and a per-URL fetch
+    counter capped at NETWORK_URL_LIMIT, so memory stays flat however long
+    the capture runs. With a session and max_body_bytes, response bodies up
+    to that size are fetched with Network.getResponseBody as each request
+    finishes; larger ones are left out, as are bodies of requests that
+    finish while NETWORK_BODY_FETCHES fetches are already outstanding.
+    """
+
+    def __init__(self, path, session=None, max_body_bytes=0, top=5):
+        self.path = Path(path)
+        self.session = session
+        self.max_body_bytes = max_body_bytes
+        self.top = top
+        self.inflight = {}
+        self.fetches = collections.Counter()
+        self.slowest = []
+        self.largest = []
+        self.stats = {"requests": 0, "failed": 0, "transfer_bytes": 0, "bodies": 0, "bodies_skipped": 0,
+                      "bodies_dropped": 0}
+        self._bodies = set()
+        self._first = True
+        self.handlers = {
+            "Network.requestWillBeSent": self.on_request,
+            "Network.responseReceived": self.on_response,
+            "Network.dataReceived": self.on_data,
+            "Network.loadingFinished": self.on_finished,
+            "Network.loadingFailed": self.on_failed,
+        }
+        self._file = open(self.path, 'w')
+        self._file.write('{"log": {"version": "1.2", "creator": {"name": "apex-project-manager", "version": "1.0"}, '
+                         '"pages": [], "entries": [\n')
+
+    def attach(self, session):
+        for event, handler in self.handlers.items():
+            session.subscribe(event, handler)
+
+    def detach(self, session):
+        for event, handler in self.handlers.items():
+            session.unsubscribe(event, handler)
+
+    def on_request(self, params):
+        request_id = params["requestId"]
+        previous = self.inflight.pop(request_id, None)
+        if previous is not None and params.get("redirectResponse"):
+            # A redirect reuses the request id: finish the hop that redirected
+            previous["response"] = params["redirectResponse"]
+            self.finish(previous, params["timestamp"], params["redirectResponse"].get("encodedDataLength", 0))
+        self.inflight[request_id] = {
+            "id": request_id,
+            "request": params["request"],
+            "type": params.get("type"),
+            "start": params["timestamp"],
+            "wall_time": params.get("wallTime", time.time()),
+            "response": None,
+            "data_length": 0,
+        }
+
+    def on_response(self, params):
+        entry = self.inflight.get(params["requestId"])
+        if entry is not None:
+            entry["response"] = params["response"]
+
+    def on_data(self, params):
+        entry = self.inflight.get(params["requestId"])
+        if entry is not None:
+            entry["data_length"] += params.get("dataLength", 0)
+
+    def on_finished(self, params):
+        entry = self.inflight.pop(params["requestId"], None)
+        if entry is None:
+            return
+        if self.session is not None and 0 < entry["data_length"] <= self.max_body_bytes:
+            if len(self._bodies) >= NETWORK_BODY_FETCHES:
+                self.stats["bodies_dropped"] += 1
+                self.finish(entry, params["timestamp"], params.get("encodedDataLength", 0))
+                return
+            task = asyncio.ensure_future(self.finish_with_body(entry, params["timestamp"], params.get("encodedDataLength", 0)))
+            self._bodies.add(task)
+            task.add_done_callback(self._bodies.discard)
+            return
+        if self.session is not None and entry["data_length"] > self.max_body_bytes:
+            self.stats["bodies_skipped"] += 1
+        self.finish(entry, params["timestamp"], params.get("encodedDataLength", 0))
+
+    def on_failed(self, params):
+        entry = self.inflight.pop(params["requestId"], None)
+        if entry is not None:
+            self.stats["failed"] += 1
+            self.finish(entry, params["timestamp"], 0, error=params.get("errorText", "failed"))
+
+    async def finish_with_body(self, entry, end, transfer):
+        try:
+            body = await self.session.call("Network.getResponseBody", {"requestId": entry["id"]})
+            entry["body"] = body
+            self.stats["bodies"] += 1
+        except Exception:
+            pass
+        self.finish(entry, end, transfer)
+
+    def finish(self, entry, end, transfer, error=None):
+        """Write one HAR entry and fold it into the summary"""
+        duration_ms = max(0.0, (end - entry["start"]) * 1000)
+        request = entry["request"]
+        key = f"{request['method']} {request['url']}"
+        self.stats["requests"] += 1
+        self.stats["transfer_bytes"] += transfer
+        self._count(key)
+        self._push(self.slowest, (duration_ms, key))
+        self._push(self.largest, (transfer, key))
+
+        har_entry = self.har_entry(entry, duration_ms, transfer, error)
+        self._file.write(("" if self._first else ",\n") + json.dumps(har_entry))
+        self._first = False
+
+    def har_entry(self, entry, duration_ms, transfer, error=None):
+        request = entry["request"]
+        response = entry["response"] or {}
+        timing = response.get("timing")
+        content = {"size": entry["data_length"], "mimeType": response.get("mimeType", "")}
+        body = entry.get("body")
+        if body is not None:
+            content["text"] = body.get("body", "")
+            if body.get("base64Encoded"):
+                content["encoding"] = "base64"
+
+        har_entry = {
+            "startedDateTime": datetime.fromtimestamp(entry["wall_time"]).astimezone().isoformat(),
+            "time": round(duration_ms, 3),
+            "request": {
+                "method": request["method"],
+                "url": request["url"],
+                "httpVersion": response.get("protocol", ""),
+                "headers": [{"name": name, "value": value} for name, value in request.get("headers", {}).items()],
+                "queryString": [],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": len(request.get("postData", "")),
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", ""),
+                "headers": [{"name": name, "value": value} for name, value in response.get("headers", {}).items()],
+                "cookies": [],
+                "content": content,
+                "redirectURL": response.get("headers", {}).get("location", response.get("headers", {}).get("Location", "")),
+                "headersSize": -1,
+                "bodySize": transfer,
+                "_transferSize": transfer,
+            },
+            "cache": {},
+            "timings": self.har_timings(timing, duration_ms),
+            "_resourceType": entry.get("type"),
+        }
+        if error:
+            har_entry["response"]["_error"] = error
+        return har_entry
+
+    @staticmethod
+    def har_timings(timing, duration_ms):
+        """HAR phase timings from a Network.ResourceTiming (offsets in ms from requestTime)"""
+        if not timing:
+            return {"send": 0, "wait": round(duration_ms, 3), "receive": 0}
+
+        def span(start, end):
+            first, last = timing.get(start, -1), timing.get(end, -1)
+            return round(last - first, 3) if first >= 0 and last >= 0 else -1
+
+        # Blocked until the first phase that actually ran
+        starts = [timing.get(name, -1) for name in ("dnsStart", "connectStart", "sendStart")]
+        send_end = timing.get("sendEnd", 0)
+        headers_end = timing.get("receiveHeadersEnd", send_end)
+        return {
+            "blocked": round(next((start for start in starts if start >= 0), -1), 3),
+            "dns": span("dnsStart", "dnsEnd"),
+            "connect": span("connectStart", "connectEnd"),
+            "ssl": span("sslStart", "sslEnd"),
+            "send": span("sendStart", "sendEnd"),
+            "wait": round(headers_end - send_end, 3),
+            "receive": round(max(0.0, duration_ms - headers_end), 3),
+        }
+
+    def _push(self, heap, item):
+        if len(heap) < self.top:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+
+    def _count(self, key):
+        if key not in self.fetches and len(self.fetches) >= NETWORK_URL_LIMIT:
+            # Forget the URLs fetched only once to make room
+            for single in [url for url, count in self.fetches.items() if count == 1]:
+                del self.fetches[single]
+        self.fetches[key] += 1
+
+    async def close(self):
+        """Wait for pending body fetches, close the HAR file and return the summary"""
+        if self._bodies:
+            await asyncio.gather(*self._bodies, return_exceptions=True)
+        self._file.write("\n]}}\n")
+        self._file.close()
+        return dict(
+            self.stats,
+            unfinished=len(self.inflight),
+            slowest=[{"request": key, "ms": round(duration, 1)} for duration, key in sorted(self.slowest, reverse=True)],
+            largest=[{"request": key, "bytes": size} for size, key in sorted(self.largest, reverse=True)],
+            duplicates=[{"request": key, "count": count} for key, count in self.fetches.most_common(self.top) if count > 1],
+            har=str(self.path),
+        )
+
+
+# ===== COVERAGE =====
+
+def script_coverage(functions):
+    """(total, used) characters of one script from Profiler.takePreciseCoverage functions
+
+    The script's top-level function range spans the whole source, so its
+    size needs no Debugger.getScriptSource. Ranges nest (an uncalled block
+    inside a called function), so they are painted outermost first and the
+    innermost range decides whether a character ran.
+    """
+    ranges = [block for function in functions for block in function.get("ranges", [])]
+    if not ranges:
+        return 0, 0
+    total = max(block["endOffset"] for block in ranges)
+    used = bytearray(total)
+    for block in sorted(ranges, key=lambda block: (block["startOffset"], -block["endOffset"])):
+        length = block["endOffset"] - block["startOffset"]
+        used[block["startOffset"]:block["endOffset"]] = (b"\x01" if block.get("count", 0) else b"\x00") * length
+    return total, total - used.count(0)
+
+
+# ===== CPU PROFILE =====
+
+def summarize_cpu_profile(profile):
+    """Self and total time per function of a Profiler.Profile, in microseconds
+
+    Each sample lasts until the next one (the last until endTime) and is
+    charged to its node as self time. Node totals add up children in
+    reverse DFS order; a function's total only counts nodes with no
+    ancestor of the same function, so recursion is not counted twice.
+    Everything is indexed by position in flat lists, which keeps hundreds
+    of thousands of samples to one pass each. Returns (rows, profile_us)
+    with rows sorted by self time.
+    """
+    nodes = profile.get("nodes", [])
+    index = {node["id"]: position for position, node in enumerate(nodes)}
+    samples = profile.get("samples", [])
+    deltas = profile.get("timeDeltas", [])
+
+    self_us = [0] * len(nodes)
+    if samples:
+        timestamps = list(itertools.accumulate(deltas, initial=profile.get("startTime", 0)))[1:]
+        durations = [later - earlier for earlier, later in zip(timestamps, timestamps[1:])]
+        durations.append(max(0, profile.get("endTime", timestamps[-1]) - timestamps[-1]))
+        for node_id, duration in zip(samples, durations):
+            self_us[index[node_id]] += duration
+
+    # Map every node to a function key, and build an explicit DFS order from the roots
+    keys = []
+    functions = {}
+    for node in nodes:
+        frame = node["callFrame"]
+        key = (frame.get("functionName") or "(anonymous)", frame.get("url", ""), frame.get("lineNumber", -1) + 1)
+        keys.append(functions.setdefault(key, len(functions)))
+    children = [[index[child] for child in node.get("children", [])] for node in nodes]
+    is_child = set(child for kids in children for child in kids)
+
+    # One DFS from the roots: record the visit order and parents, and
+    # whether each node is the outermost call of its function on the stack
+    order = []
+    parents = [-1] * len(nodes)
+    outermost = [True] * len(nodes)
+    on_path = collections.Counter()
+    stack = [(position, False) for position in range(len(nodes)) if position not in is_child]
+    while stack:
+        position, leaving = stack.pop()
+        function = keys[position]
+        if leaving:
+            on_path[function] -= 1
+            continue
+        order.append(position)
+        outermost[position] = on_path[function] == 0
+        on_path[function] += 1
+        stack.append((position, True))
+        for child in children[position]:
+            parents[child] = position
+            stack.append((child, False))
+
+    total_us = list(self_us)
+    for position in reversed(order):
+        if parents[position] >= 0:
+            total_us[parents[position]] += total_us[position]
+
+    function_self = [0] * len(functions)
+    function_total = [0] * len(functions)
+    for position in range(len(nodes)):
+        function = keys[position]
+        function_self[function] += self_us[position]
+        if outermost[position]:
+            function_total[function] += total_us[position]
+
+    rows = [{"function": name, "url": url, "line": line, "self_us": function_self[function],
+             "total_us": function_total[function]}
+            for (name, url, line), function in functions.items()]
+    rows.sort(key=lambda row: -row["self_us"])
+    return rows, sum(self_us)
+
+
+# ===== HEAP SNAPSHOT =====
+
+HEAP_SNAPSHOT_KEY = re.compile(r'\s*,?\s*"([^"]+)"\s*:\s*')
+JSON_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+
+
+def heap_class_name(node_type, name):
+    """Summary group of a heap node, as in the DevTools Memory panel"""
+    if node_type in ("object", "native"):
+        return name
+    if node_type in ("string", "concatenated string", "sliced string"):
+        return "(string)"
+    return f"({node_type})"
+
+
+class HeapSnapshotParser:
+    """Streaming parser for .heapsnapshot JSON, fed chunk by chunk
+
+    The nodes array is consumed a chunk of integers at a time and folded
+    into per (type, name) counts and self sizes, so memory does not grow
+    with the snapshot. Only the names those groups need are kept from the
+    strings table, which comes last. With keep_graph, the node and edge
+    integers are also stored in compact arrays for heap_retained_sizes.
+    """
+
+    def __init__(self, keep_graph=False):
+        self.keep_graph = keep_graph
+        self.meta = None
+        self.groups = {}
+        self.names = {}
+        self.nodes = array.array('i')
+        self.edges = array.array('i')
+        self._buffer = ""
+        self._state = "start"
+        self._key = None
+        self._depth = 0
+        self._carry = []
+        self._string_index = 0
+        self._needed = None
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        buffer = self._buffer + text
+        position = 0
+        length = len(buffer)
+        while position < length:
+            if self._state == "start":
+                position = buffer.find("{", position)
+                if position < 0:
+                    position = length
+                    break
+                position += 1
+                self._state = "key"
+            elif self._state == "key":
+                match = HEAP_SNAPSHOT_KEY.match(buffer, position)
+                if not match:
+                    rest = buffer[position:].lstrip()
+                    if rest.startswith("}"):
+                        self._state = "done"
+                        position = length
+                    break
+                self._key = match.group(1)
+                position = match.end()
+                self._state = "value"
+            elif self._state == "value":
+                if self._key == "snapshot":
+                    try:
+                        self.meta, position = self._decoder.raw_decode(buffer, position)
+                    except ValueError:
+                        break
+                    self._state = "key"
+                    continue
+                if buffer[position] != "[":
+                    raise ValueError(f"Unexpected heap snapshot value for {self._key}")
+                position += 1
+                self._depth = 1
+                self._state = {"nodes": "ints", "edges": "ints", "strings": "strings"}.get(self._key, "skip")
+            elif self._state == "ints":
+                end = buffer.find("]", position)
+                cut = end if end >= 0 else buffer.rfind(",", position)
+                if cut < 0:
+                    break
+                segment = buffer[position:cut]
+                if segment.strip():
+                    self._ints(list(map(int, segment.split(","))))
+                position = cut + 1
+                if end >= 0:
+                    self._state = "key"
+            elif self._state == "skip":
+                # Numeric (possibly nested) arrays this summary does not use
+                for match in re.finditer(r"[\[\]]", buffer[position:]):
+                    self._depth += 1 if match.group() == "[" else -1
+                    if self._depth == 0:
+                        position += match.end()
+                        self._state = "key"
+                        break
+                else:
+                    position = length
+            elif self._state == "strings":
+                while position < length and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position >= length:
+                    break
+                if buffer[position] == "]":
+                    position += 1
+                    self._state = "key"
+                    continue
+                match = JSON_STRING.match(buffer, position)
+                if not match:
+                    break
+                if self._needed is None:
+                    self._needed = {name for _, name in self.groups if name >= 0}
+                if self._string_index in self._needed:
+                    self.names[self._string_index] = json.loads(match.group())
+                self._string_index += 1
+                position = match.end()
+            else:
+                position = length
+        self._buffer = buffer[position:]
+
+    def _ints(self, values):
+        if self._key == "edges":
+            if self.keep_graph:
+                self.edges.extend(values)
+            return
+
+        if self.keep_graph:
+            self.nodes.extend(values)
+        fields = self.meta["meta"]["node_fields"]
+        types = self.meta["meta"]["node_types"][0]
+        width = len(fields)
+        type_at, name_at, size_at = fields.index("type"), fields.index("name"), fields.index("self_size")
+        named = {index for index, node_type in enumerate(types) if node_type in ("object", "native")}
+
+        values = self._carry + values
+        complete = len(values) // width * width
+        self._carry = values[complete:]
+        groups = self.groups
+        for node_type, name, size in zip(values[type_at:complete:width], values[name_at:complete:width],
+                                         values[size_at:complete:width]):
+            key = (node_type, name if node_type in named else -1)
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [1, size]
+            else:
+                group[0] += 1
+                group[1] += size
+
+    def class_of(self, node_type, name):
+        types = self.meta["meta"]["node_types"][0]
+        return heap_class_name(types[node_type], self.names.get(name, "(unknown)") if name >= 0 else "")
+
+    def summary(self):
+        """{class name: {"count", "self_size"}} merged over the (type, name) groups"""
+        classes = {}
+        for (node_type, name), (count, size) in self.groups.items():
+            entry = classes.setdefault(self.class_of(node_type, name), {"count": 0, "self_size": 0})
+            entry["count"] += count
+            entry["self_size"] += size
+        return classes
+
+
+def heap_retained_sizes(parser):
+    """Add per-class retained sizes to a keep_graph parser's summary
+
+    Builds the dominator tree of the object graph (weak edges ignored)
+    with the iterative Cooper-Harvey-Kennedy algorithm over flat arrays.
+    A node's retained size is its own size plus everything it dominates;
+    a class's retained size counts only instances with no dominating
+    instance of the same class, so nested objects are not counted twice.
+    """
+    meta = parser.meta["meta"]
+    node_fields, edge_fields = meta["node_fields"], meta["edge_fields"]
+    node_width, edge_width = len(node_fields), len(edge_fields)
+    nodes, edges = parser.nodes, parser.edges
+    count = len(nodes) // node_width
+    weak = meta["edge_types"][0].index("weak") if "weak" in meta["edge_types"][0] else -1
+    edge_count_at, size_at = node_fields.index("edge_count"), node_fields.index("self_size")
+    type_at, name_at = node_fields.index("type"), node_fields.index("name")
+    edge_type_at, to_at = edge_fields.index("type"), edge_fields.index("to_node")
+
+    # Strong successors of every node in CSR form
+    first_edge = array.array('q', itertools.accumulate(nodes[edge_count_at::node_width], initial=0))
+    targets = array.array('i', (to // node_width if edge_type != weak else -1 for edge_type, to in
+                                zip(edges[edge_type_at::edge_width], edges[to_at::edge_width])))
+
+    # Postorder from the root (node 0)
+    postorder_number = array.array('i', [-1]) * count
+    postorder = array.array('i')
+    visited = bytearray(count)
+    visited[0] = 1
+    stack = [(0, first_edge[0])]
+    while stack:
+        node, edge = stack[-1]
+        end = first_edge[node + 1]
+        while edge < end and (targets[edge] < 0 or visited[targets[edge]]):
+            edge += 1
+        if edge < end:
+            stack[-1] = (node, edge + 1)
+            child = targets[edge]
+            visited[child] = 1
+            stack.append((child, first_edge[child]))
+        else:
+            stack.pop()
+            postorder_number[node] = len(postorder)
+            postorder.append(node)
+
+    # Predecessors of reachable nodes in CSR form
+    predecessor_count = array.array('i', [0]) * (count + 1)
+    for node in postorder:
+        for edge in range(first_edge[node], first_edge[node + 1]):
+            if targets[edge] >= 0:
+                predecessor_count[targets[edge] + 1] += 1
+    first_predecessor = array.array('q', itertools.accumulate(predecessor_count))
+    fill = array.array('q', first_predecessor)
+    predecessors = array.array('i', [0]) * first_predecessor[-1]
+    for node in postorder:
+        for edge in range(first_edge[node], first_edge[node + 1]):
+            target = targets[edge]
+            if target >= 0:
+                predecessors[fill[target]] = node
+                fill[target] += 1
+
+    # Cooper-Harvey-Kennedy: iterate immediate dominators to a fixed point in reverse postorder
+    dominator = array.array('i', [-1]) * count
+    dominator[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for node in reversed(postorder[:-1]):
+            new = -1
+            for index in range(first_predecessor[node], first_predecessor[node + 1]):
+                predecessor = predecessors[index]
+                if dominator[predecessor] < 0:
+                    continue
+                if new < 0:
+                    new = predecessor
+                    continue
+                finger1, finger2 = predecessor, new
+                while finger1 != finger2:
+                    while postorder_number[finger1] < postorder_number[finger2]:
+                        finger1 = dominator[finger1]
+                    while postorder_number[finger2] < postorder_number[finger1]:
+                        finger2 = dominator[finger2]
+                new = finger1
+            if new >= 0 and dominator[node] != new:
+                dominator[node] = new
+                changed = True
+
+    # Retained sizes: a dominator finishes after everything it dominates
+    retained = array.array('q', [0]) * count
+    for node in postorder:
+        retained[node] += nodes[node * node_width + size_at]
+        if node:
+            retained[dominator[node]] += retained[node]
+
+    # Walk the dominator tree, counting each class only at its outermost instances
+    classes = {}
+    group_ids = {}
+    named = {index for index, node_type in enumerate(meta["node_types"][0]) if node_type in ("object", "native")}
+    class_ids = array.array('i', [0]) * count
+    for node, (node_type, name) in enumerate(zip(nodes[type_at::node_width], nodes[name_at::node_width])):
+        group = (node_type, name if node_type in named else -1)
+        class_id = group_ids.get(group)
+        if class_id is None:
+            class_id = group_ids[group] = classes.setdefault(parser.class_of(*group), len(classes))
+        class_ids[node] = class_id
+    children_count = array.array('i', [0]) * (count + 1)
+    for node in postorder[:-1]:
+        children_count[dominator[node] + 1] += 1
+    first_child = array.array('q', itertools.accumulate(children_count))
+    fill = array.array('q', first_child)
+    children = array.array('i', [0]) * first_child[-1]
+    for node in postorder[:-1]:
+        children[fill[dominator[node]]] = node
+        fill[dominator[node]] += 1
+
+    class_retained = [0] * len(classes)
+    on_path = [0] * len(classes)
+    stack = [(0, False)]
+    while stack:
+        node, leaving = stack.pop()
+        class_id = class_ids[node]
+        if leaving:
+            on_path[class_id] -= 1
+            continue
+        if not on_path[class_id]:
+            class_retained[class_id] += retained[node]
+        on_path[class_id] += 1
+        stack.append((node, True))
+        stack.extend((children[index], False) for index in range(first_child[node], first_child[node + 1]))
+
+    summary = parser.summary()
+    for name, class_id in classes.items():
+        if name in summary:
+            summary[name]["retained_size"] = class_retained[class_id]
+    return summary
+
+
+def parse_heap_snapshot(path, retained=False, chunk_size=1 << 20):
+    """Summarize a .heapsnapshot file per class, reading it in chunks"""
+    parser = HeapSnapshotParser(keep_graph=retained)
+    with open(path, encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    summary = heap_retained_sizes(parser) if retained else parser.summary()
+    return summary, (parser.meta or {}).get("node_count", 0)
+
+
+# ===== TIMINGS =====
+
+# Collector for the command being run, set by run_command for --timings.
+# Context variables follow a call into the event loop thread's tasks and
+# to_thread workers, so spans recorded there land with the command that
+# started them (the daemon runs one command at a time, see DaemonServer).
+CURRENT_TIMINGS = contextvars.ContextVar("current_timings", default=None)
+
+# Upper bounds (ms) of the latency histogram buckets, plus one open bucket
+TIMING_BUCKETS_MS = (1, 5, 20, 100, 500, 2000)
+
+
+@contextlib.contextmanager
+def timed(phase, name):
+    """Record the enclosed block as a span when a Timings collector is active"""
+    timings = CURRENT_TIMINGS.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        timings.record(phase, name, start, error=type(e).__name__)
+        raise
+    timings.record(phase, name, start)
+
+
+class Timings:
+    """Latency spans recorded while one command runs
+
+    Spans are grouped by phase: "http" for discovery probes and /json
+    requests, "connect" for WebSocket handshakes, "command" for CDP command
+    round-trips (send to reply), "wait" for page events and "sleep" for
+    fixed delays.
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def record(self, phase, name, start, error=None):
+        """Record a span that began at time.perf_counter() value start and ends now"""
+        end = time.perf_counter()
+        span = {
+            "phase": phase,
+            "name": name,
+            "start_ms": round((start - self.origin) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3)
+        }
+        if error:
+            span["error"] = error
+        with self._lock:
+            self.spans.append(span)
+
+    def report(self):
+        """Print a latency histogram per phase and the slowest span names"""
+        total_ms = (time.perf_counter() - self.origin) * 1000
+        print("")
+        print(f"⏱️  {len(self.spans)} spans over {total_ms:.0f}ms")
+        labels = [f"<{bound}ms" for bound in TIMING_BUCKETS_MS] + [f"≥{TIMING_BUCKETS_MS[-1]}ms"]
+
+        phases = {}
+        for span in self.spans:
+            phases.setdefault(span["phase"], []).append(span["duration_ms"])
+        for phase, durations in phases.items():
+            print(f"\n{phase}: {len(durations)} spans, {sum(durations):.1f}ms total, "
+                  f"p50 {percentile(durations, 0.5):.1f}ms, p90 {percentile(durations, 0.9):.1f}ms, "
+                  f"max {max(durations):.1f}ms")
+            counts = [0] * len(labels)
+            for duration in durations:
+                counts[next((i for i, bound in enumerate(TIMING_BUCKETS_MS) if duration < bound), len(TIMING_BUCKETS_MS))] += 1
+            widest = max(counts)
+            for label, count in zip(labels, counts):
+                if count:
+                    print(f"  {label:>8} {'█' * max(1, round(count / widest * 30)):<30} {count}")
+
+        names = {}
+        for span in self.spans:
+            key = (span["phase"], span["name"])
+            count, total = names.get(key, (0, 0))
+            names[key] = (count + 1, total + span["duration_ms"])
+        print("\nSlowest:")
+        for (phase, name), (count, total) in sorted(names.items(), key=lambda item: -item[1][1])[:8]:
+            print(f"  {phase:<8} {name:<36} {count:>5}x {total:>10.1f}ms")
+
+    def export(self, path, command=None):
+        """Append the spans to a JSON-lines file, one object per span tagged with this run"""
+        run = self.started.strftime("%Y%m%d_%H%M%S_%f")
+        with open(path, 'a') as f:
+            for span in self.spans:
+                f.write(json.dumps(dict(span, run=run, command=command)) + "\n")
+
+
+class CDPError(Exception):
+    """Raised when Chrome answers a CDP command with an error"""
+
+
+class JavaScriptError(CDPError):
+    """Raised when an evaluated expression throws in the page"""
+
+
+class BrowserDiscovery:
+    """Finds the Chrome debugging endpoint once and caches it for the process
+
+    All HTTP calls share one keep-alive requests.Session. The cached endpoint
+    expires after ttl seconds and is dropped as soon as a request to it fails,
+    so the next lookup rescans the candidate ports.
+    """
+
+    def __init__(self, host="localhost", ports=None, ttl=30):
+        load_client_dependencies()
+        self.host = host
+        self.ports = list(ports) if ports else self.candidate_ports()
+        self.ttl = ttl
+        self.http = requests.Session()
+        self._endpoint = None
+        self._found_at = 0
+
+    @staticmethod
+    def candidate_ports():
+        """Ports to scan: APEX_CDP_PORTS, DevToolsActivePort, then the defaults"""
+        ports = []
+        for port in os.environ.get("APEX_CDP_PORTS", "").split(","):
+            if port.strip().isdigit():
+                ports.append(int(port))
+
+        try:
+            active_port = (DEV_PROFILE_DIR / "DevToolsActivePort").read_text().split("\n")[0]
+            ports.append(int(active_port))
+        except (OSError, ValueError):
+            pass
+
+        ports.extend(DEFAULT_CDP_PORTS)
+        return list(dict.fromkeys(ports))
+
+    def probe(self, port, timeout=2):
+        """Return /json/version for port, or None if nothing answers"""
+        try:
+            with timed("http", f"probe :{port}"):
+                response = self.http.get(f"http://{self.host}:{port}/json/version", timeout=timeout)
+                response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError):
+            return None
+
+    def endpoint(self):
+        """Return the cached endpoint info, scanning the candidate ports if needed"""
+        if self.cached():
+            return self._endpoint
+
+        self._endpoint = None
+        for port in self.ports:
+            browser_info = self.probe(port)
+            if browser_info:
+                self._endpoint = {
+                    "cdp_port": port,
+                    "ws_endpoint": browser_info.get("webSocketDebuggerUrl", f"ws://{self.host}:{port}/devtools/browser"),
+                    "browser": browser_info.get("Browser"),
+                    "status": "running"
+                }
+                self._found_at = time.monotonic()
+                break
+        return self._endpoint
+
+    def cached(self):
+        """Return the endpoint if it is cached and still fresh, without probing"""
+        if self._endpoint and time.monotonic() - self._found_at < self.ttl:
+            return self._endpoint
+        return None
+
+    def invalidate(self):
+        """Forget the cached endpoint"""
+        self._endpoint = None
+
+    def request(self, method, path, timeout=5):
+        """Send an HTTP request to the endpoint and return the decoded JSON"""
+        endpoint = self.endpoint()
+        if not endpoint:
+            raise requests.ConnectionError("Browser not running")
+
+        try:
+            with timed("http", f"{method} {path.split('?')[0]}"):
+                response = self.http.request(method, f"http://{self.host}:{endpoint['cdp_port']}{path}", timeout=timeout)
+                response.raise_for_status()
+            return response.json()
+        except requests.ConnectionError:
+            self.invalidate()
+            raise
+
+
+class AsyncCDPSession:
+    """Persistent CDP WebSocket connection to a single target
+
+    One socket is kept open per target and read by a background task. Every
+    command gets a fresh message id and a future that the reader resolves
+    when the reply with that id arrives, so any number of commands can be in
+    flight at once. Events are handed to the subscribers registered for their
+    method as they are read.
+    """
+
+    def __init__(self, ws_url, timeout=10):
+        load_client_dependencies()
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self.ws = None
+        self._reader = None
+        self._next_id = 0
+        self._pending = {}
+        self._sent = {}
+        self._subscribers = {}
+        self._enabled_domains = set()
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self):
+        return self.ws is not None and self._reader is not None and not self._reader.done()
+
+    async def connect(self):
+        """Open the WebSocket and start the reader if not already connected"""
+        async with self._connect_lock:
+            if not self.connected:
+                with timed("connect", self.ws_url.rsplit("/", 2)[-2]):
+                    self.ws = await websockets.connect(
+                        self.ws_url,
+                        max_size=None,
+                        ping_interval=None,
+                        compression=None,
+                        open_timeout=self.timeout
+                    )
+                self._enabled_domains.clear()
+                self._reader = asyncio.create_task(self._read_loop())
+        return self
+
+    async def close(self):
+        """Close the WebSocket and fail any command still waiting for a reply"""
+        if self.ws is not None:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        self.ws = None
+        self._reader = None
+
+    def subscribe(self, method, callback):
+        """Call callback(params) for every event named method"""
+        self._subscribers.setdefault(method, []).append(callback)
+
+    def unsubscribe(self, method, callback):
+        """Remove a callback registered with subscribe"""
+        callbacks = self._subscribers.get(method, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def expect_event(self, method, predicate=None):
+        """Return a future for the first event named method that matches predicate
+
+        Create it before sending the command that triggers the event. The
+        subscription is removed once the future is done or cancelled.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def on_event(params):
+            if not future.done() and (predicate is None or predicate(params)):
+                future.set_result(params)
+
+        self.subscribe(method, on_event)
+        future.add_done_callback(lambda _: self.unsubscribe(method, on_event))
+        return future
+
+    async def events(self, method, maxsize=0):
+        """Async iterator over every event named method, from now on"""
+        queue = asyncio.Queue(maxsize)
+
+        def on_event(params):
+            if not queue.full():
+                queue.put_nowait(params)
+
+        self.subscribe(method, on_event)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(method, on_event)
+
+    async def send(self, method, params=None, track=True):
+        """Send a command without waiting for its reply, returns the message id
+
+        With track=False the reply is discarded, for fire-and-forget commands
+        such as frame acks.
+        """
+        await self.connect()
+        self._next_id += 1
+        message_id = self._next_id
+        if track:
+            self._pending[message_id] = asyncio.get_running_loop().create_future()
+            timings = CURRENT_TIMINGS.get()
+            if timings is not None:
+                self._sent[message_id] = (timings, method, time.perf_counter())
+        try:
+            await self.ws.send(json.dumps({
+                "id": message_id,
+                "method": method,
+                "params": params or {}
+            }))
+        except Exception:
+            self._pending.pop(message_id, None)
+            self._record_reply(message_id, "SendFailed")
+            raise
+        return message_id
+
+    async def wait(self, message_id, timeout=None):
+        """Wait for the reply to message_id and return its result"""
+        try:
+            response = await asyncio.wait_for(self._pending[message_id], timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._record_reply(message_id, "TimeoutError")
+            raise TimeoutError("Timed out waiting for Chrome")
+        finally:
+            self._pending.pop(message_id, None)
+
+        if 'error' in response:
+            raise CDPError(f"CDP Error: {response['error']}")
+        return response.get('result', {})
+
+    def discard(self, message_ids):
+        """Stop tracking the replies to message_ids, for commands nobody will wait for"""
+        for message_id in message_ids:
+            future = self._pending.pop(message_id, None)
+            if future is not None:
+                future.cancel()
+
+    async def call(self, method, params=None, timeout=None):
+        """Send a command and return its result"""
+        return await self.wait(await self.send(method, params), timeout)
+
+    async def call_many(self, commands, timeout=None):
+        """Send (method, params) commands back to back, then wait once for every reply"""
+        message_ids = [await self.send(method, params) for method, params in commands]
+        return await asyncio.wait_for(
+            asyncio.gather(*(self.wait(message_id, timeout) for message_id in message_ids)),
+            timeout or self.timeout
+        )
+
+    async def call_each(self, commands, timeout=None):
+        """Like call_many, but a command that fails returns its CDPError instead of raising"""
+        message_ids = [await self.send(method, params) for method, params in commands]
+        results = []
+        for message_id in message_ids:
+            try:
+                results.append(await self.wait(message_id, timeout))
+            except CDPError as e:
+                results.append(e)
+        return results
+
+    async def enable(self, domain):
+        """Enable a CDP domain once per connection"""
+        if domain not in self._enabled_domains or not self.connected:
+            await self.call(f"{domain}.enable")
+            self._enabled_domains.add(domain)
+
+    async def disable(self, domain):
+        """Disable a CDP domain enabled with enable"""
+        if domain in self._enabled_domains:
+            self._enabled_domains.discard(domain)
+            await self.call(f"{domain}.disable")
+
+    async def _read_loop(self):
+        try:
+            async for raw in self.ws:
+                message = json.loads(raw)
+                if 'id' in message:
+                    self._record_reply(message['id'], "CDPError" if 'error' in message else None)
+                    future = self._pending.get(message['id'])
+                    if future is not None and not future.done():
+                        future.set_result(message)
+                elif 'method' in message:
+                    self._dispatch(message['method'], message.get('params', {}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for message_id in list(self._sent):
+                self._record_reply(message_id, "ConnectionClosed")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("CDP connection closed"))
+
+    def _record_reply(self, message_id, error=None):
+        # Command span: from send to the reply being read (or the failure)
+        sent = self._sent.pop(message_id, None)
+        if sent is not None:
+            timings, method, start = sent
+            timings.record("command", method, start, error)
+
+    def _dispatch(self, method, params):
+        for callback in list(self._subscribers.get(method, [])):
+            try:
+                callback(params)
+            except Exception as e:
+                print(f"⚠️  {method} handler failed: {e}")
+
+
+def normalize_url(url):
+    """Split a URL into (origin, path) for matching tabs
+
+    Scheme and host are lowercased, the query is dropped and a trailing
+    slash is ignored. A hash-router fragment ("#/settings") is kept as
+    part of the path, since it names the page in the dashboard.
+    """
+    parts = urlsplit(url)
+    origin = f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+    path = parts.path.rstrip("/") or "/"
+    if parts.fragment.startswith("/"):
+        path += "#" + parts.fragment.rstrip("/")
+    return origin, path
+
+
+class TargetRegistry:
+    """Page targets indexed by id, origin and origin + path
+
+    Lookups are dictionary hits with no network call. The registry is kept
+    current either by a browser-level session subscribed with
+    Target.setDiscoverTargets (start), or refilled from a /json/list
+    snapshot (load). A pinned tab id is persisted to pin_path and preferred
+    whenever no tab is named.
+    """
+
+    def __init__(self, pin_path=None):
+        self.targets = {}
+        self.by_origin = {}
+        self.by_location = {}
+        self.session = None
+        self.pin_path = Path(pin_path) if pin_path else None
+        self.pinned = None
+        if self.pin_path:
+            try:
+                self.pinned = json.loads(self.pin_path.read_text()).get("id")
+            except (OSError, ValueError):
+                pass
+
+    @property
+    def live(self):
+        return self.session is not None and self.session.connected
+
+    async def start(self, ws_endpoint):
+        """Attach to the browser target and follow targetCreated/InfoChanged/Destroyed"""
+        session = AsyncCDPSession(ws_endpoint)
+        session.subscribe("Target.targetCreated", lambda params: self.update(params["targetInfo"]))
+        session.subscribe("Target.targetInfoChanged", lambda params: self.update(params["targetInfo"]))
+        session.subscribe("Target.targetDestroyed", lambda params: self.remove(params["targetId"]))
+        await session.call("Target.setDiscoverTargets", {"discover": True})
+        result = await session.call("Target.getTargets")
+
+        self.clear()
+        for info in result.get("targetInfos", []):
+            self.update(info)
+        self.session = session
+
+    async def stop(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def clear(self):
+        self.targets.clear()
+        self.by_origin.clear()
+        self.by_location.clear()
+
+    def load(self, tabs):
+        """Replace the registry with a /json/list snapshot"""
+        self.clear()
+        for tab in tabs:
+            self.add(tab)
+
+    def update(self, info):
+        """Apply a Target.TargetInfo"""
+        self.add({"id": info["targetId"], "type": info.get("type"), "url": info.get("url", ""),
+                  "title": info.get("title", "")})
+
+    def add(self, tab):
+        """Index a tab dict with id, type and url keys (the /json/list shape)"""
+        self.remove(tab["id"])
+        if tab.get("type") != "page":
+            return
+        origin, path = normalize_url(tab.get("url", ""))
+        self.targets[tab["id"]] = tab
+        self.by_origin.setdefault(origin, {})[tab["id"]] = tab
+        self.by_location.setdefault((origin, path), {})[tab["id"]] = tab
+
+    def remove(self, target_id):
+        tab = self.targets.pop(target_id, None)
+        if tab is None:
+            return
+        origin, path = normalize_url(tab.get("url", ""))
+        for index, key in ((self.by_origin, origin), (self.by_location, (origin, path))):
+            tabs = index.get(key, {})
+            tabs.pop(target_id, None)
+            if not tabs:
+                index.pop(key, None)
+
+    def find(self, url):
+        """Return a tab showing url, or None
+
+        A bare origin ("http://localhost:5173") matches any tab on that
+        origin, preferring one at its root; a URL with a path only matches
+        tabs at that path.
+        """
+        origin, path = normalize_url(url)
+        exact = self.by_location.get((origin, path))
+        if exact:
+            return next(iter(exact.values()))
+        if path == "/":
+            same_origin = self.by_origin.get(origin)
+            if same_origin:
+                return next(iter(same_origin.values()))
+        return None
+
+    def pin(self, target_id):
+        """Persist target_id as the tab used when none is named (None to unpin)"""
+        self.pinned = target_id
+        if self.pin_path:
+            if target_id:
+                self.pin_path.write_text(json.dumps({"id": target_id}))
+            elif self.pin_path.exists():
+                self.pin_path.unlink()
+
+
+class AsyncApexProjectManager:
+    """asyncio browser client behind ApexProjectManager
+
+    Every browser_* coroutine takes an optional tab_id, so one process can
+    drive several dashboard tabs at once, e.g.
+    asyncio.gather(*(manager.browser_screenshot(tab_id=tab) for tab in tabs)).
+    Without a tab_id the dashboard tab is found or created as before.
+    """
+
+    def __init__(self, project_root=None):
+        load_client_dependencies()
+        self.project_root = Path(project_root or Path(__file__).parent.parent)
+        self.claude_dir = self.project_root / ".claude"
+        self.claude_dir.mkdir(exist_ok=True)
+        self.discovery = BrowserDiscovery()
+        self.sessions = {}
+        self.dom_nodes = {}
+        self._tab_lock = asyncio.Lock()
+        self.registry = TargetRegistry(self.claude_dir / "pinned-tab.json")
+        self.screenshots = ScreenshotStore(self.claude_dir / "screenshots")
+        # Long-lived processes (the daemon) follow targets live instead of listing them per call
+        self.live_targets = False
+
+    # ===== BROWSER CLIENT OPERATIONS =====
+
+    async def browser_status(self):
+        """Check if Chrome dev profile is running on any candidate debugging port"""
+        cdp_info = self.discovery.cached() or await asyncio.to_thread(self.discovery.endpoint)
+        if cdp_info:
+            return True, cdp_info
+        else:
+            return False, None
+
+    async def get_tabs(self):
+        """Get list of browser tabs"""
+        is_running, cdp_info = await self.browser_status()
+        if not is_running:
+            return []
+
+        try:
+            return await asyncio.to_thread(self.discovery.request, "GET", "/json/list")
+        except (requests.RequestException, ValueError) as e:
+            say(f"❌ Failed to get tabs: {e}")
+            return []
+
+    async def create_tab(self, url="http://localhost:5173"):
+        """Create a new browser tab"""
+        is_running, cdp_info = await self.browser_status()
+        if not is_running:
+            say("❌ Browser not running")
+            return None
+
+        try:
+            tab = await asyncio.to_thread(self.discovery.request, "PUT", f"/json/new?{url}")
+        except (requests.RequestException, ValueError) as e:
+            say(f"❌ Failed to create tab: {e}")
+            return None
+        # Found by the next lookup even before targetCreated arrives
+        self.registry.add(tab)
+        return tab
+
+    async def get_or_create_tab(self, url="http://localhost:5173", prefer_pinned=False):
+        """Get existing tab or create new one
+
+        With prefer_pinned, a pinned tab that still exists wins over url.
+        """
+        # Serialised so concurrent callers do not each open a new tab
+        async with self._tab_lock:
+            await self.sync_targets()
+
+            if prefer_pinned and self.registry.pinned:
+                tab = self.registry.targets.get(self.registry.pinned)
+                if tab:
+                    return tab
+                say(f"⚠️  Pinned tab {self.registry.pinned[:8]} is gone, using {url}")
+
+            # Look for existing tab with our URL
+            tab = self.registry.find(url)
+            if tab:
+                return tab
+
+            # Create new tab if none found
+            return await self.create_tab(url)
+
+    async def sync_targets(self):
+        """Bring the target registry up to date
+
+        In live mode the registry follows Target events on a browser
+        session, started here on first use (or after Chrome restarts), so
+        there is nothing to fetch. Otherwise, or if the browser session
+        cannot be opened, it is refilled from /json/list.
+        """
+        if self.live_targets:
+            if self.registry.live:
+                return
+            is_running, cdp_info = await self.browser_status()
+            if is_running:
+                try:
+                    await self.registry.start(cdp_info['ws_endpoint'])
+                    return
+                except Exception as e:
+                    say(f"⚠️  Target discovery unavailable, listing tabs instead: {e}")
+        self.registry.load(await self.get_tabs())
+
+    async def pin_tab(self, tab_id=None):
+        """Pin tab_id (or the dashboard tab) as the default tab, persisted in .claude/"""
+        tab_id = tab_id or await self.resolve_tab()
+        if not tab_id:
+            say("❌ Failed to get browser tab")
+            return None
+        self.registry.pin(tab_id)
+        say(f"📌 Pinned tab {tab_id}")
+        return tab_id
+
+    def unpin_tab(self):
+        """Forget the pinned tab"""
+        self.registry.pin(None)
+        say("📌 Tab unpinned")
+
+    async def close_tab(self, tab_id):
+        """Close a tab and its CDP session"""
+        try:
+            await self.send_cdp_command(tab_id, "Page.close")
+        except Exception as e:
+            say(f"⚠️  Failed to close tab {tab_id[:8]}: {e}")
+        session = self.sessions.pop(tab_id, None)
+        if session:
+            await session.close()
+        self.registry.remove(tab_id)
+
+    async def open_tabs(self, urls):
+        """Open one new tab per URL concurrently, returns the tab infos"""
+        return await asyncio.gather(*(self.create_tab(url) for url in urls))
+
+    async def resolve_tab(self, tab_id=None):
+        """Return tab_id, or the id of the dashboard tab when none is given"""
+        if tab_id:
+            return tab_id
+        tab = await self.get_or_create_tab(prefer_pinned=True)
+        return tab['id'] if tab else None
+
+    async def get_session(self, tab_id):
+        """Get the persistent CDP session for a tab, connecting on first use"""
+        session = self.sessions.get(tab_id)
+        if session is None:
+            is_running, cdp_info = await self.browser_status()
+            if not is_running:
+                raise Exception("Browser not running")
+
+            port = cdp_info['cdp_port']
+            session = AsyncCDPSession(f"ws://localhost:{port}/devtools/page/{tab_id}")
+            self.sessions[tab_id] = session
+
+        return await session.connect()
+
+    async def close_sessions(self):
+        """Close every open CDP session"""
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions), self.registry.stop())
+
+    async def send_cdp_command(self, tab_id, method, params=None, timeout=None):
+        """Send CDP command to specific tab"""
+        try:
+            session = await self.get_session(tab_id)
+            return await session.call(method, params, timeout)
+        except CDPError:
+            raise
+        except Exception as e:
+            await self._drop_session(tab_id)
+            raise Exception(f"CDP command failed: {e}")
+
+    async def send_cdp_commands(self, tab_id, commands):
+        """Pipeline (method, params) commands to a tab and return their results in order"""
+        try:
+            session = await self.get_session(tab_id)
+            return await session.call_many(commands)
+        except CDPError:
+            raise
+        except Exception as e:
+            await self._drop_session(tab_id)
+            raise Exception(f"CDP commands failed: {e}")
+
+    async def _drop_session(self, tab_id):
+        # Drop the broken connection (and the cached endpoint behind it) so
+        # the next command rediscovers Chrome and reconnects
+        session = self.sessions.pop(tab_id, None)
+        if session:
+            await session.close()
+        self.discovery.invalidate()
+
+    async def browser_screenshot(self, filename=None, tab_id=None, thumbnail=False):
+        """Take a screenshot using CDP and keep it in the screenshot store
+
+        filename names the capture in the store's index. Returns the path
+        of the stored image, which is shared by identical captures.
+        """
+        say("📸 Taking CDP browser screenshot...")
+
+        try:
+            # Get or create tab
+            explicit_tab = tab_id is not None
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return None
+
+            # Take screenshot
+            result = await self.send_cdp_command(tab_id, "Page.captureScreenshot", {
+                "format": "png",
+                "quality": 90
+            })
+
+            # Save screenshot
+            if filename is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                suffix = f"_{tab_id[:8]}" if explicit_tab else ""
+                filename = f"screenshot_{timestamp}{suffix}.png"
+
+            screenshot_path, new, evicted = await asyncio.to_thread(
+                self.screenshots.put, base64.b64decode(result['data']), filename, thumbnail, tab=tab_id)
+
+            if new:
+                say(f"✅ Screenshot saved: {screenshot_path}")
+            else:
+                say(f"✅ Screenshot unchanged, stored once: {screenshot_path}")
+            if evicted:
+                say(f"🧹 Evicted {evicted} least recently used screenshots")
+            return str(screenshot_path)
+
+        except Exception as e:
+            say(f"❌ Screenshot failed: {e}")
+            return None
+
+    async def browser_navigate(self, url, wait_until="load", timeout=30, tab_id=None):
+        """Navigate browser to URL and wait until the page reaches wait_until"""
+        say(f"🌐 Navigating to: {url}")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            # Navigate and wait for the requested lifecycle event
+            result = await self.navigate_and_wait(tab_id, "Page.navigate", {"url": url}, wait_until, timeout)
+            if result.get('errorText'):
+                say(f"❌ Navigation failed: {result['errorText']}")
+                return False
+
+            say("✅ Navigation complete")
+            return True
+
+        except TimeoutError:
+            say(f"❌ Navigation timed out after {timeout}s waiting for {wait_until}")
+            return False
+        except Exception as e:
+            say(f"❌ Navigation failed: {e}")
+            return False
+
+    async def navigate_and_wait(self, tab_id, method, params, wait_until="load", timeout=30):
+        """Run a navigation command and wait until the page reaches wait_until
+
+        wait_until is one of WAIT_UNTIL_EVENTS: "load" waits for
+        Page.loadEventFired, "domcontentloaded" and "networkidle" wait for the
+        matching Page.lifecycleEvent of the main frame, "none" returns as soon
+        as Chrome accepts the command.
+        """
+        if wait_until not in WAIT_UNTIL_EVENTS:
+            raise ValueError(f"Invalid wait condition: {wait_until}")
+
+        session = await self.get_session(tab_id)
+        event, lifecycle_name = WAIT_UNTIL_EVENTS[wait_until]
+        if event is None:
+            return await session.call(method, params)
+
+        await session.enable("Page")
+        if lifecycle_name:
+            await session.call("Page.setLifecycleEventsEnabled", {"enabled": True})
+
+        # Only accept events that belong to the document this command loads
+        command = {}
+
+        def is_ours(event_params):
+            if 'result' not in command:
+                return False
+            if lifecycle_name:
+                loader_id = command['result'].get('loaderId')
+                return (event_params.get('name') == lifecycle_name
+                        and event_params.get('frameId') == tab_id
+                        and (loader_id is None or event_params.get('loaderId') == loader_id))
+            return True
+
+        waiter = session.expect_event(event, is_ours)
+        try:
+            command['result'] = await session.call(method, params, timeout=timeout)
+
+            # Same-document navigations (hash changes) never fire a new load
+            if method == "Page.navigate" and not command['result'].get('loaderId'):
+                return command['result']
+            if command['result'].get('errorText'):
+                return command['result']
+
+            # Events read before the reply was matched were rejected above
+            with timed("wait", wait_until):
+                await asyncio.wait_for(waiter, timeout)
+            return command['result']
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timed out waiting for {wait_until}")
+        finally:
+            waiter.cancel()
+
+    async def browser_verify(self):
+        """Verify Chrome dev profile connection"""
+        try:
+            is_running, cdp_info = await self.browser_status()
+            if not is_running:
+                say("❌ Chrome dev profile not running on any debugging port")
+                say("Please launch with: ./scripts/launch-dev-chrome.sh")
+                return False
+
+            tabs = await self.get_tabs()
+
+            say(f"✅ Connected to Chrome dev profile on port {cdp_info['cdp_port']}")
+            say(f"🔗 WebSocket: {cdp_info['ws_endpoint']}")
+            say(f"📑 Active tabs: {len(tabs)}")
+            if self.registry.pinned:
+                say(f"📌 Pinned tab: {self.registry.pinned}")
+
+            return True
+
+        except Exception as e:
+            say(f"❌ Connection verification failed: {e}")
+            return False
+
+    async def browser_scroll(self, direction="down", pixels=None, timeout=5, tab_id=None):
+        """Scroll the browser page and wait for the scroll to settle"""
+        say(f"📜 Scrolling {direction}...")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            # Enable runtime to execute JavaScript
+            await (await self.get_session(tab_id)).enable("Runtime")
+
+            # Determine scroll parameters
+            if pixels is None:
+                pixels = 500 if direction in ["down", "up"] else 300
+
+            if direction == "down":
+                scroll_script = f"window.scrollBy(0, {pixels});"
+            elif direction == "up":
+                scroll_script = f"window.scrollBy(0, -{pixels});"
+            elif direction == "left":
+                scroll_script = f"window.scrollBy(-{pixels}, 0);"
+            elif direction == "right":
+                scroll_script = f"window.scrollBy({pixels}, 0);"
+            elif direction == "top":
+                scroll_script = "window.scrollTo(0, 0);"
+            elif direction == "bottom":
+                scroll_script = "window.scrollTo(0, document.body.scrollHeight);"
+            else:
+                say(f"❌ Invalid scroll direction: {direction}")
+                return False
+
+            # Execute scroll and resolve once it has settled
+            await self.send_cdp_command(tab_id, "Runtime.evaluate", {
+                "expression": SCROLL_AND_SETTLE_SCRIPT % {
+                    "scroll": scroll_script,
+                    "timeout_ms": timeout * 1000
+                },
+                "awaitPromise": True,
+                "returnByValue": True
+            }, timeout=timeout + 5)
+
+            say(f"✅ Scrolled {direction}")
+            return True
+
+        except Exception as e:
+            say(f"❌ Scroll failed: {e}")
+            return False
+
+    async def browser_click(self, x=None, y=None, tab_id=None, selector=None):
+        """Click at specific coordinates, or at the center of the element matching selector"""
+        say(f"🖱️ Clicking {selector}..." if selector else f"🖱️ Clicking at ({x}, {y})...")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            if selector:
+                point = (await self.locate_selectors(tab_id, [selector], scroll=True))[selector]
+                if point is None:
+                    say(f"❌ No visible element matches {selector}")
+                    return False
+                x, y = point["x"], point["y"]
+
+            # Send mouse press and release back to back
+            await self.send_cdp_commands(tab_id, self.click_commands(x, y))
+
+            say(f"✅ Clicked at ({x}, {y})")
+            return True
+
+        except Exception as e:
+            say(f"❌ Click failed: {e}")
+            return False
+
+    def click_commands(self, x, y):
+        """Build the Input.dispatchMouseEvent commands for a left click"""
+        return [
+            ("Input.dispatchMouseEvent", {
+                "type": event_type,
+                "x": x,
+                "y": y,
+                "button": "left",
+                "clickCount": 1
+            })
+            for event_type in ("mousePressed", "mouseReleased")
+        ]
+
+    async def browser_type(self, text, mode="insert", delay=None, tab_id=None, selector=None):
+        """Type text into the currently focused element, or into selector after focusing it
+
+        mode "insert" commits the whole string with a single Input.insertText.
+        mode "keys" sends a keyDown/keyUp pair per character, pipelined on the
+        tab's session and acknowledged together. Passing delay (seconds) paces
+        the key events one at a time instead.
+        """
+        say(f"⌨️ Typing text: {text[:50]}...")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            if selector and not await self.focus_selector(tab_id, selector):
+                say(f"❌ No focusable element matches {selector}")
+                return False
+
+            if mode == "insert":
+                await self.send_cdp_command(tab_id, "Input.insertText", {"text": text})
+            elif mode == "keys":
+                commands = self.key_events_for_text(text)
+                if delay:
+                    for method, params in commands:
+                        await self.send_cdp_command(tab_id, method, params)
+                        with timed("sleep", "type delay"):
+                            await asyncio.sleep(delay)
+                else:
+                    await self.send_cdp_commands(tab_id, commands)
+            else:
+                say(f"❌ Invalid typing mode: {mode}")
+                return False
+
+            say(f"✅ Typed text successfully")
+            return True
+
+        except Exception as e:
+            say(f"❌ Typing failed: {e}")
+            return False
+
+    def key_events_for_text(self, text):
+        """Build the Input.dispatchKeyEvent commands that type text key by key"""
+        commands = []
+        for char in text:
+            if char == "\n":
+                down = {"type": "keyDown", "key": "Enter", "text": "\r", "windowsVirtualKeyCode": 13}
+                up = {"type": "keyUp", "key": "Enter", "windowsVirtualKeyCode": 13}
+            else:
+                down = {"type": "keyDown", "key": char, "text": char}
+                up = {"type": "keyUp", "key": char}
+            commands.append(("Input.dispatchKeyEvent", down))
+            commands.append(("Input.dispatchKeyEvent", up))
+        return commands
+
+    async def browser_key(self, key, tab_id=None):
+        """Press a specific key"""
+        say(f"🔑 Pressing key: {key}")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            await self.send_cdp_commands(tab_id, self.key_commands(key))
+
+            say(f"✅ Pressed key: {key}")
+            return True
+
+        except Exception as e:
+            say(f"❌ Key press failed: {e}")
+            return False
+
+    def key_commands(self, key):
+        """Build the Input.dispatchKeyEvent commands for one key press"""
+        if key in KEY_CODES:
+            # Key down and up events
+            return [
+                ("Input.dispatchKeyEvent", {
+                    "type": event_type,
+                    "windowsVirtualKeyCode": KEY_CODES[key],
+                    "key": key
+                })
+                for event_type in ("keyDown", "keyUp")
+            ]
+        # For single character keys
+        return [("Input.dispatchKeyEvent", {"type": "char", "text": key})]
+
+    async def browser_reload(self, wait_until="load", timeout=30, tab_id=None):
+        """Reload the current page and wait until it reaches wait_until"""
+        say("🔄 Reloading page...")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            # Reload page and wait for the requested lifecycle event
+            await self.navigate_and_wait(tab_id, "Page.reload", {}, wait_until, timeout)
+
+            say("✅ Page reloaded")
+            return True
+
+        except TimeoutError:
+            say(f"❌ Reload timed out after {timeout}s waiting for {wait_until}")
+            return False
+        except Exception as e:
+            say(f"❌ Reload failed: {e}")
+            return False
+
+    async def browser_evaluate(self, expression, tab_id=None):
+        """Evaluate JavaScript expression"""
+        say(f"🔧 Evaluating: {expression[:100]}...")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return None
+
+            value = await self.evaluate(tab_id, expression)
+            say(f"✅ Result: {value}")
+            return value
+
+        except JavaScriptError as e:
+            say(f"❌ JavaScript error: {e}")
+            return None
+        except Exception as e:
+            say(f"❌ Evaluation failed: {e}")
+            return None
+
+    async def evaluate(self, tab_id, expression, await_promise=False, timeout=None):
+        """Evaluate expression in a tab and return its value, raising JavaScriptError if it throws"""
+        # Enable Runtime
+        await (await self.get_session(tab_id)).enable("Runtime")
+
+        result = await self.send_cdp_command(tab_id, "Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise
+        }, timeout)
+
+        if result.get('exceptionDetails'):
+            raise JavaScriptError(result['exceptionDetails'])
+        return result.get('result', {}).get('value')
+
+    async def browser_events(self, method, tab_id=None, maxsize=0):
+        """Async iterator over CDP events named method on a tab
+
+        The event's domain must already be enabled on the tab's session.
+        """
+        tab_id = await self.resolve_tab(tab_id)
+        if not tab_id:
+            raise Exception("Failed to get browser tab")
+        session = await self.get_session(tab_id)
+        async for params in session.events(method, maxsize):
+            yield params
+
+    # ===== ELEMENT SELECTORS =====
+
+    async def browser_focus(self, selector, tab_id=None):
+        """Focus the first focusable element matching a CSS selector"""
+        say(f"🎯 Focusing {selector}...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return False
+
+            if not await self.focus_selector(tab_id, selector):
+                say(f"❌ No focusable element matches {selector}")
+                return False
+
+            say(f"✅ Focused {selector}")
+            return True
+
+        except Exception as e:
+            say(f"❌ Focus failed: {e}")
+            return False
+
+    async def browser_locate(self, selectors, tab_id=None):
+        """Print and return the center point of the first visible match of each selector"""
+        say(f"📍 Locating {len(selectors)} selectors...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return None
+
+            points = await self.locate_selectors(tab_id, selectors)
+            for selector, point in points.items():
+                if point:
+                    say(f"   {selector}: ({point['x']}, {point['y']}) {point['width']}x{point['height']}")
+                else:
+                    say(f"   {selector}: not visible")
+            return points
+
+        except Exception as e:
+            say(f"❌ Locate failed: {e}")
+            return None
+
+    def _dom_cache(self, tab_id, session):
+        # Node ids are only valid for one document on one connection: the
+        # cache is emptied on DOM.documentUpdated and when the socket changes
+        cache = self.dom_nodes.get(tab_id)
+        if cache is None or cache["session"] is not session:
+            cache = self.dom_nodes[tab_id] = {"session": session, "ws": session.ws, "root": None, "nodes": {}}
+
+            def on_document_updated(params):
+                cache["root"] = None
+                cache["nodes"].clear()
+
+            session.subscribe("DOM.documentUpdated", on_document_updated)
+        if cache["ws"] is not session.ws:
+            cache.update(ws=session.ws, root=None)
+            cache["nodes"].clear()
+        return cache
+
+    async def query_selectors(self, tab_id, selectors, refresh=()):
+        """Node ids matching each selector, in document order
+
+        Cached ids are reused until the document changes; the rest are
+        fetched with one pipelined batch of DOM.querySelectorAll. Selectors
+        in refresh are always queried again. Empty results are not cached,
+        so elements rendered later are found on the next call.
+        """
+        session = await self.get_session(tab_id)
+        await session.enable("DOM")
+        cache = self._dom_cache(tab_id, session)
+        if cache["root"] is None:
+            cache["root"] = (await session.call("DOM.getDocument", {"depth": 0}))["root"]["nodeId"]
+
+        for selector in refresh:
+            cache["nodes"].pop(selector, None)
+        missing = [selector for selector in dict.fromkeys(selectors) if selector not in cache["nodes"]]
+        found = {}
+        if missing:
+            results = await session.call_each([
+                ("DOM.querySelectorAll", {"nodeId": cache["root"], "selector": selector}) for selector in missing
+            ])
+            for selector, result in zip(missing, results):
+                if isinstance(result, CDPError):
+                    raise ValueError(f"Invalid selector {selector}: {result}")
+                found[selector] = result["nodeIds"]
+                if result["nodeIds"]:
+                    cache["nodes"][selector] = result["nodeIds"]
+        return {selector: cache["nodes"].get(selector, found.get(selector, [])) for selector in selectors}
+
+    async def locate_selectors(self, tab_id, selectors, scroll=False):
+        """Center points {selector: {"x", "y", "width", "height", "node_id"} or None}
+
+        Boxes of the first SELECTOR_CANDIDATES matches of every selector
+        come from one pipelined batch of DOM.getBoxModel, and the first
+        match with a non-empty box wins. With scroll, the winner is
+        scrolled into view before it is measured: in the same batch when it
+        is the only match, otherwise with a second round-trip. Selectors
+        whose cached nodes have gone stale are queried once more.
+        """
+        session = await self.get_session(tab_id)
+        refresh = []
+        for attempt in range(2):
+            nodes = await self.query_selectors(tab_id, selectors, refresh)
+            commands, owners = [], []
+            for selector, node_ids in nodes.items():
+                scroll_first = scroll and len(node_ids) == 1
+                for node_id in node_ids[:SELECTOR_CANDIDATES]:
+                    if scroll_first:
+                        commands.append(("DOM.scrollIntoViewIfNeeded", {"nodeId": node_id}))
+                        owners.append(None)
+                    commands.append(("DOM.getBoxModel", {"nodeId": node_id}))
+                    owners.append((selector, node_id, scroll_first))
+            boxes = await session.call_each(commands)
+
+            points = dict.fromkeys(selectors)
+            scrolled = set()
+            stale = set()
+            for owner, box in zip(owners, boxes):
+                if owner is None:
+                    continue
+                selector, node_id, scroll_first = owner
+                if isinstance(box, CDPError):
+                    if "find node" in str(box):
+                        stale.add(selector)
+                    continue
+                if points[selector] is None and box["model"]["width"] and box["model"]["height"]:
+                    points[selector] = box_center(box["model"], node_id)
+                    if scroll_first:
+                        scrolled.add(selector)
+            refresh = [selector for selector in stale if points[selector] is None]
+            if not refresh:
+                break
+
+        if scroll:
+            for selector, point in points.items():
+                if point is None or selector in scrolled:
+                    continue
+                _, box = await session.call_many([
+                    ("DOM.scrollIntoViewIfNeeded", {"nodeId": point["node_id"]}),
+                    ("DOM.getBoxModel", {"nodeId": point["node_id"]})
+                ])
+                points[selector] = box_center(box["model"], point["node_id"])
+        return points
+
+    async def focus_selector(self, tab_id, selector):
+        """Focus the first match of selector that accepts focus, returns False if none does"""
+        session = await self.get_session(tab_id)
+        for refresh in ((), (selector,)):
+            node_ids = (await self.query_selectors(tab_id, [selector], refresh))[selector]
+            for node_id in node_ids[:SELECTOR_CANDIDATES]:
+                try:
+                    await session.call("DOM.focus", {"nodeId": node_id})
+                    return True
+                except CDPError as e:
+                    if "find node" in str(e):
+                        break
+            else:
+                return False
+        return False
+
+    # ===== WAITS =====
+
+    async def browser_wait_for(self, selector=None, text=None, predicate=None, network_idle=False,
+                               state="visible", timeout=10, tab_id=None):
+        """Wait until a selector, text, JS predicate or network idle condition holds
+
+        Returns the time waited in ms, or None on timeout or failure.
+        """
+        label = wait_condition_label(selector, text, predicate, network_idle, state)
+        say(f"⏳ Waiting for {label}...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                say("❌ Failed to get browser tab")
+                return None
+            elapsed = await self.wait_for(tab_id, selector, text, predicate, network_idle, state, timeout)
+            say(f"✅ {label} after {elapsed:.0f}ms")
+            return elapsed
+
+        except TimeoutError:
+            say(f"❌ Timed out after {timeout}s waiting for {label}")
+            return None
+        except JavaScriptError as e:
+            say(f"❌ JavaScript error: {e}")
+            return None
+        except Exception as e:
+            say(f"❌ Wait failed: {e}")
+            return None
+
+    async def wait_for(self, tab_id, selector=None, text=None, predicate=None, network_idle=False,
+                       state="visible", timeout=10):
+        """Wait until exactly one condition holds and return the time waited in ms
+
+        selector waits for a CSS selector to be "attached", "visible" or
+        "hidden"; text for text in the page's visible text; predicate for a
+        JS expression to be truthy. These run as one WAIT_FOR_SCRIPT promise
+        awaited by Runtime.evaluate. When the page navigates during the wait
+        the promise dies with its document, and it is installed again in the
+        new one for the remaining time. network_idle waits for
+        NETWORK_IDLE_MS without requests in flight, from Network events.
+        Raises TimeoutError when timeout seconds pass first.
+        """
+        if sum(bool(condition) for condition in (selector, text, predicate, network_idle)) != 1:
+            raise ValueError("Give exactly one of selector, text, predicate or network_idle")
+        label = wait_condition_label(selector, text, predicate, network_idle, state)
+        start = time.perf_counter()
+
+        with timed("wait", label):
+            if network_idle:
+                await self._wait_for_network_idle(tab_id, timeout)
+                return (time.perf_counter() - start) * 1000
+
+            if selector:
+                if state not in WAIT_FOR_SELECTOR:
+                    raise ValueError(f"Invalid selector state: {state}")
+                condition = WAIT_FOR_SELECTOR[state] % {"selector": json.dumps(selector)}
+            elif text:
+                condition = WAIT_FOR_TEXT % {"text": json.dumps(text)}
+            else:
+                condition = f"() => ({predicate})"
+
+            deadline = start + timeout
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for {label}")
+                expression = WAIT_FOR_SCRIPT % {"condition": condition, "poll_ms": 100,
+                                                "timeout_ms": int(remaining * 1000)}
+                try:
+                    outcome = await self.evaluate(tab_id, expression, await_promise=True, timeout=remaining + 5)
+                except CDPError as e:
+                    # The document was replaced mid-wait, start over in the new one
+                    if any(reason in str(e) for reason in ("context was destroyed", "navigated or closed",
+                                                           "Cannot find context")):
+                        continue
+                    raise
+                if not outcome or not outcome.get("ok"):
+                    raise TimeoutError(f"Timed out waiting for {label}")
+                return (time.perf_counter() - start) * 1000
+
+    async def _wait_for_network_idle(self, tab_id, timeout):
+        session = await self.get_session(tab_id)
+        loop = asyncio.get_running_loop()
+        in_flight = set()
+        idle = asyncio.Event()
+        timer = None
+
+        def arm():
+            nonlocal timer
+            if timer is not None:
+                timer.cancel()
+            timer = loop.call_later(NETWORK_IDLE_MS / 1000, idle.set) if not in_flight else None
+
+        def on_request(params):
+            in_flight.add(params["requestId"])
+            idle.clear()
+            arm()
+
+        def on_done(params):
+            in_flight.discard(params["requestId"])
+            arm()
+
+        handlers = (("Network.requestWillBeSent", on_request), ("Network.loadingFinished", on_done),
+                    ("Network.loadingFailed", on_done))
+        for method, handler in handlers:
+            session.subscribe(method, handler)
+        try:
+            await session.enable("Network")
+            arm()
+            await asyncio.wait_for(idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timed out waiting for network idle ({len(in_flight)} requests in flight)")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            for method, handler in handlers:
+                session.unsubscribe(method, handler)
+
+    # ===== SCREENCAST =====
+
+    async def record_screencast(self, duration, fps=None, max_width=None, max_height=None,
+                                quality=80, image_format="jpeg", buffer_frames=32, tab_id=None):
+        """Record a tab with Page.startScreencast for duration seconds
+
+        Frames are acked as soon as they arrive and queued in a ring buffer of
+        buffer_frames entries that a writer task drains to disk, decoding the
+        base64 payload straight from the message string. When the writer
+        falls behind, the oldest queued frame is dropped, so memory stays
+        bounded. fps caps the saved frame rate by skipping frames that arrive
+        sooner than 1/fps after the last kept one.
+
+        Returns a summary dict, or None if recording could not start.
+        """
+        print(f"🎬 Recording screencast for {duration}s...")
+
+        try:
+            # Get or create tab
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+
+            session = await self.get_session(tab_id)
+            await session.enable("Page")
+        except Exception as e:
+            print(f"❌ Screencast failed: {e}")
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = self.claude_dir / f"screencast_{timestamp}"
+        output_dir.mkdir(exist_ok=True)
+        extension = "jpg" if image_format == "jpeg" else image_format
+
+        buffer = collections.deque()
+        frame_ready = asyncio.Event()
+        stats = {"received": 0, "written": 0, "skipped": 0, "dropped": 0}
+        min_interval = 1 / fps if fps else 0
+        last_kept = None
+        recording = True
+
+        def on_frame(params):
+            nonlocal last_kept
+            # Ack first so Chrome keeps producing frames while we write
+            asyncio.ensure_future(session.send("Page.screencastFrameAck", {"sessionId": params['sessionId']}, track=False))
+            stats['received'] += 1
+
+            frame_time = params.get('metadata', {}).get('timestamp', time.time())
+            if min_interval and last_kept is not None and frame_time - last_kept < min_interval:
+                stats['skipped'] += 1
+                return
+            last_kept = frame_time
+
+            if len(buffer) >= buffer_frames:
+                buffer.popleft()
+                stats['dropped'] += 1
+            buffer.append((frame_time, params['data']))
+            frame_ready.set()
+
+        def write_frame(path, data):
+            with open(path, 'wb') as f:
+                f.write(binascii.a2b_base64(data))
+
+        async def write_frames():
+            with open(output_dir / "frames.jsonl", 'w') as index:
+                while recording or buffer:
+                    if not buffer:
+                        frame_ready.clear()
+                        await frame_ready.wait()
+                        continue
+                    frame_time, data = buffer.popleft()
+                    stats['written'] += 1
+                    name = f"frame_{stats['written']:05d}.{extension}"
+                    await asyncio.to_thread(write_frame, output_dir / name, data)
+                    index.write(json.dumps({"frame": name, "timestamp": frame_time}) + "\n")
+
+        params = {"format": image_format, "everyNthFrame": 1}
+        if image_format == "jpeg":
+            params["quality"] = quality
+        if max_width:
+            params["maxWidth"] = max_width
+        if max_height:
+            params["maxHeight"] = max_height
+
+        session.subscribe("Page.screencastFrame", on_frame)
+        writer = asyncio.create_task(write_frames())
+        started = time.perf_counter()
+        try:
+            await session.call("Page.startScreencast", params)
+            with timed("sleep", "screencast"):
+                await asyncio.sleep(duration)
+            await session.call("Page.stopScreencast")
+        except Exception as e:
+            print(f"❌ Screencast failed: {e}")
+        finally:
+            session.unsubscribe("Page.screencastFrame", on_frame)
+            recording = False
+            frame_ready.set()
+            await writer
+
+        elapsed = time.perf_counter() - started
+        summary = dict(stats, seconds=round(elapsed, 2), fps=round(stats['written'] / elapsed, 1) if elapsed else 0,
+                       output_dir=str(output_dir))
+        print(f"✅ Screencast saved: {output_dir}")
+        print(f"🎞️  {stats['written']} frames written ({summary['fps']} fps), "
+              f"{stats['skipped']} skipped for frame rate, {stats['dropped']} dropped (buffer full)")
+        return summary
+
+    # ===== VISUAL REGRESSION =====
+
+    async def compare_screenshot(self, baseline, candidate=None, threshold=0.001, tolerance=8, tile=32, tab_id=None):
+        """Compare a screenshot against a baseline image
+
+        The baseline is an image path or a stored capture name or hash
+        prefix. Takes a fresh screenshot when no candidate path is given. Writes a
+        diff mask PNG and a JSON summary next to each other in .claude/; the
+        comparison passes when the changed pixel ratio is at most threshold.
+        Returns the summary dict, or None if the comparison could not run.
+        """
+        print(f"🔍 Comparing against baseline: {baseline}")
+
+        # Baselines in the store are pinned so eviction never removes them
+        try:
+            baseline_path = await asyncio.to_thread(self.screenshots.pin, baseline)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        if baseline_path is None:
+            print(f"❌ Baseline not found: {baseline}")
+            return None
+        baseline = str(baseline_path)
+
+        if candidate is None:
+            candidate = await self.browser_screenshot(tab_id=tab_id)
+            if candidate is None:
+                return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        mask_path = self.claude_dir / f"diff_{timestamp}.png"
+        summary_path = self.claude_dir / f"diff_{timestamp}.json"
+
+        try:
+            start = time.perf_counter()
+            summary = await asyncio.to_thread(compare_images, baseline, candidate, mask_path, tile, tolerance)
+            summary["seconds"] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            print(f"❌ Comparison failed: {e}")
+            return None
+
+        summary["threshold"] = threshold
+        summary["passed"] = summary["changed_ratio"] <= threshold
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        ratio = summary["changed_ratio"] * 100
+        if summary["passed"]:
+            print(f"✅ Matches baseline: {ratio:.3f}% pixels changed (threshold {threshold * 100:.3f}%)")
+        else:
+            print(f"❌ Differs from baseline: {ratio:.3f}% pixels changed in "
+                  f"{len(summary['regions'])} regions (threshold {threshold * 100:.3f}%)")
+        print(f"🖼️  Diff mask: {mask_path}")
+        print(f"📄 Summary: {summary_path} ({summary['seconds']}s)")
+        return summary
+
+    # ===== CAPTURE MATRIX =====
+
+    async def capture_matrix(self, routes, viewports, base_url="http://localhost:5173", workers=4,
+                             wait_until="load", timeout=30):
+        """Screenshot every route at every viewport using a pool of tabs
+
+        viewports is a list of (name, width, height, scale, mobile) tuples,
+        see parse_viewport. Up to workers tabs are opened and each pulls
+        (route, viewport) jobs from a shared queue: it applies the viewport
+        with Emulation.setDeviceMetricsOverride, navigates, waits for
+        wait_until and captures. Tabs are closed when the queue is empty.
+
+        Writes the images and a manifest.json with per-capture timings to a
+        .claude/matrix_<timestamp>/ directory and returns the manifest, or
+        None if no tab could be opened.
+        """
+        jobs = [(route, viewport) for route in routes for viewport in viewports]
+        workers = max(1, min(workers, len(jobs)))
+        print(f"🧮 Capturing {len(routes)} routes x {len(viewports)} viewports with {workers} tabs...")
+
+        started = time.perf_counter()
+        tabs = [tab for tab in await self.open_tabs(["about:blank"] * workers) if tab]
+        if not tabs:
+            print("❌ Failed to open capture tabs")
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = self.claude_dir / f"matrix_{timestamp}"
+        output_dir.mkdir(exist_ok=True)
+
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+        captures = []
+
+        async def worker(tab_id):
+            current_viewport = None
+            while not queue.empty():
+                route, viewport = queue.get_nowait()
+                captures.append(await self._capture_route(tab_id, route, viewport, base_url, output_dir,
+                                                          wait_until, timeout, viewport != current_viewport))
+                current_viewport = viewport
+
+        try:
+            await asyncio.gather(*(worker(tab['id']) for tab in tabs))
+        finally:
+            await asyncio.gather(*(self.close_tab(tab['id']) for tab in tabs))
+
+        elapsed = time.perf_counter() - started
+        serial = sum(capture['total_ms'] for capture in captures) / 1000
+        failed = [capture for capture in captures if capture.get('error')]
+        manifest = {
+            "base_url": base_url,
+            "tabs": len(tabs),
+            "captures": sorted(captures, key=lambda capture: (capture['route'], capture['viewport'])),
+            "failed": len(failed),
+            "seconds": round(elapsed, 2),
+            "serial_seconds": round(serial, 2),
+            "speedup": round(serial / elapsed, 2) if elapsed else None,
+        }
+        manifest_path = output_dir / "manifest.json"
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        for capture in failed:
+            print(f"❌ {capture['route']} @ {capture['viewport']}: {capture['error']}")
+        print(f"{'✅' if not failed else '⚠️ '} {len(captures) - len(failed)}/{len(captures)} captures in "
+              f"{manifest['seconds']}s ({manifest['serial_seconds']}s of work, {manifest['speedup']}x with {len(tabs)} tabs)")
+        print(f"📄 Manifest: {manifest_path}")
+        return manifest
+
+    async def _capture_route(self, tab_id, route, viewport, base_url, output_dir, wait_until, timeout, resize):
+        name, width, height, scale, mobile = viewport
+        url = route if "://" in route else base_url.rstrip("/") + "/" + route.lstrip("/")
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", route.split("://")[-1]).strip("-") or "index"
+        path = output_dir / f"{slug}_{name}.png"
+        capture = {"route": route, "url": url, "viewport": name, "width": width, "height": height, "file": path.name}
+
+        start = time.perf_counter()
+        try:
+            # A worker keeps its tab's viewport until its next job needs another one
+            if resize:
+                await self.send_cdp_command(tab_id, "Emulation.setDeviceMetricsOverride", {
+                    "width": width, "height": height, "deviceScaleFactor": scale, "mobile": mobile
+                })
+            result = await self.navigate_and_wait(tab_id, "Page.navigate", {"url": url}, wait_until, timeout)
+            if result.get('errorText'):
+                raise Exception(result['errorText'])
+            loaded = time.perf_counter()
+            capture["navigate_ms"] = round((loaded - start) * 1000, 1)
+
+            screenshot = await self.send_cdp_command(tab_id, "Page.captureScreenshot", {"format": "png"}, timeout)
+            await asyncio.to_thread(path.write_bytes, base64.b64decode(screenshot['data']))
+            capture["capture_ms"] = round((time.perf_counter() - loaded) * 1000, 1)
+        except TimeoutError:
+            capture["error"] = f"timed out after {timeout}s waiting for {wait_until}"
+        except Exception as e:
+            capture["error"] = str(e)
+        capture["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return capture
+
+    # ===== PERFORMANCE TRACE =====
+
+    async def record_trace(self, url, wait_until="load", timeout=30, settle=1.0, chunk_size=1 << 20, tab_id=None):
+        """Record a Chrome performance trace of loading url
+
+        Starts Tracing with transferMode ReturnAsStream, navigates with
+        browser_navigate, waits settle more seconds for post-load work and
+        stops. The trace stream is then read with IO.read in chunk_size
+        pieces that go straight into .claude/trace_<timestamp>.json.gz and a
+        TraceSummary, so the whole trace is never held in memory.
+
+        Returns the summary dict, or None if the trace could not be recorded.
+        """
+        print(f"⏱️  Tracing page load: {url}")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+            session = await self.get_session(tab_id)
+
+            await self.send_cdp_command(tab_id, "Tracing.start", {
+                "transferMode": "ReturnAsStream",
+                "streamFormat": "json",
+                "streamCompression": "none",
+                "traceConfig": {"includedCategories": TRACE_CATEGORIES, "recordMode": "recordAsMuchAsPossible"}
+            })
+        except Exception as e:
+            print(f"❌ Trace failed to start: {e}")
+            return None
+
+        # browser_navigate reports its own failures; trace whatever happened
+        navigated = await self.browser_navigate(url, wait_until, timeout, tab_id)
+        if settle:
+            with timed("sleep", "trace settle"):
+                await asyncio.sleep(settle)
+
+        complete = session.expect_event("Tracing.tracingComplete")
+        try:
+            await self.send_cdp_command(tab_id, "Tracing.end")
+            with timed("wait", "Tracing.tracingComplete"):
+                complete = await asyncio.wait_for(complete, timeout)
+        except Exception as e:
+            complete.cancel()
+            print(f"❌ Trace failed to stop: {e}")
+            return None
+
+        if not complete.get("stream"):
+            print("❌ Chrome returned no trace stream")
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        trace_path = self.claude_dir / f"trace_{timestamp}.json.gz"
+        summary = TraceSummary()
+        started = time.perf_counter()
+        trace_bytes = 0
+        try:
+            with gzip.open(trace_path, 'wb', compresslevel=6) as f:
+                while True:
+                    chunk = await self.send_cdp_command(tab_id, "IO.read", {"handle": complete["stream"], "size": chunk_size})
+                    data = chunk.get("data", "")
+                    if chunk.get("base64Encoded"):
+                        raw = base64.b64decode(data)
+                        data = raw.decode("utf-8", errors="replace")
+                    else:
+                        raw = data.encode()
+                    trace_bytes += len(raw)
+                    f.write(raw)
+                    summary.feed(data)
+                    if chunk.get("eof"):
+                        break
+        except Exception as e:
+            print(f"❌ Reading trace failed: {e}")
+            return None
+        finally:
+            try:
+                await self.send_cdp_command(tab_id, "IO.close", {"handle": complete["stream"]})
+            except Exception:
+                pass
+
+        result = summary.result()
+        result.update(url=url, navigated=navigated, data_loss=complete.get("dataLossOccurred", False),
+                      trace=str(trace_path), trace_bytes=trace_bytes,
+                      read_seconds=round(time.perf_counter() - started, 2))
+        self.print_trace_summary(result)
+        return result
+
+    def print_trace_summary(self, summary):
+        print(f"✅ Trace saved: {summary['trace']} ({summary['trace_bytes'] / 1048576:.1f} MiB, "
+              f"{summary['events']} events, read in {summary['read_seconds']}s)")
+        if summary.get("data_loss"):
+            print("⚠️  Chrome dropped trace data, the buffer filled up")
+        if "main_thread" not in summary:
+            print("⚠️  No main thread tasks in the trace")
+            return
+        print(f"🧵 Main thread busy: {summary['busy_ms']:.0f}ms")
+        print(f"🐢 Long tasks (>{LONG_TASK_MS}ms): {summary['long_tasks']}, "
+              f"total blocking time {summary['blocking_ms']:.0f}ms")
+        for task in summary['longest_tasks']:
+            print(f"     {task['duration_ms']:>8.1f}ms at +{task['start_ms']:.0f}ms")
+        print(f"🎨 Style {summary['style_ms']:.0f}ms | Layout {summary['layout_ms']:.0f}ms | "
+              f"Paint {summary['paint_ms']:.0f}ms | Script {summary['script_ms']:.0f}ms | "
+              f"Parse {summary['parse_ms']:.0f}ms | GC {summary['gc_ms']:.0f}ms")
+
+    # ===== NETWORK CAPTURE =====
+
+    async def record_network(self, duration, url=None, bodies=False, max_body_kib=64, wait_until="load",
+                             timeout=30, tab_id=None):
+        """Record a tab's network traffic for duration seconds into a HAR file
+
+        Optionally loads url first (inside the capture). Entries are written
+        to .claude/network_<timestamp>.har as requests complete, see
+        NetworkRecorder; with bodies, response bodies up to max_body_kib are
+        included. Returns the summary dict, or None if capture could not start.
+        """
+        print(f"📡 Recording network traffic for {duration}s...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+            session = await self.get_session(tab_id)
+            await session.enable("Network")
+        except Exception as e:
+            print(f"❌ Network capture failed: {e}")
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        recorder = NetworkRecorder(self.claude_dir / f"network_{timestamp}.har",
+                                   session if bodies else None, max_body_kib * 1024)
+        recorder.attach(session)
+        try:
+            if url:
+                await self.browser_navigate(url, wait_until, timeout, tab_id)
+            with timed("sleep", "network capture"):
+                await asyncio.sleep(duration)
+        finally:
+            recorder.detach(session)
+            summary = await recorder.close()
+
+        self.print_network_summary(summary)
+        return summary
+
+    def print_network_summary(self, summary):
+        print(f"✅ HAR saved: {summary['har']}")
+        print(f"📊 {summary['requests']} requests, {summary['failed']} failed, "
+              f"{summary['transfer_bytes'] / 1024:.1f} KiB transferred, {summary['unfinished']} still in flight")
+        if summary['bodies'] or summary['bodies_skipped'] or summary['bodies_dropped']:
+            print(f"📦 {summary['bodies']} bodies saved, {summary['bodies_skipped']} over the size cap left out, "
+                  f"{summary['bodies_dropped']} dropped while {NETWORK_BODY_FETCHES} fetches were pending")
+        if summary['slowest']:
+            print("🐢 Slowest:")
+            for row in summary['slowest']:
+                print(f"     {row['ms']:>9.1f}ms  {row['request'][:100]}")
+        if summary['largest']:
+            print("🐘 Largest:")
+            for row in summary['largest']:
+                print(f"     {row['bytes'] / 1024:>8.1f}KiB  {row['request'][:100]}")
+        if summary['duplicates']:
+            print("🔁 Fetched more than once:")
+            for row in summary['duplicates']:
+                print(f"     {row['count']:>9}x  {row['request'][:100]}")
+
+    # ===== COVERAGE =====
+
+    async def collect_coverage(self, url, steps=None, wait_until="load", timeout=30, tab_id=None):
+        """Measure how much of each script and stylesheet a page load (and flow) uses
+
+        Starts Profiler precise coverage and CSS rule usage tracking, loads
+        url with browser_navigate, runs the optional flow steps with
+        run_flow, then collects both. Like Puppeteer's resetOnNavigation,
+        only scripts and stylesheets of the document alive at the end count:
+        both are forgotten when the main frame's execution contexts are
+        cleared. One instance is kept per source position, and instances
+        are summed by source URL (inline stylesheets under their document
+        URL). Sizes are in source characters, which equal bytes for ASCII
+        bundles. Writes
+        .claude/coverage_<timestamp>.json and returns the report sorted by
+        unused size, or None if coverage could not be collected.
+        """
+        print(f"🧪 Collecting JS and CSS coverage for {url}...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+            session = await self.get_session(tab_id)
+
+            # Headers and scripts arrive as events, including those already loaded when the
+            # domain is enabled, so the current document's are dropped when it goes away
+            sheets = {}
+            script_keys = {}
+
+            def on_sheet(params):
+                sheets[params["header"]["styleSheetId"]] = params["header"]
+
+            def on_script(params):
+                script_keys[params["scriptId"]] = (params.get("url"), params.get("startLine", 0),
+                                                   params.get("startColumn", 0))
+
+            def on_contexts_cleared(params):
+                sheets.clear()
+                script_keys.clear()
+
+            listeners = [("CSS.styleSheetAdded", on_sheet), ("Debugger.scriptParsed", on_script),
+                         ("Runtime.executionContextsCleared", on_contexts_cleared)]
+            for method, listener in listeners:
+                session.subscribe(method, listener)
+
+            await session.enable("Runtime")
+            await session.enable("Debugger")
+            await self.send_cdp_command(tab_id, "Debugger.setSkipAllPauses", {"skip": True})
+            await session.enable("Profiler")
+            await self.send_cdp_command(tab_id, "Profiler.startPreciseCoverage", {"callCount": False, "detailed": True})
+            await session.enable("DOM")
+            await session.enable("CSS")
+            await self.send_cdp_command(tab_id, "CSS.startRuleUsageTracking")
+        except Exception as e:
+            print(f"❌ Coverage failed to start: {e}")
+            return None
+
+        try:
+            passed = await self.browser_navigate(url, wait_until, timeout, tab_id)
+            if passed and steps:
+                results = await self.run_flow(steps, tab_id)
+                passed = len(results) == len(steps) and all(row['ok'] for row in results)
+                if not passed:
+                    print("⚠️  Flow failed, coverage covers the steps that ran")
+
+            scripts = await self.send_cdp_command(tab_id, "Profiler.takePreciseCoverage", timeout=timeout)
+            rules = await self.send_cdp_command(tab_id, "CSS.stopRuleUsageTracking", timeout=timeout)
+        except Exception as e:
+            print(f"❌ Coverage failed: {e}")
+            return None
+        finally:
+            for method, listener in listeners:
+                session.unsubscribe(method, listener)
+            try:
+                await self.send_cdp_command(tab_id, "Profiler.stopPreciseCoverage")
+                await session.disable("Debugger")
+            except Exception:
+                pass
+
+        # The same file loaded twice (or reported for a stale document) is one instance, the last wins
+        instances = {}
+        for script in scripts.get("result", []):
+            key = script_keys.get(script["scriptId"])
+            if key and key[0]:
+                instances[("js",) + key] = script_coverage(script.get("functions", []))
+
+        used_by_sheet = collections.Counter()
+        for rule in rules.get("ruleUsage", []):
+            if rule.get("used"):
+                used_by_sheet[rule["styleSheetId"]] += rule["endOffset"] - rule["startOffset"]
+        for sheet_id, header in sheets.items():
+            source_url = header.get("sourceURL") or "(constructed)"
+            if header.get("isInline"):
+                source_url += " (inline)"
+            key = ("css", source_url, header.get("startLine", 0), header.get("startColumn", 0))
+            instances[key] = (int(header.get("length", 0)), used_by_sheet.get(sheet_id, 0))
+
+        entries = {}
+        for (kind, source_url, *_), (total, used) in instances.items():
+            entry = entries.setdefault((kind, source_url), {"type": kind, "url": source_url, "total": 0, "used": 0})
+            entry["total"] += total
+            entry["used"] += used
+
+        rows = []
+        for entry in entries.values():
+            entry["unused"] = entry["total"] - entry["used"]
+            entry["unused_ratio"] = round(entry["unused"] / entry["total"], 4) if entry["total"] else 0
+            rows.append(entry)
+        rows.sort(key=lambda entry: -entry["unused"])
+
+        totals = {kind: {"total": sum(row["total"] for row in rows if row["type"] == kind),
+                         "unused": sum(row["unused"] for row in rows if row["type"] == kind)}
+                  for kind in ("js", "css")}
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = self.claude_dir / f"coverage_{timestamp}.json"
+        report = {"url": url, "flow_passed": passed, "totals": totals, "entries": rows}
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print("")
+        print(f"{'type':<5} {'total KiB':>10} {'unused KiB':>11} {'unused':>7}  url")
+        for row in rows:
+            print(f"{row['type']:<5} {row['total'] / 1024:>10.1f} {row['unused'] / 1024:>11.1f} "
+                  f"{row['unused_ratio'] * 100:>6.1f}%  {row['url'][:90]}")
+        for kind, total in totals.items():
+            if total["total"]:
+                print(f"📦 {kind.upper()}: {total['unused'] / 1024:.1f} of {total['total'] / 1024:.1f} KiB unused "
+                      f"({total['unused'] / total['total'] * 100:.1f}%)")
+        print(f"📄 Report: {report_path}")
+        return report
+
+    # ===== CPU PROFILE =====
+
+    async def profile_cpu(self, url=None, steps=None, interval_us=100, top=20, wait_until="load", timeout=30, tab_id=None):
+        """CPU-profile loading url and/or running flow steps
+
+        Sets the Profiler sampling interval (microseconds), starts it, loads
+        url with browser_navigate and runs steps with run_flow, then stops.
+        The profile is saved as .claude/profile_<timestamp>.cpuprofile (open
+        it in the DevTools Performance panel) and the top functions by self
+        time are printed. Returns (rows, profile_us), or None on failure.
+        """
+        print(f"🔬 CPU profiling ({interval_us}µs sampling)...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+            await (await self.get_session(tab_id)).enable("Profiler")
+            await self.send_cdp_command(tab_id, "Profiler.setSamplingInterval", {"interval": interval_us})
+            await self.send_cdp_command(tab_id, "Profiler.start")
+        except Exception as e:
+            print(f"❌ Profiler failed to start: {e}")
+            return None
+
+        try:
+            if url:
+                await self.browser_navigate(url, wait_until, timeout, tab_id)
+            if steps:
+                results = await self.run_flow(steps, tab_id)
+                if len(results) != len(steps) or not all(row['ok'] for row in results):
+                    print("⚠️  Flow failed, the profile covers the steps that ran")
+        finally:
+            try:
+                profile = (await self.send_cdp_command(tab_id, "Profiler.stop", timeout=timeout))["profile"]
+            except Exception as e:
+                print(f"❌ Profiler failed to stop: {e}")
+                profile = None
+        if profile is None:
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        profile_path = self.claude_dir / f"profile_{timestamp}.cpuprofile"
+        with open(profile_path, 'w') as f:
+            json.dump(profile, f)
+
+        start = time.perf_counter()
+        rows, profile_us = await asyncio.to_thread(summarize_cpu_profile, profile)
+        elapsed = time.perf_counter() - start
+        idle_us = sum(row["self_us"] for row in rows if row["function"] == "(idle)")
+
+        print("")
+        print(f"{'self ms':>9} {'self %':>7} {'total ms':>9} {'total %':>8}  function")
+        for row in [row for row in rows if row["function"] not in ("(root)", "(idle)")][:top]:
+            location = f"{row['url'].rsplit('/', 1)[-1]}:{row['line']}" if row["url"] else ""
+            print(f"{row['self_us'] / 1000:>9.1f} {row['self_us'] / profile_us * 100 if profile_us else 0:>6.1f}% "
+                  f"{row['total_us'] / 1000:>9.1f} {row['total_us'] / profile_us * 100 if profile_us else 0:>7.1f}%  "
+                  f"{row['function']} {location}")
+        print(f"⏱️  {len(profile.get('samples', []))} samples over {profile_us / 1000:.0f}ms, "
+              f"{(profile_us - idle_us) / 1000:.0f}ms busy (summarized in {elapsed:.2f}s)")
+        print(f"📄 Profile: {profile_path}")
+        return rows, profile_us
+
+    # ===== HEAP SNAPSHOT =====
+
+    async def take_heap_snapshot(self, path, timeout=120, tab_id=None):
+        """Stream a heap snapshot of the tab's JS heap into path
+
+        Every HeapProfiler.addHeapSnapshotChunk event is written to the file
+        as it arrives; takeHeapSnapshot replies after the last chunk, so the
+        snapshot is never held in memory. Returns the size in bytes.
+        """
+        session = await self.get_session(tab_id)
+        await session.enable("HeapProfiler")
+        with open(path, 'w', encoding='utf-8') as f:
+            written = 0
+
+            def on_chunk(params):
+                nonlocal written
+                written += f.write(params["chunk"])
+
+            session.subscribe("HeapProfiler.addHeapSnapshotChunk", on_chunk)
+            try:
+                with timed("wait", "heap snapshot"):
+                    await self.send_cdp_command(tab_id, "HeapProfiler.takeHeapSnapshot",
+                                                {"reportProgress": False}, timeout=timeout)
+            finally:
+                session.unsubscribe("HeapProfiler.addHeapSnapshotChunk", on_chunk)
+        return written
+
+    async def heap_snapshot(self, top=20, retained=True, timeout=120, tab_id=None):
+        """Snapshot the JS heap to .claude/heap_<timestamp>.heapsnapshot and summarize it per class
+
+        The file opens in the DevTools Memory panel. Classes are listed by
+        retained size (self size with retained=False). Returns the summary
+        {class: {"count", "self_size", "retained_size"}}, or None on failure.
+        """
+        print("🧠 Taking heap snapshot...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            snapshot_path = self.claude_dir / f"heap_{timestamp}.heapsnapshot"
+            size = await self.take_heap_snapshot(snapshot_path, timeout, tab_id)
+        except Exception as e:
+            print(f"❌ Heap snapshot failed: {e}")
+            return None
+
+        start = time.perf_counter()
+        try:
+            summary, node_count = await asyncio.to_thread(parse_heap_snapshot, snapshot_path, retained)
+        except Exception as e:
+            print(f"❌ Could not parse heap snapshot: {e}")
+            return None
+        elapsed = time.perf_counter() - start
+
+        order = "retained_size" if retained else "self_size"
+        rows = sorted(summary.items(), key=lambda item: -item[1].get(order, 0))
+        print("")
+        print(f"{'count':>9} {'self KiB':>10} {'retained KiB':>13}  class")
+        for name, entry in rows[:top]:
+            retained_kib = f"{entry['retained_size'] / 1024:>13.1f}" if 'retained_size' in entry else f"{'-':>13}"
+            print(f"{entry['count']:>9} {entry['self_size'] / 1024:>10.1f} {retained_kib}  {name[:80]}")
+        total = sum(entry["self_size"] for entry in summary.values())
+        print(f"📦 {node_count} objects, {total / 1024 / 1024:.1f} MiB in {len(summary)} classes "
+              f"(parsed {size / 1024 / 1024:.1f} MiB in {elapsed:.2f}s)")
+        print(f"📄 Snapshot: {snapshot_path}")
+        return summary
+
+    async def leak_check(self, urls, cycles=5, steps=None, top=20, wait_until="load", timeout=30, tab_id=None):
+        """Look for object types that keep growing across repeated navigations
+
+        Each cycle loads every url in order with browser_navigate, runs the
+        optional flow steps, forces a garbage collection and snapshots the
+        heap, keeping only the per-class counts. Same-document URLs (hash
+        routes) exercise the app without resetting its heap. Classes whose
+        count rose in every cycle are reported. The last snapshot is kept;
+        the report goes to .claude/leak_<timestamp>.json. Returns the
+        report, or None on failure.
+        """
+        print(f"🔁 Leak check: {cycles} cycles over {', '.join(urls)}")
+
+        tab_id = await self.resolve_tab(tab_id)
+        if not tab_id:
+            print("❌ Failed to get browser tab")
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        snapshot_path = self.claude_dir / f"leak_{timestamp}.heapsnapshot"
+        counts = []
+        for cycle in range(1, cycles + 1):
+            try:
+                for url in urls:
+                    if not await self.browser_navigate(url, wait_until, timeout, tab_id):
+                        return None
+                if steps:
+                    results = await self.run_flow(steps, tab_id)
+                    if len(results) != len(steps) or not all(row['ok'] for row in results):
+                        print(f"❌ Flow failed in cycle {cycle}")
+                        return None
+                await self.send_cdp_command(tab_id, "HeapProfiler.collectGarbage", timeout=timeout)
+                await self.take_heap_snapshot(snapshot_path, timeout * 4, tab_id)
+                summary, node_count = await asyncio.to_thread(parse_heap_snapshot, snapshot_path)
+            except Exception as e:
+                print(f"❌ Cycle {cycle} failed: {e}")
+                return None
+            counts.append(summary)
+            print(f"   cycle {cycle}: {node_count} objects, "
+                  f"{sum(entry['self_size'] for entry in summary.values()) / 1024 / 1024:.1f} MiB")
+
+        growing = []
+        for name in counts[-1]:
+            series = [summary.get(name, {"count": 0, "self_size": 0}) for summary in counts]
+            if len(series) > 1 and all(later["count"] > earlier["count"] for earlier, later in zip(series, series[1:])):
+                growing.append({
+                    "class": name,
+                    "counts": [entry["count"] for entry in series],
+                    "growth_per_cycle": (series[-1]["count"] - series[0]["count"]) / (len(series) - 1),
+                    "self_size_growth": series[-1]["self_size"] - series[0]["self_size"]
+                })
+        growing.sort(key=lambda row: -row["self_size_growth"])
+
+        report = {"urls": urls, "cycles": cycles, "snapshot": str(snapshot_path), "growing": growing}
+        report_path = self.claude_dir / f"leak_{timestamp}.json"
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print("")
+        if growing:
+            print(f"{'per cycle':>10} {'+KiB':>9}  class  (counts)")
+            for row in growing[:top]:
+                print(f"{row['growth_per_cycle']:>10.1f} {row['self_size_growth'] / 1024:>9.1f}  {row['class'][:60]}  "
+                      f"{' → '.join(str(count) for count in row['counts'])}")
+            print(f"⚠️  {len(growing)} classes grew in every cycle")
+        else:
+            print("✅ No class grew in every cycle")
+        print(f"📄 Report: {report_path} (last snapshot: {snapshot_path})")
+        return report
+
+    # ===== BATCH FLOWS =====
+
+    async def run_flow(self, steps, tab_id=None, quiet=False):
+        """Run flow steps in order on one tab, stopping at the first failure
+
+        Each step is a dict with an "action" from FLOW_ACTIONS plus that
+        browser_* method's keyword arguments, e.g.
+        {"action": "click", "x": 100, "y": 200}. Consecutive click, key and
+        type steps do not wait on each other, so their CDP commands are sent
+        back to back; each step is timed from the previous step's last ack
+        (the first from the start of the group) to its own, so the step
+        times of a group add up to the group's total. Navigation,
+        screenshots, evaluation, scrolling and waits wait for everything before them.
+        When a step of a group fails, the group's later steps were already
+        sent and still run in the page; its result says so.
+
+        With quiet, the steps' status lines are not printed (only for this
+        task, other output of the process is untouched).
+
+        Returns one {"step", "action", "ok", "ms", "error"} dict per step run.
+        """
+        if quiet:
+            token = QUIET_OUTPUT.set(True)
+            try:
+                return await self.run_flow(steps, tab_id)
+            finally:
+                QUIET_OUTPUT.reset(token)
+
+        tab_id = await self.resolve_tab(tab_id)
+        if not tab_id:
+            say("❌ Failed to get browser tab")
+            return []
+
+        results = []
+        index = 0
+        while index < len(steps):
+            group = []
+            while index < len(steps):
+                commands = self.input_commands(steps[index])
+                if commands is None:
+                    break
+                group.append((index, steps[index], commands))
+                index += 1
+
+            if group:
+                ok = await self._run_input_group(tab_id, group, results)
+            else:
+                ok = await self._run_flow_step(tab_id, index, steps[index], results)
+                index += 1
+            if not ok:
+                break
+
+        return results
+
+    def input_commands(self, step):
+        """CDP commands for a click, key or type step, or None if the step must run on its own"""
+        try:
+            action = step.get('action')
+            if step.get('selector'):
+                return None
+            if action == "click":
+                return self.click_commands(int(step['x']), int(step['y']))
+            if action == "key":
+                return self.key_commands(step['key'])
+            if action == "type" and not step.get('delay'):
+                mode = step.get('mode', "insert")
+                if mode == "insert":
+                    return [("Input.insertText", {"text": step['text']})]
+                if mode == "keys":
+                    return self.key_events_for_text(step['text'])
+        except (KeyError, TypeError, ValueError):
+            pass
+        return None
+
+    async def _run_input_group(self, tab_id, group, results):
+        start = time.perf_counter()
+        try:
+            session = await self.get_session(tab_id)
+            sent = [(index, step, [await session.send(method, params) for method, params in commands])
+                    for index, step, commands in group]
+        except Exception as e:
+            await self._drop_session(tab_id)
+            results.append(self._flow_result(group[0][0], group[0][1], start, e))
+            return False
+
+        for position, (index, step, message_ids) in enumerate(sent):
+            try:
+                for message_id in message_ids:
+                    await session.wait(message_id)
+            except Exception as e:
+                # Nobody waits for the rest, but Chrome already has those commands
+                session.discard([message_id for _, _, ids in sent[position:] for message_id in ids])
+                later = [later_index + 1 for later_index, _, _ in sent[position + 1:]]
+                if len(later) == 1:
+                    e = f"{e} (step {later[0]} was already sent and still runs)"
+                elif later:
+                    e = f"{e} (steps {later[0]}-{later[-1]} were already sent and still run)"
+                results.append(self._flow_result(index, step, start, e))
+                return False
+            results.append(self._flow_result(index, step, start))
+            start = time.perf_counter()
+        return True
+
+    async def _run_flow_step(self, tab_id, index, step, results):
+        start = time.perf_counter()
+        action = step.get('action')
+        params = {key: value for key, value in step.items() if key != 'action'}
+        try:
+            if action not in FLOW_ACTIONS:
+                raise ValueError(f"Unknown action: {action}")
+            if action == "evaluate":
+                await self.evaluate(tab_id, **params)
+            else:
+                outcome = await getattr(self, FLOW_ACTIONS[action])(**params, tab_id=tab_id)
+                if outcome is None or outcome is False:
+                    raise RuntimeError(f"{action} failed")
+        except Exception as e:
+            results.append(self._flow_result(index, step, start, e))
+            return False
+
+        results.append(self._flow_result(index, step, start))
+        return True
+
+    def _flow_result(self, index, step, start, error=None):
+        return {
+            "step": index + 1,
+            "action": step.get('action'),
+            "ok": error is None,
+            "ms": round((time.perf_counter() - start) * 1000, 1),
+            "error": str(error) if error else None
+        }
+
+    async def run_flow_file(self, path, tab_id=None):
+        """Load a flow file, run it and print per-step timings, returns True if every step passed"""
+        print(f"▶️  Running flow: {path}")
+
+        try:
+            steps = load_flow(path)
+        except Exception as e:
+            print(f"❌ Could not load flow: {e}")
+            return False
+
+        start = time.perf_counter()
+        results = await self.run_flow(steps, tab_id)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        print("")
+        print(f"{'step':>4}  {'action':<12} {'ms':>9}  status")
+        for row in results:
+            status = "ok" if row['ok'] else f"FAILED: {row['error']}"
+            print(f"{row['step']:>4}  {row['action'] or '?':<12} {row['ms']:>9}  {status}")
+
+        passed = len(results) == len(steps) and all(row['ok'] for row in results)
+        if passed:
+            print(f"✅ Flow passed: {len(steps)} steps in {total_ms:.0f} ms")
+        else:
+            print(f"❌ Flow failed at step {len(results)} of {len(steps)} after {total_ms:.0f} ms")
+        return passed
+
+    # ===== LOAD TEST =====
+
+    async def load_test(self, steps, users=10, concurrency=5, iterations=1, base_url="http://localhost:5173",
+                        max_error_rate=0.0):
+        """Run a flow as many simulated users, each in its own browser context
+
+        Every user gets a fresh incognito-like context from
+        Target.createBrowserContext (no shared cookies, storage or cache)
+        with one page in it, runs the flow iterations times with run_flow
+        and is disposed. At most concurrency users are alive at once.
+        Relative navigate URLs are joined to base_url. Users run their
+        flows with run_flow's quiet flag. Latency percentiles and error rates per
+        step and per flow go to .claude/load_test_<timestamp>.json.
+        Returns the report, or None if no context could be created.
+        """
+        print(f"👥 Load test: {users} users, {concurrency} at a time, {iterations} iterations each")
+
+        is_running, cdp_info = await self.browser_status()
+        if not is_running:
+            print("❌ Browser not running")
+            return None
+
+        steps = [dict(step, url=step['url'] if "://" in step['url'] else base_url.rstrip("/") + "/" + step['url'].lstrip("/"))
+                 if step.get('action') == "navigate" and 'url' in step else step for step in steps]
+        browser = AsyncCDPSession(cdp_info['ws_endpoint'])
+        queue = asyncio.Queue()
+        for user in range(users):
+            queue.put_nowait(user)
+        flows = []
+        setup_errors = []
+
+        async def worker():
+            while not queue.empty():
+                user = queue.get_nowait()
+                context_id = tab_id = None
+                try:
+                    start = time.perf_counter()
+                    context_id = (await browser.call("Target.createBrowserContext", {"disposeOnDetach": True}))["browserContextId"]
+                    tab_id = (await browser.call("Target.createTarget", {"url": "about:blank",
+                                                                        "browserContextId": context_id}))["targetId"]
+                    setup_ms = (time.perf_counter() - start) * 1000
+                    for iteration in range(iterations):
+                        start = time.perf_counter()
+                        results = await self.run_flow(steps, tab_id, quiet=True)
+                        flows.append({"user": user, "iteration": iteration, "setup_ms": setup_ms if not iteration else None,
+                                      "ms": (time.perf_counter() - start) * 1000, "results": results,
+                                      "ok": len(results) == len(steps) and all(row['ok'] for row in results)})
+                except Exception as e:
+                    setup_errors.append(f"user {user}: {e}")
+                finally:
+                    session = self.sessions.pop(tab_id, None)
+                    self.dom_nodes.pop(tab_id, None)
+                    if session is not None:
+                        await session.close()
+                    if context_id:
+                        try:
+                            await browser.call("Target.disposeBrowserContext", {"browserContextId": context_id})
+                        except Exception:
+                            pass
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, users)))))
+        finally:
+            await browser.close()
+        duration = time.perf_counter() - started
+
+        if not flows:
+            print(f"❌ No user could start: {setup_errors[0] if setup_errors else 'unknown error'}")
+            return None
+
+        def latency(values):
+            if not values:
+                return {}
+            return {"p50": round(percentile(values, 0.5), 1), "p90": round(percentile(values, 0.9), 1),
+                    "p99": round(percentile(values, 0.99), 1), "max": round(max(values), 1)}
+
+        step_rows = []
+        for index, step in enumerate(steps):
+            rows = [flow["results"][index] for flow in flows if len(flow["results"]) > index]
+            failed = [row for row in rows if not row['ok']]
+            label = step.get('selector') or step.get('url') or step.get('text') or step.get('expression') or ""
+            step_rows.append({
+                "step": index + 1,
+                "action": step.get('action'),
+                "target": str(label)[:80],
+                "runs": len(rows),
+                "errors": len(failed),
+                "error_rate": round(len(failed) / len(rows), 4) if rows else 0,
+                "ms": latency([row['ms'] for row in rows if row['ok']]),
+                "first_error": failed[0]['error'] if failed else None
+            })
+        failed_flows = sum(1 for flow in flows if not flow["ok"]) + len(setup_errors)
+        total_flows = len(flows) + len(setup_errors)
+        error_rate = failed_flows / total_flows
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = self.claude_dir / f"load_test_{timestamp}.json"
+        report = {
+            "users": users,
+            "concurrency": concurrency,
+            "iterations": iterations,
+            "duration_s": round(duration, 2),
+            "flows": {"runs": total_flows, "failed": failed_flows, "error_rate": round(error_rate, 4),
+                      "per_second": round(len(flows) / duration, 2),
+                      "ms": latency([flow["ms"] for flow in flows if flow["ok"]]),
+                      "setup_ms": latency([flow["setup_ms"] for flow in flows if flow["setup_ms"] is not None])},
+            "steps": step_rows,
+            "setup_errors": setup_errors,
+            "passed": error_rate <= max_error_rate
+        }
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print("")
+        print(f"{'step':>4}  {'action':<10} {'runs':>5} {'err %':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}  target")
+        for row in step_rows:
+            ms = row["ms"]
+            print(f"{row['step']:>4}  {row['action'] or '?':<10} {row['runs']:>5} {row['error_rate'] * 100:>5.1f}% "
+                  f"{ms.get('p50', 0):>8.1f} {ms.get('p90', 0):>8.1f} {ms.get('p99', 0):>8.1f}  {row['target']}")
+        flow_ms = report["flows"]["ms"]
+        print(f"⏱️  {total_flows} flows in {duration:.1f}s ({report['flows']['per_second']}/s), "
+              f"p50 {flow_ms.get('p50', 0):.0f}ms, p90 {flow_ms.get('p90', 0):.0f}ms")
+        for row in step_rows:
+            if row["first_error"]:
+                print(f"⚠️  Step {row['step']}: {row['errors']} errors, first: {row['first_error']}")
+        for error in setup_errors[:3]:
+            print(f"⚠️  {error}")
+        print(f"{'✅' if report['passed'] else '❌'} Error rate {error_rate * 100:.1f}% "
+              f"(limit {max_error_rate * 100:.1f}%)")
+        print(f"📄 Report: {report_path}")
+        return report
+
+    # ===== BENCHMARKS =====
+
+    async def benchmark_type(self, lengths=(16, 128, 1024, 2048), modes=("insert", "keys")):
+        """Measure browser_type throughput for each mode across text lengths
+
+        Text is typed into whatever element has focus, so focus a scratch
+        input (or nothing) before running.
+        """
+        results = []
+        for mode in modes:
+            for length in lengths:
+                text = ("apex" * (length // 4 + 1))[:length]
+                start = time.perf_counter()
+                ok = await self.browser_type(text, mode=mode)
+                elapsed = time.perf_counter() - start
+                results.append({
+                    "mode": mode,
+                    "length": length,
+                    "seconds": round(elapsed, 4),
+                    "chars_per_second": round(length / elapsed) if ok and elapsed else None
+                })
+
+        print("")
+        print(f"{'mode':<8} {'length':>8} {'seconds':>10} {'chars/s':>10}")
+        for row in results:
+            print(f"{row['mode']:<8} {row['length']:>8} {row['seconds']:>10} {row['chars_per_second'] or '-':>10}")
+        return results
+
+    async def benchmark_load(self, url, runs=10, wait_until="load", timeout=30, baseline=None, tolerance=0.1,
+                             update_baseline=False, tab_id=None):
+        """Load url runs times, alternating cold and warm cache, and report timing percentiles
+
+        Cold runs clear the browser cache and disable it; warm runs re-enable
+        it so the previous load primes it. Each run loads the page with
+        browser_navigate, then reads Navigation Timing, paint timings and
+        LCP with PAGE_TIMINGS_SCRIPT and the change in Performance.getMetrics
+        over the load. Writes .claude/bench_load_<timestamp>.json and
+        returns the report, or None if the tab could not be prepared.
+
+        With a baseline path, the report is checked against it (see
+        check_load_baseline) and "passed" is set; a missing baseline, or
+        update_baseline, stores this run as the new baseline instead.
+        """
+        print(f"🏁 Benchmarking {runs} loads of {url} (alternating cold/warm)...")
+
+        try:
+            tab_id = await self.resolve_tab(tab_id)
+            if not tab_id:
+                print("❌ Failed to get browser tab")
+                return None
+            session = await self.get_session(tab_id)
+            await session.enable("Network")
+            await session.enable("Performance")
+        except Exception as e:
+            print(f"❌ Load benchmark failed: {e}")
+            return None
+
+        results = []
+        try:
+            for run in range(runs):
+                mode = "cold" if run % 2 == 0 else "warm"
+                if mode == "cold":
+                    await self.send_cdp_commands(tab_id, [
+                        ("Network.clearBrowserCache", {}),
+                        ("Network.setCacheDisabled", {"cacheDisabled": True}),
+                    ])
+                else:
+                    await self.send_cdp_command(tab_id, "Network.setCacheDisabled", {"cacheDisabled": False})
+
+                before = await self.performance_metrics(tab_id)
+                start = time.perf_counter()
+                if not await self.browser_navigate(url, wait_until, timeout, tab_id):
+                    results.append({"run": run + 1, "mode": mode, "error": "navigation failed"})
+                    continue
+                wall_ms = (time.perf_counter() - start) * 1000
+                after = await self.performance_metrics(tab_id)
+
+                timings = await self.evaluate(tab_id, PAGE_TIMINGS_SCRIPT, await_promise=True, timeout=timeout) or {}
+                row = {"run": run + 1, "mode": mode, "wall_ms": round(wall_ms, 1)}
+                row.update({name: round(value, 1) for name, value in timings.items() if value is not None})
+                for metric, name in LOAD_METRICS.items():
+                    if metric in after:
+                        row[name] = round((after[metric] - before.get(metric, 0)) * 1000, 1)
+                results.append(row)
+        except Exception as e:
+            print(f"❌ Load benchmark failed: {e}")
+            return None
+        finally:
+            try:
+                await self.send_cdp_command(tab_id, "Network.setCacheDisabled", {"cacheDisabled": False})
+            except Exception:
+                pass
+
+        summary = {}
+        for mode in ("cold", "warm"):
+            rows = [row for row in results if row["mode"] == mode and "error" not in row]
+            names = sorted({name for row in rows for name in row} - {"run", "mode"})
+            summary[mode] = {
+                name: {
+                    "p50": round(percentile(values, 0.5), 1),
+                    "p90": round(percentile(values, 0.9), 1),
+                    "p99": round(percentile(values, 0.99), 1),
+                    "n": len(values),
+                }
+                for name in names
+                for values in [[row[name] for row in rows if name in row]]
+            }
+
+        report = {
+            "url": url,
+            "runs": runs,
+            "wait_until": wait_until,
+            "failed": sum(1 for row in results if "error" in row),
+            "summary": summary,
+            "results": results,
+        }
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = self.claude_dir / f"bench_load_{timestamp}.json"
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print("")
+        print(f"{'mode':<6} {'metric':<20} {'p50':>9} {'p90':>9} {'p99':>9} {'n':>4}")
+        for mode, metrics in summary.items():
+            for name, stats in metrics.items():
+                print(f"{mode:<6} {name:<20} {stats['p50']:>9} {stats['p90']:>9} {stats['p99']:>9} {stats['n']:>4}")
+        print(f"📄 Report: {report_path}")
+
+        report["passed"] = report["failed"] == 0
+        if baseline:
+            baseline = Path(baseline)
+            if update_baseline or not baseline.exists():
+                with open(baseline, 'w') as f:
+                    json.dump({"url": url, "runs": runs, "wait_until": wait_until, "summary": summary}, f, indent=2)
+                print(f"📌 Baseline saved: {baseline}")
+            else:
+                report["regressions"] = self.check_load_baseline(summary, baseline, tolerance)
+                report["passed"] = report["passed"] and not report["regressions"]
+        return report
+
+    def check_load_baseline(self, summary, baseline_path, tolerance=0.1):
+        """Compare p50/p90 of LOAD_GATED_METRICS against a stored baseline, returns the regressions"""
+        with open(baseline_path) as f:
+            baseline = json.load(f).get("summary", {})
+
+        regressions = []
+        for mode, metrics in baseline.items():
+            for name in LOAD_GATED_METRICS:
+                for stat in ("p50", "p90"):
+                    expected = metrics.get(name, {}).get(stat)
+                    actual = summary.get(mode, {}).get(name, {}).get(stat)
+                    if expected is None or actual is None:
+                        continue
+                    if actual > expected * (1 + tolerance) and actual - expected > LOAD_SLACK_MS:
+                        regressions.append({"mode": mode, "metric": name, "stat": stat,
+                                            "baseline": expected, "value": actual})
+
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {baseline_path} (tolerance {tolerance * 100:.0f}%):")
+            for regression in regressions:
+                print(f"     {regression['mode']} {regression['metric']} {regression['stat']}: "
+                      f"{regression['baseline']} → {regression['value']}ms")
+        else:
+            print(f"✅ Within {tolerance * 100:.0f}% of baseline {baseline_path}")
+        return regressions
+
+    async def performance_metrics(self, tab_id):
+        """Performance.getMetrics as a {name: value} dict"""
+        result = await self.send_cdp_command(tab_id, "Performance.getMetrics")
+        return {metric['name']: metric['value'] for metric in result.get('metrics', [])}
+
+
+class ApexProjectManager:
+    def __init__(self):
+        self.project_root = Path(__file__).parent.parent
+        self.claude_dir = self.project_root / ".claude"
+        self.scripts_dir = self.project_root / "scripts"
+        self.claude_dir.mkdir(exist_ok=True)
+        self.browser = AsyncApexProjectManager(self.project_root)
+        self.discovery = self.browser.discovery
+        self._loop = None
+        self._directory_index = None
+        self.tree_watcher = None
+        
+    # ===== CHROME DEV PROFILE CONNECTION =====
+    
+    def check_port(self, port):
+        """Check if a port is accessible"""
+        return self.discovery.probe(port)
+            
+    def browser_status(self):
+        """Check if Chrome dev profile is running on any candidate debugging port"""
+        return self._run(self.browser.browser_status())
+            
+    def ensure_browser(self):
+        """Ensure Chrome dev profile is running"""
+        is_running, cdp_info = self.browser_status()
+        
+        if is_running:
+            print(f"✅ Connected to Chrome dev profile on port {cdp_info['cdp_port']}")
+            return cdp_info
+        else:
+            ports = ", ".join(str(port) for port in self.discovery.ports)
+            print(f"❌ Chrome dev profile not found on ports {ports}")
+            print("")
+            print("Please launch Chrome dev profile with:")
+            print("  ./scripts/launch-dev-chrome.sh")
+            print("")
+            print("Or manually:")
+            print('  "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome" \\')
+            print('    --remote-debugging-port=9222 \\')
+            print("    --remote-allow-origins='*' \\")
+            print('    --user-data-dir="$HOME/chrome-dev-profile"')
+            return None
+            
+    # ===== SESSION HOOKS =====
+    
+    def session_startup(self, watch_tree=False):
+        """Called when Claude session starts"""
+        print("🚀 Apex Claude Session Starting...")
+        
+        # Check if Chrome dev profile is running
+        is_running, cdp_info = self.browser_status()
+        
+        if is_running:
+            print(f"✅ Chrome dev profile available on port {cdp_info['cdp_port']}")
+            print("📸 Use: python3 scripts/project-manager.py --screenshot")
+            print("🌐 Use: python3 scripts/project-manager.py --navigate <url>")
+        else:
+            print("⚠️  Chrome dev profile not detected")
+            print("Launch with: ./scripts/launch-dev-chrome.sh")
+            
+        # Keep discovery, tabs and CDP connections warm for later CLI calls
+        self.start_daemon(watch_tree=watch_tree)
+            
+        print("✅ Session initialized")
+        
+    def session_shutdown(self):
+        """Called when Claude session stops"""
+        print("👋 Claude session ending...")
+        
+        # Update project directory, from the daemon's warm index when one runs
+        reply = send_to_daemon({"argv": ["--update-directory"], "cwd": str(self.project_root)})
+        if reply is not None:
+            sys.stdout.write(reply.get("output", ""))
+        else:
+            self.update_project_directory()
+        
+        # Stop the resident daemon
+        self.stop_daemon()
+        
+        print("✅ Session cleanup complete")
+        
+    @property
+    def directory_index(self):
+        """DirectoryIndex for the project root, loaded from .claude on first use"""
+        if self._directory_index is None:
+            self._directory_index = DirectoryIndex(self.project_root, self.claude_dir / "directory-index.json")
+        return self._directory_index
+
+    def update_project_directory(self, max_depth=None, max_entries=20000):
+        """Update PROJECT_DIRECTORY.md with current tree
+
+        Directory listings come from the mtime index, so only directories
+        that changed since the last run are rescanned. The file is only
+        replaced when the rendered tree differs from the one it holds.
+        """
+        print("📁 Updating project directory...")
+        
+        try:
+            directory_file = self.project_root / "CORE_INITIATE" / "PROJECT_DIRECTORY.md"
+            temporary = directory_file.with_suffix(".md.tmp")
+            index = self.directory_index
+            index.begin()
+            
+            # Stream tree lines into a temporary file, hashing them on the way
+            digest = hashlib.sha1()
+            with open(temporary, 'w') as f:
+                f.write(f"# Project Directory Structure\n")
+                f.write(f"*Auto-updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
+                f.write("```\n")
+                for line in self.iter_directory_tree(max_depth=max_depth, max_entries=max_entries, index=index):
+                    digest.update(line.encode())
+                    f.write(line)
+                f.write("```\n")
+            index.save()
+            if self.tree_watcher is not None:
+                self.tree_watcher.sync_watches(index.visited)
+            
+            stats = f"{index.scanned}/{len(index.visited)} directories rescanned"
+            if digest.digest() == self._tree_digest(directory_file):
+                temporary.unlink()
+                print(f"✅ Project directory unchanged ({stats})")
+            else:
+                os.replace(temporary, directory_file)
+                print(f"✅ Project directory updated ({stats})")
+        except Exception as e:
+            print(f"❌ Error updating directory: {e}")
+
+    def _tree_digest(self, directory_file):
+        # Hash of the tree between the ``` fences, ignoring the timestamp line
+        digest = hashlib.sha1()
+        try:
+            with open(directory_file) as f:
+                inside = False
+                for line in f:
+                    if line == "```\n":
+                        if inside:
+                            return digest.digest()
+                        inside = True
+                    elif inside:
+                        digest.update(line.encode())
+        except OSError:
+            pass
+        return None
+            
+    def generate_directory_tree(self, path=None, max_depth=None, max_entries=None):
+        """Generate a tree-like directory structure"""
+        return "".join(self.iter_directory_tree(path, max_depth, max_entries))
+
+    def iter_directory_tree(self, path=None, max_depth=None, max_entries=None, index=None):
+        """Yield the lines of a tree-like directory structure
+
+        Walks with os.scandir and an explicit stack, holding one sorted
+        directory listing per open level, so time and memory grow linearly
+        with the tree. Entries matched by .gitignore files (root and nested)
+        or TREE_SKIP_DIRS are left out. max_depth limits how many directory
+        levels are expanded; max_entries stops the listing after that many
+        lines with a truncation marker. With a DirectoryIndex for the same
+        root, unchanged directories are listed from the index.
+        """
+        root = Path(path or self.project_root)
+        listing = index.listing if index is not None else lambda relative_dir: scan_directory(root / relative_dir)
+        ignore = GitIgnore(root)
+        yield f"{root.name}/\n"
+        
+        emitted = 0
+        stack = [(self._tree_entries(root, "", ignore, listing), "", 1)]
+        while stack:
+            entries, prefix, depth = stack[-1]
+            item = next(entries, None)
+            if item is None:
+                stack.pop()
+                continue
+            
+            name, relative_path, is_dir, is_link, is_last = item
+            if max_entries is not None and emitted >= max_entries:
+                yield f"{prefix}└── … (truncated after {max_entries} entries)\n"
+                return
+            emitted += 1
+            
+            # Create the tree structure
+            yield f"{prefix}{'└── ' if is_last else '├── '}{name}{'/' if is_dir else ''}\n"
+            
+            # Descend into real (non-symlinked) subdirectories
+            if is_dir and not is_link and (max_depth is None or depth < max_depth):
+                extension = "    " if is_last else "│   "
+                stack.append((self._tree_entries(root, relative_path, ignore, listing),
+                              prefix + extension, depth + 1))
+
+    def _tree_entries(self, root, relative_dir, ignore, listing):
+        # listing() returns the directory already sorted, from one scandir
+        # or from the index, so no extra stat calls are needed to filter
+        listed = listing(relative_dir)
+        if listed is None:
+            return
+        
+        if relative_dir and (".gitignore", False, False) in listed:
+            ignore.load(root / relative_dir / ".gitignore", relative_dir)
+        
+        entries = []
+        for name, is_dir, is_link in listed:
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            if name in (TREE_SKIP_DIRS if is_dir else TREE_SKIP_FILES) or ignore.ignored(relative_path, is_dir):
+                continue
+            entries.append((name, relative_path, is_dir, is_link))
+        for i, (name, relative_path, is_dir, is_link) in enumerate(entries):
+            yield name, relative_path, is_dir, is_link, i == len(entries) - 1
+            
+    # ===== DAEMON =====
+
+    def daemon_running(self):
+        """Check whether a --serve daemon answers on DAEMON_SOCKET"""
+        reply = send_to_daemon({"command": "ping"}, timeout=1)
+        return bool(reply and reply.get("ok"))
+
+    def start_daemon(self, timeout=5, watch_tree=False):
+        """Start the --serve daemon in the background unless one is running"""
+        if self.daemon_running():
+            print("✅ Project manager daemon already running")
+            return True
+
+        log_file = open(self.claude_dir / "project-manager-daemon.log", "a")
+        subprocess.Popen(
+            [sys.executable, str(ENTRY_SCRIPT), "--serve"] + (["--watch-tree"] if watch_tree else []),
+            cwd=str(self.project_root),
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        log_file.close()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.daemon_running():
+                print(f"✅ Project manager daemon listening on {DAEMON_SOCKET}")
+                return True
+            time.sleep(0.05)
+
+        print("⚠️  Project manager daemon did not start, CLI calls will run in-process")
+        return False
+
+    def stop_daemon(self):
+        """Ask a running --serve daemon to exit"""
+        reply = send_to_daemon({"command": "shutdown"}, timeout=5)
+        if reply and reply.get("ok"):
+            print("✅ Project manager daemon stopped")
+            return True
+        return False
+
+    def serve(self, watch_tree=False):
+        """Run the daemon: answer CLI requests on DAEMON_SOCKET until shutdown
+
+        With watch_tree, the directory index is kept current with inotify,
+        so --update-directory (and the shutdown hook) rescans nothing but
+        the directories that changed during the session.
+        """
+        if self.daemon_running():
+            print(f"⚠️  A daemon is already listening on {DAEMON_SOCKET}")
+            return False
+        if DAEMON_SOCKET.exists():
+            DAEMON_SOCKET.unlink()
+
+        server = DaemonServer(str(DAEMON_SOCKET), DaemonRequestHandler, manager=self)
+        self.browser.live_targets = True
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        print(f"🛰️  Project manager daemon listening on {DAEMON_SOCKET} (pid {os.getpid()})")
+        if watch_tree:
+            self.watch_directory_tree()
+
+        try:
+            server.serve_forever()
+        finally:
+            if self.tree_watcher is not None:
+                self.tree_watcher.stop()
+                self.tree_watcher = None
+            server.server_close()
+            if DAEMON_SOCKET.exists():
+                DAEMON_SOCKET.unlink()
+            self.close_sessions()
+            print("👋 Project manager daemon stopped")
+        return True
+
+    def watch_directory_tree(self):
+        """Keep the directory index current with inotify for the life of this process"""
+        if not DirectoryWatcher.available():
+            print("⚠️  Directory watching needs Linux inotify, falling back to mtime checks")
+            return False
+        try:
+            self.tree_watcher = DirectoryWatcher(self.directory_index)
+        except OSError as e:
+            print(f"⚠️  Could not start directory watcher: {e}")
+            return False
+
+        # Watch before the first walk, so nothing changes unseen in between
+        self.tree_watcher.watch("")
+        self.tree_watcher.start()
+        self.update_project_directory()
+        self.directory_index.trusted = True
+        print(f"👀 Watching {len(self.tree_watcher.watches)} directories for changes")
+        return True
+
+    # ===== BROWSER CLIENT OPERATIONS =====
+    # Thin blocking wrappers over AsyncApexProjectManager. The coroutines run
+    # on a private event loop thread, so sessions stay open (and keep reading
+    # events) between calls, and any thread may call the wrappers.
+
+    def _run(self, coroutine):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="cdp-loop", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def get_tabs(self):
+        """Get list of browser tabs"""
+        return self._run(self.browser.get_tabs())
+    
+    def create_tab(self, url="http://localhost:5173"):
+        """Create a new browser tab"""
+        return self._run(self.browser.create_tab(url))
+    
+    def pin_tab(self, tab_id=None):
+        return self._run(self.browser.pin_tab(tab_id))
+
+    def unpin_tab(self):
+        return self.browser.unpin_tab()
+
+    def get_or_create_tab(self, url="http://localhost:5173"):
+        """Get existing tab or create new one"""
+        return self._run(self.browser.get_or_create_tab(url))
+
+    def close_sessions(self):
+        """Close every open CDP session"""
+        if self._loop is not None:
+            self._run(self.browser.close_sessions())
+    
+    def send_cdp_command(self, tab_id, method, params=None, timeout=None):
+        """Send CDP command to specific tab"""
+        return self._run(self.browser.send_cdp_command(tab_id, method, params, timeout))
+
+    def send_cdp_commands(self, tab_id, commands):
+        """Pipeline (method, params) commands to a tab and return their results in order"""
+        return self._run(self.browser.send_cdp_commands(tab_id, commands))
+    
+    def browser_screenshot(self, filename=None, tab_id=None, thumbnail=False):
+        """Take a screenshot using CDP and keep it in the screenshot store"""
+        return self._run(self.browser.browser_screenshot(filename, tab_id, thumbnail))
+        
+    def browser_navigate(self, url, wait_until="load", timeout=30, tab_id=None):
+        """Navigate browser to URL and wait until the page reaches wait_until"""
+        return self._run(self.browser.browser_navigate(url, wait_until, timeout, tab_id))
+
+    def navigate_and_wait(self, tab_id, method, params, wait_until="load", timeout=30):
+        """Run a navigation command and block until the page reaches wait_until"""
+        return self._run(self.browser.navigate_and_wait(tab_id, method, params, wait_until, timeout))
+    
+    def browser_verify(self):
+        """Verify Chrome dev profile connection"""
+        return self._run(self.browser.browser_verify())
+    
+    def browser_scroll(self, direction="down", pixels=None, timeout=5, tab_id=None):
+        """Scroll the browser page and wait for the scroll to settle"""
+        return self._run(self.browser.browser_scroll(direction, pixels, timeout, tab_id))
+    
+    def browser_click(self, x=None, y=None, tab_id=None, selector=None):
+        """Click at specific coordinates, or at the center of the element matching selector"""
+        return self._run(self.browser.browser_click(x, y, tab_id, selector))
+    
+    def browser_type(self, text, mode="insert", delay=None, tab_id=None, selector=None):
+        """Type text into the currently focused element, or into selector after focusing it"""
+        return self._run(self.browser.browser_type(text, mode, delay, tab_id, selector))
+    
+    def browser_focus(self, selector, tab_id=None):
+        """Focus the first focusable element matching a CSS selector"""
+        return self._run(self.browser.browser_focus(selector, tab_id))
+    
+    def browser_locate(self, selectors, tab_id=None):
+        """Print and return the center point of the first visible match of each selector"""
+        return self._run(self.browser.browser_locate(selectors, tab_id))
+    
+    def browser_key(self, key, tab_id=None):
+        """Press a specific key"""
+        return self._run(self.browser.browser_key(key, tab_id))
+    
+    def browser_reload(self, wait_until="load", timeout=30, tab_id=None):
+        """Reload the current page and wait until it reaches wait_until"""
+        return self._run(self.browser.browser_reload(wait_until, timeout, tab_id))
+    
+    def browser_evaluate(self, expression, tab_id=None):
+        """Evaluate JavaScript expression"""
+        return self._run(self.browser.browser_evaluate(expression, tab_id))
+
+    # ===== WAITS =====
+
+    def browser_wait_for(self, selector=None, text=None, predicate=None, network_idle=False,
+                         state="visible", timeout=10, tab_id=None):
+        """Wait until a selector, text, JS predicate or network idle condition holds"""
+        return self._run(self.browser.browser_wait_for(selector, text, predicate, network_idle, state, timeout, tab_id))
+
+    # ===== SCREENCAST =====
+
+    def record_screencast(self, duration, fps=None, max_width=None, max_height=None,
+                          quality=80, image_format="jpeg", buffer_frames=32, tab_id=None):
+        """Record a tab with Page.startScreencast for duration seconds"""
+        return self._run(self.browser.record_screencast(duration, fps, max_width, max_height,
+                                                        quality, image_format, buffer_frames, tab_id))
+
+    # ===== VISUAL REGRESSION =====
+
+    def compare_screenshot(self, baseline, candidate=None, threshold=0.001, tolerance=8, tile=32, tab_id=None):
+        """Compare a screenshot against a baseline image"""
+        return self._run(self.browser.compare_screenshot(baseline, candidate, threshold, tolerance, tile, tab_id))
+
+    # ===== SCREENSHOT STORE =====
+
+    def list_screenshots(self, limit=20):
+        """Print the newest captures in the screenshot store"""
+        store = self.browser.screenshots
+        index = store.load()
+        entries = index["entries"][-limit:] if limit else index["entries"]
+        print(f"{'created':<19}  {'hash':<12} {'KiB':>7} {'size':>10}  name")
+        for entry in reversed(entries):
+            blob = index["blobs"].get(entry["hash"], {})
+            size = f"{blob['width']}x{blob['height']}" if "width" in blob else "?"
+            print(f"{entry['created'][:19]:<19}  {entry['hash'][:12]:<12} {blob.get('size', 0) / 1024:>7.1f} "
+                  f"{size:>10}  {entry['name']}{' 📌' if blob.get('pinned') else ''}")
+        stats = store.stats()
+        print(f"📦 {stats['entries']} captures of {stats['blobs']} distinct images, "
+              f"{stats['bytes'] / 1024 / 1024:.1f} of {store.max_bytes / 1024 / 1024:.0f} MiB")
+        return entries
+
+    def prune_screenshots(self, max_mb=None, older_than_days=None, adopt=False):
+        """Evict old and least recently used images, first adopting loose .claude/screenshot_*.png files if asked"""
+        store = self.browser.screenshots
+        if adopt:
+            adopted = store.adopt(self.claude_dir)
+            if adopted:
+                print(f"📥 Moved {adopted} loose screenshots into the store")
+        max_bytes = int(max_mb * 1024 * 1024) if max_mb is not None else None
+        evicted, freed = store.prune(max_bytes, older_than_days)
+        stats = store.stats()
+        print(f"🧹 Removed {evicted} images ({freed / 1024 / 1024:.1f} MiB), "
+              f"{stats['blobs']} left ({stats['bytes'] / 1024 / 1024:.1f} MiB)")
+        return evicted, freed
+
+    def unpin_screenshot(self, ref):
+        """Let a pinned baseline be evicted again"""
+        try:
+            path = self.browser.screenshots.pin(ref, pinned=False)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        if path is None:
+            print(f"❌ No screenshot matches {ref}")
+            return None
+        print(f"✅ Unpinned {ref}: {path}")
+        return path
+
+    def fetch_screenshot(self, ref=None, output=None, thumbnail=False):
+        """Print the stored path of a capture (by name or hash prefix, newest by default), copying it to output"""
+        try:
+            found = self.browser.screenshots.resolve(ref)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        if found is None:
+            print(f"❌ No screenshot matches {ref}" if ref else "❌ The screenshot store is empty")
+            return None
+
+        entry, path = found
+        if thumbnail:
+            path = self.browser.screenshots.thumbnail_path(entry["hash"])
+            if not path.exists():
+                print(f"❌ No thumbnail for {entry['name']}, capture with --screenshot --thumbnail")
+                return None
+        if output:
+            shutil.copyfile(path, output)
+            path = Path(output)
+        print(f"✅ {entry['name']} ({entry['hash'][:12]}): {path}")
+        return str(path)
+
+    # ===== BATCH FLOWS =====
+
+    def capture_matrix(self, routes, viewports, base_url="http://localhost:5173", workers=4,
+                       wait_until="load", timeout=30):
+        return self._run(self.browser.capture_matrix(routes, viewports, base_url, workers, wait_until, timeout))
+
+    def record_trace(self, url, wait_until="load", timeout=30, settle=1.0, chunk_size=1 << 20, tab_id=None):
+        return self._run(self.browser.record_trace(url, wait_until, timeout, settle, chunk_size, tab_id))
+
+    def benchmark_load(self, url, runs=10, wait_until="load", timeout=30, baseline=None, tolerance=0.1,
+                       update_baseline=False, tab_id=None):
+        return self._run(self.browser.benchmark_load(url, runs, wait_until, timeout, baseline, tolerance,
+                                                     update_baseline, tab_id))
+
+    def record_network(self, duration, url=None, bodies=False, max_body_kib=64, wait_until="load",
+                       timeout=30, tab_id=None):
+        return self._run(self.browser.record_network(duration, url, bodies, max_body_kib, wait_until, timeout, tab_id))
+
+    def collect_coverage(self, url, steps=None, wait_until="load", timeout=30, tab_id=None):
+        return self._run(self.browser.collect_coverage(url, steps, wait_until, timeout, tab_id))
+
+    def profile_cpu(self, url=None, steps=None, interval_us=100, top=20, wait_until="load", timeout=30, tab_id=None):
+        return self._run(self.browser.profile_cpu(url, steps, interval_us, top, wait_until, timeout, tab_id))
+
+    def heap_snapshot(self, top=20, retained=True, timeout=120, tab_id=None):
+        return self._run(self.browser.heap_snapshot(top, retained, timeout, tab_id))
+
+    def leak_check(self, urls, cycles=5, steps=None, top=20, wait_until="load", timeout=30, tab_id=None):
+        return self._run(self.browser.leak_check(urls, cycles, steps, top, wait_until, timeout, tab_id))
+
+    def run_flow(self, steps, tab_id=None, quiet=False):
+        """Run flow steps in order on one tab, stopping at the first failure"""
+        return self._run(self.browser.run_flow(steps, tab_id, quiet))
+
+    def run_flow_file(self, path, tab_id=None):
+        """Load a flow file, run it and print per-step timings"""
+        return self._run(self.browser.run_flow_file(path, tab_id))
+
+    def load_test(self, steps, users=10, concurrency=5, iterations=1, base_url="http://localhost:5173",
+                  max_error_rate=0.0):
+        return self._run(self.browser.load_test(steps, users, concurrency, iterations, base_url, max_error_rate))
+
+    # ===== BENCHMARKS =====
+
+    def benchmark_directory_tree(self, sizes=(25000, 50000, 100000)):
+        """Time and measure peak memory of iter_directory_tree on synthetic trees
+
+        Each tree holds the given number of empty files, 100 per directory,
+        three levels deep. Output is streamed to os.devnull; time per entry
+        and peak memory should stay flat as the tree grows.
+        """
+        results = []
+        for size in sizes:
+            root = Path(tempfile.mkdtemp(prefix="apex-tree-bench-"))
+            try:
+                print(f"🌲 Building synthetic tree with {size} files...")
+                for start in range(0, size, 100):
+                    directory = root / f"d{start // 10000}" / f"s{start // 1000}" / f"t{start // 100}"
+                    directory.mkdir(parents=True)
+                    for i in range(start, min(start + 100, size)):
+                        (directory / f"f{i}.txt").touch()
+
+                start = time.perf_counter()
+                with open(os.devnull, 'w') as sink:
+                    lines = 0
+                    for line in self.iter_directory_tree(root):
+                        sink.write(line)
+                        lines += 1
+                elapsed = time.perf_counter() - start
+
+                tracemalloc.start()
+                for line in self.iter_directory_tree(root):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                results.append({
+                    "files": size,
+                    "lines": lines,
+                    "seconds": round(elapsed, 3),
+                    "us_per_line": round(elapsed / lines * 1e6, 2),
+                    "peak_kib": round(peak / 1024)
+                })
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+        print("")
+        print(f"{'files':>8} {'lines':>8} {'seconds':>9} {'us/line':>9} {'peak KiB':>9}")
+        for row in results:
+            print(f"{row['files']:>8} {row['lines']:>8} {row['seconds']:>9} {row['us_per_line']:>9} {row['peak_kib']:>9}")
+        return results
+
+    def benchmark_type(self, lengths=(16, 128, 1024, 2048), modes=("insert", "keys")):
+        """Measure browser_type throughput for each mode across text lengths"""
+        return self._run(self.browser.benchmark_type(lengths, modes))
+
+    def benchmark_client(self, runs=10, latency_ms=0, cli=True, baseline=None, tolerance=0.1, update_baseline=False):
+        """Measure client overhead per operation against scripts/mock-cdp-server.py
+
+        Needs no browser: the mock is started on a free port and every
+        CLIENT_BENCH_OPERATIONS call is timed in process on a fresh
+        AsyncApexProjectManager (the first, cold call separately), then every
+        CLIENT_BENCH_COMMANDS entry point is timed as a subprocess of a copy
+        of this script, once with --no-daemon and once through a --serve
+        daemon. HTTP requests, WebSocket handshakes and CDP commands per call
+        come from the mock's counters. Writes .claude/bench_client_<timestamp>.json
+        and returns the report, or None if the mock could not be started.
+
+        With a baseline path, p50 wall times are gated like --bench-load and
+        the protocol counts in CLIENT_BENCH_COUNTS must not grow.
+        """
+        mock_script = self.scripts_dir / "mock-cdp-server.py"
+        with socket.socket() as probe:
+            probe.bind(("localhost", 0))
+            port = probe.getsockname()[1]
+        mock = subprocess.Popen([sys.executable, str(mock_script), "--port", str(port),
+                                 "--latency-ms", str(latency_ms)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        mock_url = f"http://localhost:{port}"
+        root = Path(tempfile.mkdtemp(prefix="apex-client-bench-"))
+
+        def counters():
+            stats = requests.get(f"{mock_url}/mock/stats", timeout=5).json()
+            return (sum(stats["http"].values()), sum(stats["handshakes"].values()),
+                    sum(stats["commands"].values()))
+
+        def summarize(cold, cold_counts, walls, counts, failed):
+            return {
+                "cold_ms": round(cold, 2),
+                "p50": round(percentile(walls, 0.5), 2),
+                "p90": round(percentile(walls, 0.9), 2),
+                "http": round(counts[0] / runs, 2),
+                "handshakes": round(counts[1] / runs, 2),
+                "commands": round(counts[2] / runs, 2),
+                "cold_http": cold_counts[0],
+                "cold_handshakes": cold_counts[1],
+                "failed": failed,
+            }
+
+        def timed_calls(call):
+            """One cold call, then runs warm ones: returns the summary"""
+            failed = 0
+            before = counters()
+            start = time.perf_counter()
+            failed += not call()
+            cold = (time.perf_counter() - start) * 1000
+            after = counters()
+            cold_counts = [b - a for a, b in zip(before, after)]
+
+            walls = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                failed += not call()
+                walls.append((time.perf_counter() - start) * 1000)
+            counts = [b - a for a, b in zip(after, counters())]
+            return summarize(cold, cold_counts, walls, counts, failed)
+
+        summary = {"api": {}, "cli": {}, "daemon": {}}
+        daemon = None
+        try:
+            deadline = time.time() + 10
+            while True:
+                try:
+                    requests.get(f"{mock_url}/json/version", timeout=1)
+                    break
+                except requests.RequestException:
+                    if mock.poll() is not None or time.time() > deadline:
+                        print(f"❌ Mock CDP server did not start ({mock_script})")
+                        return None
+                    time.sleep(0.05)
+            print(f"🧪 Mock CDP server on port {port} ({latency_ms}ms latency), {runs} runs per operation")
+
+            for name, method, call_args, call_kwargs in CLIENT_BENCH_OPERATIONS:
+                client = AsyncApexProjectManager(root)
+                client.discovery = BrowserDiscovery(ports=[port])
+
+                async def quietly(coroutine):
+                    # Only this task's context copy goes quiet, the bench keeps printing
+                    QUIET_OUTPUT.set(True)
+                    return await coroutine
+
+                def call():
+                    result = self._run(quietly(getattr(client, method)(*call_args, **call_kwargs)))
+                    return bool(result[0] if isinstance(result, tuple) else result)
+
+                summary["api"][name] = timed_calls(call)
+                self._run(client.close_sessions())
+
+            if cli:
+                (root / "scripts").mkdir(exist_ok=True)
+                for name in (ENTRY_SCRIPT.name, Path(__file__).name, "daemon_client.py"):
+                    shutil.copy(self.scripts_dir / name, root / "scripts" / name)
+                script = root / "scripts" / ENTRY_SCRIPT.name
+                env = dict(os.environ, APEX_CDP_PORTS=str(port))
+
+                def command(argv):
+                    return lambda: subprocess.run([sys.executable, str(script), *argv], cwd=root, env=env,
+                                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                                  timeout=60).returncode == 0
+
+                for name, argv in CLIENT_BENCH_COMMANDS:
+                    summary["cli"][name] = timed_calls(command(["--no-daemon", *argv]))
+
+                daemon = subprocess.Popen([sys.executable, str(script), "--serve"], cwd=root, env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                daemon_socket = root / ".claude" / "project-manager.sock"
+                deadline = time.time() + 10
+                while not daemon_socket.exists() and daemon.poll() is None and time.time() < deadline:
+                    time.sleep(0.05)
+                if daemon_socket.exists():
+                    for name, argv in CLIENT_BENCH_COMMANDS:
+                        summary["daemon"][name] = timed_calls(command(argv))
+                else:
+                    print("⚠️  Daemon did not start, skipping daemon timings")
+        except Exception as e:
+            print(f"❌ Client benchmark failed: {e}")
+            return None
+        finally:
+            for process in (daemon, mock):
+                if process is not None and process.poll() is None:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+            shutil.rmtree(root, ignore_errors=True)
+
+        report = {
+            "runs": runs,
+            "latency_ms": latency_ms,
+            "failed": sum(row["failed"] for rows in summary.values() for row in rows.values()),
+            "summary": summary,
+        }
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = self.claude_dir / f"bench_client_{timestamp}.json"
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print("")
+        print(f"{'mode':<7} {'operation':<15} {'cold ms':>9} {'p50':>9} {'p90':>9} {'http':>6} {'ws':>5} {'cdp':>6} {'fail':>5}")
+        for mode, rows in summary.items():
+            for name, row in rows.items():
+                print(f"{mode:<7} {name:<15} {row['cold_ms']:>9} {row['p50']:>9} {row['p90']:>9} "
+                      f"{row['http']:>6} {row['handshakes']:>5} {row['commands']:>6} {row['failed']:>5}")
+        print("(http, ws and cdp are per warm call; cold calls start from a new client or process)")
+        print(f"📄 Report: {report_path}")
+
+        report["passed"] = report["failed"] == 0
+        if baseline:
+            baseline = Path(baseline)
+            if update_baseline or not baseline.exists():
+                with open(baseline, 'w') as f:
+                    json.dump({"runs": runs, "latency_ms": latency_ms, "summary": summary}, f, indent=2)
+                print(f"📌 Baseline saved: {baseline}")
+            else:
+                report["regressions"] = self.check_client_baseline(summary, baseline, tolerance)
+                report["passed"] = report["passed"] and not report["regressions"]
+        return report
+
+    def check_client_baseline(self, summary, baseline_path, tolerance=0.1):
+        """Compare p50 wall times and CLIENT_BENCH_COUNTS against a stored baseline, returns the regressions"""
+        with open(baseline_path) as f:
+            baseline = json.load(f).get("summary", {})
+
+        regressions = []
+        for mode, rows in baseline.items():
+            for name, expected_row in rows.items():
+                actual_row = summary.get(mode, {}).get(name)
+                if not actual_row:
+                    continue
+                expected, actual = expected_row.get("p50"), actual_row["p50"]
+                if expected is not None and actual > expected * (1 + tolerance) and actual - expected > LOAD_SLACK_MS:
+                    regressions.append({"mode": mode, "operation": name, "stat": "p50",
+                                        "baseline": expected, "value": actual})
+                for count in CLIENT_BENCH_COUNTS:
+                    expected = expected_row.get(count)
+                    if expected is not None and actual_row[count] > expected + 0.01:
+                        regressions.append({"mode": mode, "operation": name, "stat": count,
+                                            "baseline": expected, "value": actual_row[count]})
+
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {baseline_path} (tolerance {tolerance * 100:.0f}%):")
+            for regression in regressions:
+                print(f"     {regression['mode']} {regression['operation']} {regression['stat']}: "
+                      f"{regression['baseline']} → {regression['value']}")
+        else:
+            print(f"✅ Within {tolerance * 100:.0f}% of baseline {baseline_path}")
+        return regressions
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server for forwarded CLI calls
+
+    Each connection gets its own thread, so pings and busy replies never
+    wait, but CLI calls run one at a time: run_cli changes the working
+    directory and redirects stdout/stderr for the whole process. A call
+    that arrives while another runs is refused as busy and the client runs
+    it in its own process instead.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, handler, manager):
+        self.manager = manager
+        self.cli_lock = threading.Lock()
+        self.running = None
+        super().__init__(path, handler)
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one newline-delimited JSON request per connection
+
+    {"argv": [...], "cwd": "..."} is answered {"accepted": true} at once, or
+    {"busy": "<argv of the running call>"}. Once accepted, the client
+    confirms with a "go" line (a client that gave up has hung up instead,
+    so nothing runs twice), and the call runs against the warm manager and
+    answers {"output": "...", "exit_code": 0}. {"command": "ping"} and
+    {"command": "shutdown"} answer {"ok": true}.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        if request.get("command") == "ping":
+            reply = {"ok": True, "pid": os.getpid()}
+        elif request.get("command") == "shutdown":
+            reply = {"ok": True}
+            threading.Thread(target=self.server.shutdown).start()
+        elif not self.server.cli_lock.acquire(blocking=False):
+            reply = {"busy": self.server.running or "another command"}
+        else:
+            try:
+                argv = request.get("argv", [])
+                self.server.running = " ".join(argv)
+                self.wfile.write(json.dumps({"accepted": True}).encode() + b"\n")
+                if self.rfile.readline().strip() != b"go":
+                    return
+                reply = self.run_cli(argv, request.get("cwd"))
+            finally:
+                self.server.running = None
+                self.server.cli_lock.release()
+
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+    def run_cli(self, argv, cwd):
+        output = io.StringIO()
+        exit_code = 0
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                args = build_parser().parse_args(argv)
+                exit_code = run_command(self.server.manager, args, argv) or 0
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                print(f"❌ Daemon command failed: {e}")
+                exit_code = 1
+        return {"output": output.getvalue(), "exit_code": exit_code}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Apex Dashboard Project Manager - Chrome Dev Profile Integration')
+    
+    # Session hooks
+    parser.add_argument('--startup', action='store_true', help='Session startup hook (also starts the daemon)')
+    parser.add_argument('--shutdown', action='store_true', help='Session shutdown hook (also stops the daemon)')
+    
+    # Daemon
+    parser.add_argument('--serve', action='store_true', help='Run the resident daemon that keeps Chrome connections warm')
+    parser.add_argument('--no-daemon', action='store_true', help='Run in this process even if a daemon is listening')
+    parser.add_argument('--timings', action='store_true', help='Print latency histograms of HTTP probes, connects, CDP commands and waits, and append them to .claude/timings.jsonl')
+    parser.add_argument('--watch-tree', action='store_true', help='With --serve/--startup: keep the directory index current with inotify')
+    
+    # Browser client - navigation and info
+    parser.add_argument('--screenshot', action='store_true', help='Take browser screenshot')
+    parser.add_argument('--thumbnail', action='store_true', help=f'Also keep a {THUMBNAIL_WIDTH}px wide thumbnail of --screenshot (needs Pillow); with --fetch-screenshot, fetch it')
+    parser.add_argument('--navigate', type=str, help='Navigate to URL')
+    parser.add_argument('--verify', action='store_true', help='Verify CDP browser connection')
+    parser.add_argument('--pin-tab', type=str, nargs='?', const='', metavar='TAB_ID', help='Use this tab (default: the current dashboard tab) whenever no tab is named')
+    parser.add_argument('--unpin-tab', action='store_true', help='Forget the pinned tab')
+    parser.add_argument('--reload', action='store_true', help='Reload current page')
+    
+    parser.add_argument('--wait-until', type=str, choices=list(WAIT_UNTIL_EVENTS), default='load', help='Page state to wait for after --navigate/--reload (default: load)')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for page load before failing (default: 30)')
+    
+    # Browser client - interaction
+    parser.add_argument('--scroll', type=str, choices=['up', 'down', 'left', 'right', 'top', 'bottom'], help='Scroll page in direction')
+    parser.add_argument('--scroll-pixels', type=int, help='Number of pixels to scroll (default: 500 for up/down, 300 for left/right)')
+    parser.add_argument('--click', type=str, help='Click at coordinates (format: "x,y") or on the element matching a CSS selector')
+    parser.add_argument('--type', type=str, help='Type text into focused element (or into --selector)')
+    parser.add_argument('--selector', type=str, help='CSS selector --type focuses before typing')
+    parser.add_argument('--focus', type=str, metavar='SELECTOR', help='Focus the element matching a CSS selector')
+    parser.add_argument('--locate', type=str, action='append', metavar='SELECTOR', help='Print the center point of the element matching a CSS selector (repeatable, resolved in one batch)')
+    parser.add_argument('--type-mode', type=str, choices=['insert', 'keys'], default='insert', help='insert: one Input.insertText call, keys: real key events per character (default: insert)')
+    parser.add_argument('--type-delay', type=int, help='Delay in ms between key events (keys mode only, default: none)')
+    parser.add_argument('--key', type=str, help='Press specific key (Enter, Escape, Space, Arrow keys, etc.)')
+    parser.add_argument('--evaluate', type=str, help='Evaluate JavaScript expression')
+    
+    # Waits
+    parser.add_argument('--wait-for', type=str, metavar='CONDITION', help='Wait for a CSS selector, "text:...", "js:<predicate>" or "networkidle"')
+    parser.add_argument('--wait-state', type=str, choices=list(WAIT_FOR_SELECTOR), default='visible', help='Selector state --wait-for waits for (default: visible)')
+    parser.add_argument('--wait-timeout', type=float, default=10, help='Seconds before --wait-for gives up (default: 10)')
+    
+    # Screencast
+    parser.add_argument('--screencast', type=float, metavar='SECONDS', help='Record the page as a stream of frames for SECONDS')
+    parser.add_argument('--fps', type=float, help='Maximum frames per second to keep (default: every frame Chrome sends)')
+    parser.add_argument('--max-size', type=str, metavar='WxH', help='Maximum frame size, e.g. 1280x720')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality 0-100 (default: 80)')
+    parser.add_argument('--frame-format', type=str, choices=['jpeg', 'png'], default='jpeg', help='Frame image format (default: jpeg)')
+    parser.add_argument('--buffer-frames', type=int, default=32, help='Frames held in memory before the oldest is dropped (default: 32)')
+    
+    # Visual regression
+    parser.add_argument('--compare', type=str, metavar='BASELINE', help='Diff a screenshot against a baseline image (a path, or a stored capture name or hash prefix, which is pinned), failing past --threshold')
+    parser.add_argument('--candidate', type=str, metavar='IMAGE', help='Image to compare instead of taking a new screenshot')
+    parser.add_argument('--threshold', type=float, default=0.001, help='Maximum fraction of changed pixels that still passes (default: 0.001)')
+    parser.add_argument('--pixel-tolerance', type=int, default=8, help='Per-channel difference ignored as noise (default: 8)')
+    parser.add_argument('--tile-size', type=int, default=32, help='Tile edge in pixels for change detection (default: 32)')
+    
+    # Screenshot store
+    parser.add_argument('--screenshots', type=int, nargs='?', const=20, metavar='N', help='List the N newest captures in the screenshot store (default: 20, 0 for all)')
+    parser.add_argument('--prune-screenshots', action='store_true', help='Evict stored images past --older-than / --max-mb (pinned baselines are kept)')
+    parser.add_argument('--adopt-screenshots', action='store_true', help='With --prune-screenshots: first move loose .claude/screenshot_*.png files into the store (the originals are deleted)')
+    parser.add_argument('--unpin-screenshot', type=str, metavar='REF', help='Let a --compare baseline (name or hash prefix) be evicted again')
+    parser.add_argument('--older-than', type=float, metavar='DAYS', help='With --prune-screenshots: drop captures older than DAYS')
+    parser.add_argument('--max-mb', type=float, help=f'With --prune-screenshots: shrink the store to this size (default: {SCREENSHOT_STORE_MAX_MB}, or APEX_SCREENSHOT_MAX_MB)')
+    parser.add_argument('--fetch-screenshot', type=str, nargs='?', const='', metavar='NAME', help='Print the stored path of a capture by name or hash prefix (default: newest)')
+    parser.add_argument('--output', type=str, metavar='PATH', help='With --fetch-screenshot: copy the image to PATH')
+    
+    # Capture matrix
+    parser.add_argument('--capture-matrix', type=str, metavar='ROUTES', help='Screenshot comma-separated routes (e.g. "/,/settings") at every --viewports size in parallel tabs')
+    parser.add_argument('--viewports', type=str, default='mobile,tablet,desktop', help=f'Comma-separated viewports: {", ".join(VIEWPORT_PRESETS)} or WxH[@scale] (default: mobile,tablet,desktop)')
+    parser.add_argument('--workers', type=int, default=4, help='Tabs capturing in parallel (default: 4)')
+    parser.add_argument('--base-url', type=str, default='http://localhost:5173', help='URL that relative routes are joined to (default: http://localhost:5173)')
+    
+    # Performance trace
+    parser.add_argument('--trace', type=str, metavar='URL', help='Record a performance trace of loading URL and summarize main thread work')
+    parser.add_argument('--trace-settle', type=float, default=1.0, help='Seconds to keep tracing after the page loads (default: 1)')
+    
+    # Network capture
+    parser.add_argument('--record-network', type=float, metavar='SECONDS', help='Record network traffic to a HAR file for SECONDS and summarize it')
+    parser.add_argument('--network-url', type=str, metavar='URL', help='Load URL at the start of --record-network')
+    parser.add_argument('--bodies', action='store_true', help='Include response bodies in the HAR (see --max-body-kib)')
+    parser.add_argument('--max-body-kib', type=int, default=64, help='Largest response body saved with --bodies, in KiB (default: 64)')
+    
+    # Coverage
+    parser.add_argument('--coverage', type=str, metavar='URL', help='Report used and unused JS/CSS per file while loading URL (and running --run FILE)')
+    
+    # CPU profile
+    parser.add_argument('--profile', type=str, nargs='?', const='', metavar='URL', help='CPU-profile loading URL and/or running --run FILE, and print the hottest functions')
+    parser.add_argument('--sampling-interval', type=int, default=100, help='Profiler sampling interval in microseconds (default: 100)')
+    parser.add_argument('--top', type=int, default=20, help='Rows listed by --profile, --heap-snapshot and --leak-check (default: 20)')
+    
+    # Heap snapshot
+    parser.add_argument('--heap-snapshot', action='store_true', help='Snapshot the JS heap to a file and summarize counts, self and retained sizes per class')
+    parser.add_argument('--self-only', action='store_true', help='Skip the retained size computation of --heap-snapshot (faster on large heaps)')
+    parser.add_argument('--leak-check', type=str, metavar='URLS', help='Load comma-separated URLs (and --run FILE) every cycle and report classes that keep growing')
+    parser.add_argument('--cycles', type=int, default=5, help='Cycles run by --leak-check (default: 5)')
+    
+    # Batch flows
+    parser.add_argument('--run', type=str, metavar='FILE', help='Run a JSONL/YAML flow of browser actions in one session, stopping at the first failure')
+    
+    # Load test
+    parser.add_argument('--load-test', type=str, metavar='FILE', help='Run a flow file as --users simulated users in isolated browser contexts and report latency percentiles')
+    parser.add_argument('--users', type=int, default=10, help='Simulated users for --load-test (default: 10)')
+    parser.add_argument('--concurrency', type=int, default=5, help='Users running at once (default: 5)')
+    parser.add_argument('--iterations', type=int, default=1, help='Flow runs per user (default: 1)')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='Fraction of failed flows --load-test tolerates before exiting 1 (default: 0)')
+    
+    # Benchmarks
+    parser.add_argument('--bench-tree', type=str, nargs='?', const='25000,50000,100000', help='Benchmark the directory tree walker on synthetic trees of comma-separated file counts')
+    parser.add_argument('--bench-load', type=str, metavar='URL', help='Benchmark page loads of URL, alternating cold and warm cache')
+    parser.add_argument('--runs', type=int, default=10, help='Loads for --bench-load, calls per operation for --bench-client (default: 10)')
+    parser.add_argument('--baseline', type=str, metavar='FILE', help='Fail --bench-load/--bench-client on regressions past this baseline (stored on first use)')
+    parser.add_argument('--regression-tolerance', type=float, default=0.1, help='Relative slowdown allowed against --baseline (default: 0.1)')
+    parser.add_argument('--update-baseline', action='store_true', help='Overwrite --baseline with this run')
+    parser.add_argument('--bench-type', type=str, nargs='?', const='16,128,1024,2048', help='Benchmark typing throughput for comma-separated text lengths')
+    parser.add_argument('--bench-client', action='store_true', help='Benchmark every browser operation and CLI entry point against scripts/mock-cdp-server.py (no browser needed)')
+    parser.add_argument('--mock-latency-ms', type=float, default=0, help='Latency the mock adds to every CDP reply for --bench-client (default: 0)')
+    parser.add_argument('--api-only', action='store_true', help='With --bench-client: skip the CLI and daemon subprocess timings')
+    
+    # Project management
+    parser.add_argument('--update-directory', action='store_true', help='Update PROJECT_DIRECTORY.md')
+    parser.add_argument('--tree-depth', type=int, help='Maximum directory depth shown in PROJECT_DIRECTORY.md (default: unlimited)')
+    parser.add_argument('--tree-max-entries', type=int, default=20000, help='Maximum entries listed in PROJECT_DIRECTORY.md (default: 20000)')
+    
+    return parser
+
+def main(argv=None):
+    """Run one CLI call in this process (scripts/project-manager.py tries the daemon first)"""
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    
+    manager = ApexProjectManager()
+    
+    try:
+        exit_code = run_command(manager, args, argv)
+    finally:
+        manager.close_sessions()
+    return exit_code or 0
+
+def run_command(manager, args, argv=None):
+    if not args.timings:
+        return execute_command(manager, args)
+
+    # Record spans for this command only, then report and export them
+    timings = Timings()
+    token = CURRENT_TIMINGS.set(timings)
+    try:
+        return execute_command(manager, args)
+    finally:
+        CURRENT_TIMINGS.reset(token)
+        timings.report()
+        timings_path = manager.claude_dir / "timings.jsonl"
+        timings.export(timings_path, " ".join(argv or []))
+        print(f"📄 Spans appended to {timings_path}")
+
+def execute_command(manager, args):
+    # Execute commands
+    if args.serve:
+        manager.serve(watch_tree=args.watch_tree)
+    elif args.startup:
+        manager.session_startup(watch_tree=args.watch_tree)
+    elif args.shutdown:
+        manager.session_shutdown()
+    elif args.screenshot:
+        return 0 if manager.browser_screenshot(thumbnail=args.thumbnail) else 1
+    elif args.screenshots is not None:
+        manager.list_screenshots(args.screenshots)
+    elif args.prune_screenshots:
+        manager.prune_screenshots(args.max_mb, args.older_than, args.adopt_screenshots)
+    elif args.unpin_screenshot:
+        return 0 if manager.unpin_screenshot(args.unpin_screenshot) else 1
+    elif args.fetch_screenshot is not None:
+        return 0 if manager.fetch_screenshot(args.fetch_screenshot or None, args.output, args.thumbnail) else 1
+    elif args.navigate:
+        return 0 if manager.browser_navigate(args.navigate, args.wait_until, args.timeout) else 1
+    elif args.verify:
+        manager.browser_verify()
+    elif args.pin_tab is not None:
+        return 0 if manager.pin_tab(args.pin_tab or None) else 1
+    elif args.unpin_tab:
+        manager.unpin_tab()
+    elif args.reload:
+        return 0 if manager.browser_reload(args.wait_until, args.timeout) else 1
+    elif args.scroll:
+        return 0 if manager.browser_scroll(args.scroll, args.scroll_pixels) else 1
+    elif args.click:
+        if re.fullmatch(r"\s*-?\d+\s*,\s*-?\d+\s*", args.click):
+            x, y = map(int, args.click.split(','))
+            return 0 if manager.browser_click(x, y) else 1
+        return 0 if manager.browser_click(selector=args.click) else 1
+    elif args.type:
+        delay = args.type_delay / 1000 if args.type_delay else None
+        manager.browser_type(args.type, mode=args.type_mode, delay=delay, selector=args.selector)
+    elif args.focus:
+        return 0 if manager.browser_focus(args.focus) else 1
+    elif args.locate:
+        points = manager.browser_locate(args.locate)
+        return 0 if points and all(points.values()) else 1
+    elif args.key:
+        manager.browser_key(args.key)
+    elif args.evaluate:
+        manager.browser_evaluate(args.evaluate)
+    elif args.wait_for:
+        condition = parse_wait_condition(args.wait_for)
+        elapsed = manager.browser_wait_for(**condition, state=args.wait_state, timeout=args.wait_timeout)
+        return 0 if elapsed is not None else 1
+    elif args.screencast:
+        max_width = max_height = None
+        if args.max_size:
+            try:
+                max_width, max_height = map(int, args.max_size.lower().split('x'))
+            except ValueError:
+                print("❌ Invalid max size. Use format: 'WxH' (e.g., '1280x720')")
+                return 1
+        summary = manager.record_screencast(args.screencast, args.fps, max_width, max_height,
+                                            args.quality, args.frame_format, args.buffer_frames)
+        return 0 if summary else 1
+    elif args.compare:
+        summary = manager.compare_screenshot(args.compare, args.candidate, args.threshold,
+                                             args.pixel_tolerance, args.tile_size)
+        return 0 if summary and summary['passed'] else 1
+    elif args.capture_matrix:
+        try:
+            viewports = [parse_viewport(spec) for spec in args.viewports.split(',')]
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        routes = [route.strip() for route in args.capture_matrix.split(',') if route.strip()]
+        manifest = manager.capture_matrix(routes, viewports, args.base_url, args.workers, args.wait_until, args.timeout)
+        return 0 if manifest and not manifest['failed'] else 1
+    elif args.trace:
+        return 0 if manager.record_trace(args.trace, args.wait_until, args.timeout, args.trace_settle) else 1
+    elif args.record_network:
+        summary = manager.record_network(args.record_network, args.network_url, args.bodies, args.max_body_kib,
+                                         args.wait_until, args.timeout)
+        return 0 if summary else 1
+    elif args.profile is not None:
+        if not args.profile and not args.run:
+            print("❌ --profile needs a URL, a --run FILE, or both")
+            return 1
+        steps = None
+        if args.run:
+            try:
+                steps = load_flow(args.run)
+            except Exception as e:
+                print(f"❌ Could not load flow: {e}")
+                return 1
+        result = manager.profile_cpu(args.profile or None, steps, args.sampling_interval, args.top,
+                                     args.wait_until, args.timeout)
+        return 0 if result else 1
+    elif args.heap_snapshot:
+        return 0 if manager.heap_snapshot(args.top, not args.self_only) is not None else 1
+    elif args.leak_check:
+        if args.cycles < 2:
+            print("❌ --cycles must be at least 2 to see growth")
+            return 1
+        steps = None
+        if args.run:
+            try:
+                steps = load_flow(args.run)
+            except Exception as e:
+                print(f"❌ Could not load flow: {e}")
+                return 1
+        urls = [url.strip() for url in args.leak_check.split(',') if url.strip()]
+        report = manager.leak_check(urls, args.cycles, steps, args.top, args.wait_until, args.timeout)
+        return 0 if report and not report['growing'] else 1
+    elif args.coverage:
+        steps = None
+        if args.run:
+            try:
+                steps = load_flow(args.run)
+            except Exception as e:
+                print(f"❌ Could not load flow: {e}")
+                return 1
+        return 0 if manager.collect_coverage(args.coverage, steps, args.wait_until, args.timeout) else 1
+    elif args.load_test:
+        try:
+            steps = load_flow(args.load_test)
+        except Exception as e:
+            print(f"❌ Could not load flow: {e}")
+            return 1
+        report = manager.load_test(steps, args.users, args.concurrency, args.iterations, args.base_url,
+                                   args.max_error_rate)
+        return 0 if report and report['passed'] else 1
+    elif args.run:
+        return 0 if manager.run_flow_file(args.run) else 1
+    elif args.bench_tree:
+        try:
+            sizes = [int(size) for size in args.bench_tree.split(',')]
+        except ValueError:
+            print("❌ Invalid sizes. Use format: '25000,50000,100000'")
+            return 1
+        manager.benchmark_directory_tree(sizes)
+    elif args.bench_load:
+        report = manager.benchmark_load(args.bench_load, args.runs, args.wait_until, args.timeout, args.baseline,
+                                        args.regression_tolerance, args.update_baseline)
+        return 0 if report and report['passed'] else 1
+    elif args.bench_type:
+        try:
+            lengths = [int(length) for length in args.bench_type.split(',')]
+        except ValueError:
+            print("❌ Invalid lengths. Use format: '16,128,1024'")
+            return 1
+        manager.benchmark_type(lengths)
+    elif args.bench_client:
+        report = manager.benchmark_client(args.runs, args.mock_latency_ms, not args.api_only, args.baseline,
+                                          args.regression_tolerance, args.update_baseline)
+        return 0 if report and report['passed'] else 1
+    elif args.update_directory:
+        manager.update_project_directory(args.tree_depth, args.tree_max_entries)
+    else:
+        # Default: show status
+        is_running, cdp_info = manager.browser_status()
+        print("Apex Dashboard Project Manager - Chrome Dev Profile Integration")
+        print("=" * 60)
+        if is_running:
+            print(f"✅ Chrome dev profile: Connected on port {cdp_info['cdp_port']}")
+        else:
+            print("❌ Chrome dev profile: Not running")
+            print("\nLaunch with: ./scripts/launch-dev-chrome.sh")
+        print("\nAvailable commands:")
+        print("  --screenshot          Take a screenshot")
+        print("  --screenshots [n]     List stored screenshots")
+        print("  --navigate <url>      Navigate to URL")
+        print("  --verify              Verify connection")
+        print("  --reload              Reload current page")
+        print("  --scroll <direction>  Scroll page")
+        print("  --click x,y|selector  Click at coordinates or on an element")
+        print("  --type 'text'         Type text")
+        print("  --key <key>           Press key")
+        print("  --wait-for <cond>     Wait for a selector, text:, js: or networkidle")
+        print("  --capture-matrix /,/a Screenshot routes at several viewports")
+        print("  --trace <url>         Record a performance trace")
+        print("  --record-network <s>  Record network traffic to HAR")
+        print("  --coverage <url>      Find unused JS and CSS")
+        print("  --heap-snapshot       Summarize the JS heap per class")
+        print("  --leak-check <urls>   Find classes that keep growing")
+        print("  --run <file>          Run a flow of actions")
+        print("  --load-test <file>    Run a flow as many isolated users")
+        print("  --bench-client        Benchmark client overhead against a mock CDP server")
+        print("\nUse --help for all options")
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
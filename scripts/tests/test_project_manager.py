@@ -0,0 +1,542 @@
+"""
+Tests for scripts/project_manager.py: the parsers and algorithms as pure
+functions, and a few CLI round-trips against scripts/mock-cdp-server.py.
+
+    pip install pytest
+    python -m pytest -q scripts/tests
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import project_manager as pm  # noqa: E402
+from daemon_client import runs_locally  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def mock_module():
+    """scripts/mock-cdp-server.py imported for its canned payload builders"""
+    pytest.importorskip("websockets")
+    spec = importlib.util.spec_from_file_location("mock_cdp_server", SCRIPTS_DIR / "mock-cdp-server.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ===== GITIGNORE =====
+
+def make_gitignore(tmp_path, rules, nested=None):
+    (tmp_path / ".gitignore").write_text("\n".join(rules) + "\n")
+    ignore = pm.GitIgnore(tmp_path)
+    for base, nested_rules in (nested or {}).items():
+        (tmp_path / base).mkdir(parents=True, exist_ok=True)
+        (tmp_path / base / ".gitignore").write_text("\n".join(nested_rules) + "\n")
+        ignore.load(tmp_path / base / ".gitignore", base)
+    return ignore
+
+
+def test_gitignore_unanchored_pattern_matches_at_any_depth(tmp_path):
+    ignore = make_gitignore(tmp_path, ["# comment", "", "*.log"])
+    assert ignore.ignored("debug.log", False)
+    assert ignore.ignored("src/deep/debug.log", False)
+    assert not ignore.ignored("src/debug.txt", False)
+
+
+def test_gitignore_anchored_and_directory_only(tmp_path):
+    ignore = make_gitignore(tmp_path, ["/build", "cache/", "docs/*.tmp"])
+    assert ignore.ignored("build", True)
+    assert not ignore.ignored("src/build", True)
+    assert ignore.ignored("src/cache", True)
+    assert not ignore.ignored("src/cache", False)
+    assert ignore.ignored("docs/a.tmp", False)
+    assert not ignore.ignored("docs/sub/a.tmp", False)
+
+
+def test_gitignore_negation_last_rule_wins(tmp_path):
+    ignore = make_gitignore(tmp_path, ["*.env", "!keep.env"])
+    assert ignore.ignored("prod.env", False)
+    assert not ignore.ignored("config/keep.env", False)
+
+
+def test_gitignore_double_star_and_character_classes(tmp_path):
+    ignore = make_gitignore(tmp_path, ["logs/**/out", "a/**", "file[0-9].txt", "note[!x].md", "?.bak"])
+    assert ignore.ignored("logs/out", False)
+    assert ignore.ignored("logs/x/y/out", False)
+    assert ignore.ignored("a/b/c", False)
+    assert ignore.ignored("file7.txt", False)
+    assert not ignore.ignored("fileA.txt", False)
+    assert ignore.ignored("notey.md", False)
+    assert not ignore.ignored("notex.md", False)
+    assert ignore.ignored("z.bak", False)
+    assert not ignore.ignored("zz.bak", False)
+
+
+def test_gitignore_nested_rules_apply_below_their_directory(tmp_path):
+    ignore = make_gitignore(tmp_path, [], nested={"pkg": ["*.gen", "/local"]})
+    assert ignore.ignored("pkg/a.gen", False)
+    assert ignore.ignored("pkg/sub/a.gen", False)
+    assert not ignore.ignored("a.gen", False)
+    assert ignore.ignored("pkg/local", True)
+    assert not ignore.ignored("pkg/sub/local", True)
+
+
+# ===== HEAP SNAPSHOT =====
+
+NODE_TYPES = ["hidden", "array", "string", "object", "code", "closure", "regexp", "number", "native",
+              "synthetic", "concatenated string", "sliced string", "symbol", "bigint", "object shape"]
+EDGE_TYPES = ["context", "element", "property", "internal", "hidden", "shortcut", "weak"]
+
+
+def make_snapshot(objects, links):
+    """A .heapsnapshot of objects [(type, name, self_size)] with node 0 as root
+
+    links are (from, to) or (from, to, "weak") pairs of object positions.
+    """
+    strings = []
+    nodes = []
+    for position, (node_type, name, size) in enumerate(objects):
+        if name not in strings:
+            strings.append(name)
+        edge_count = sum(1 for link in links if link[0] == position)
+        nodes += [NODE_TYPES.index(node_type), strings.index(name), position * 2 + 1, size, edge_count, 0, 0]
+    edges = []
+    for position in range(len(objects)):
+        for link in links:
+            if link[0] == position:
+                edge_type = link[2] if len(link) > 2 else "property"
+                edges += [EDGE_TYPES.index(edge_type), 0, link[1] * 7]
+    return json.dumps({
+        "snapshot": {
+            "meta": {
+                "node_fields": ["type", "name", "id", "self_size", "edge_count", "trace_node_id", "detachedness"],
+                "node_types": [NODE_TYPES, "string", "number", "number", "number", "number", "number"],
+                "edge_fields": ["type", "name_or_index", "to_node"],
+                "edge_types": [EDGE_TYPES, "string_or_number", "node"]
+            },
+            "node_count": len(objects),
+            "edge_count": len(edges) // 3
+        },
+        "nodes": nodes, "edges": edges, "trace_function_infos": [], "trace_tree": [], "samples": [],
+        "locations": [], "strings": strings
+    })
+
+
+# root -> A -> D, A -> A (nested), A and B -> C (shared), and a weak B -> D
+DIAMOND = make_snapshot(
+    [("synthetic", "(GC roots)", 0), ("object", "A", 10), ("object", "B", 10), ("object", "C", 100),
+     ("object", "D", 5), ("object", "A", 7), ("string", "text", 3)],
+    [(0, 1), (0, 2), (1, 3), (2, 3), (1, 4), (2, 4, "weak"), (1, 5), (5, 6)])
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 20])
+def test_heap_snapshot_summary_is_independent_of_chunking(tmp_path, chunk_size):
+    path = tmp_path / "diamond.heapsnapshot"
+    path.write_text(DIAMOND)
+    summary, node_count = pm.parse_heap_snapshot(path, chunk_size=chunk_size)
+    assert node_count == 7
+    assert summary["A"] == {"count": 2, "self_size": 17}
+    assert summary["C"] == {"count": 1, "self_size": 100}
+    assert summary["(string)"] == {"count": 1, "self_size": 3}
+    assert summary["(synthetic)"]["count"] == 1
+
+
+def test_heap_retained_sizes_follow_the_dominator_tree(tmp_path):
+    path = tmp_path / "diamond.heapsnapshot"
+    path.write_text(DIAMOND)
+    summary, _ = pm.parse_heap_snapshot(path, retained=True, chunk_size=13)
+    # C is reachable through A and B, so only the root dominates it; the
+    # weak B -> D edge is ignored, so A retains D
+    assert summary["C"]["retained_size"] == 100
+    assert summary["B"]["retained_size"] == 10
+    assert summary["D"]["retained_size"] == 5
+    # The inner A (and its string) is counted once, inside the outer A
+    assert summary["A"]["retained_size"] == 10 + 5 + 7 + 3
+
+
+def test_heap_snapshot_from_the_mock(tmp_path, mock_module):
+    path = tmp_path / "mock.heapsnapshot"
+    path.write_text(mock_module.make_heap_snapshot())
+    summary, node_count = pm.parse_heap_snapshot(path, retained=True, chunk_size=16)
+    assert node_count == 5
+    assert summary["Item"]["count"] == 2
+    assert summary["Window"]["retained_size"] == 50 + 100 + 100 + 20
+
+
+# ===== CPU PROFILE =====
+
+def profile_frame(name):
+    return {"functionName": name, "url": "http://localhost:5173/src/main.ts", "lineNumber": 9, "columnNumber": 0}
+
+
+def test_cpu_profile_self_and_total_without_double_counting_recursion():
+    profile = {
+        "nodes": [{"id": 1, "callFrame": profile_frame("(root)"), "children": [2]},
+                  {"id": 2, "callFrame": profile_frame("main"), "children": [3]},
+                  {"id": 3, "callFrame": profile_frame("walk"), "children": [4]},
+                  {"id": 4, "callFrame": profile_frame("walk"), "children": []}],
+        "startTime": 0, "endTime": 500, "samples": [4, 4, 3, 2], "timeDeltas": [100, 100, 100, 100]
+    }
+    rows, profile_us = pm.summarize_cpu_profile(profile)
+    by_name = {row["function"]: row for row in rows}
+    assert profile_us == 400
+    assert rows[0]["function"] == "walk"
+    assert by_name["walk"]["self_us"] == 300
+    assert by_name["walk"]["total_us"] == 300
+    assert by_name["main"] == {"function": "main", "url": "http://localhost:5173/src/main.ts", "line": 10,
+                               "self_us": 100, "total_us": 400}
+    assert by_name["(root)"]["total_us"] == 400
+
+
+def test_cpu_profile_without_samples():
+    rows, profile_us = pm.summarize_cpu_profile({"nodes": [{"id": 1, "callFrame": profile_frame("(root)")}]})
+    assert profile_us == 0
+    assert rows[0]["self_us"] == 0
+
+
+# ===== TRACE SUMMARY =====
+
+def trace_event(name, ts, dur=None, ph="X", tid=1):
+    event = {"name": name, "ph": ph, "pid": 1, "tid": tid, "ts": ts}
+    if dur is not None:
+        event["dur"] = dur
+    return event
+
+
+TRACE = json.dumps({"traceEvents": [
+    {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "CrRendererMain"}},
+    trace_event("RunTask", 1000, 80000),
+    trace_event("TimerFire", 2000, 30000),
+    trace_event("FunctionCall", 3000, 20000),
+    trace_event("Layout", 10000, 5000),
+    trace_event("FunctionCall", 40000, 10000),
+    trace_event("ParseHTML", 50000, ph="B"),
+    trace_event("EvaluateScript", 52000, 8000),
+    trace_event("ParseHTML", 70000, ph="E"),
+    trace_event("RunTask", 100000, 10000),
+    # A busier thread that is not the renderer main thread
+    trace_event("RunTask", 1000, 500000, tid=2),
+], "metadata": {}})
+
+
+@pytest.mark.parametrize("chunk_size", [5, 100, len(TRACE)])
+def test_trace_summary_buckets_nested_and_begin_end_events(chunk_size):
+    summary = pm.TraceSummary()
+    for start in range(0, len(TRACE), chunk_size):
+        summary.feed(TRACE[start:start + chunk_size])
+    result = summary.result()
+
+    assert result["events"] == 11
+    assert result["main_thread"] == {"pid": 1, "tid": 1, "name": "CrRendererMain"}
+    assert result["busy_ms"] == 90
+    assert result["long_tasks"] == 1
+    assert result["blocking_ms"] == 30
+    # TimerFire 30 (its FunctionCall is nested), FunctionCall 10, EvaluateScript 8
+    assert result["script_ms"] == 48
+    assert result["layout_ms"] == 5
+    assert result["parse_ms"] == 20
+    assert result["longest_tasks"] == [{"start_ms": 0.0, "duration_ms": 80.0}]
+
+
+def test_trace_summary_accepts_a_bare_array_and_ignores_unmatched_end():
+    summary = pm.TraceSummary()
+    summary.feed(json.dumps([trace_event("ParseHTML", 0, ph="E"), trace_event("RunTask", 0, 1000)]))
+    result = summary.result()
+    assert result["busy_ms"] == 1
+    assert result["parse_ms"] == 0
+
+
+# ===== COVERAGE =====
+
+def test_script_coverage_innermost_range_decides():
+    functions = [
+        {"ranges": [{"startOffset": 0, "endOffset": 100, "count": 1},
+                    {"startOffset": 20, "endOffset": 40, "count": 0},
+                    {"startOffset": 30, "endOffset": 35, "count": 2}]},
+        {"ranges": [{"startOffset": 60, "endOffset": 80, "count": 0}]},
+    ]
+    assert pm.script_coverage(functions) == (100, 100 - 15 - 20)
+    assert pm.script_coverage([]) == (0, 0)
+
+
+# ===== SCREENSHOT DIFFING =====
+
+def test_compare_images_reports_changed_regions_above_tolerance(tmp_path):
+    pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    baseline = Image.new("RGBA", (64, 64), (200, 200, 200, 255))
+    baseline.save(tmp_path / "baseline.png")
+    candidate = baseline.copy()
+    candidate.putpixel((5, 5), (203, 200, 200, 255))
+    for x in range(40, 45):
+        for y in range(40, 45):
+            candidate.putpixel((x, y), (0, 0, 0, 255))
+    candidate.save(tmp_path / "candidate.png")
+
+    summary = pm.compare_images(tmp_path / "baseline.png", tmp_path / "candidate.png",
+                                mask_path=tmp_path / "mask.png", tile=32, tolerance=8)
+    assert summary["total_tiles"] == 4
+    assert summary["changed_tiles"] == 1
+    assert summary["changed_pixels"] == 25
+    assert summary["max_delta"] == 200
+    assert summary["regions"] == [{"x": 32, "y": 32, "width": 32, "height": 32}]
+    with Image.open(tmp_path / "mask.png") as mask:
+        assert mask.size == (64, 64)
+        assert mask.getpixel((42, 42)) == 255
+        assert mask.getpixel((5, 5)) == 0
+
+
+def test_compare_images_size_change_counts_as_changed(tmp_path):
+    pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    Image.new("RGB", (32, 32), (10, 10, 10)).save(tmp_path / "baseline.png")
+    Image.new("RGB", (32, 64), (10, 10, 10)).save(tmp_path / "candidate.png")
+    summary = pm.compare_images(tmp_path / "baseline.png", tmp_path / "candidate.png", tile=32)
+    assert (summary["width"], summary["height"]) == (32, 64)
+    assert summary["regions"] == [{"x": 0, "y": 32, "width": 32, "height": 32}]
+
+
+# ===== SCREENSHOT STORE =====
+
+def test_screenshot_store_dedupes_and_keeps_pinned_blobs(tmp_path, mock_module):
+    store = pm.ScreenshotStore(tmp_path / "store", max_bytes=1)
+    first = mock_module.make_png(8, 4, b"first")
+    second = mock_module.make_png(8, 4, b"second")
+
+    path, new, _ = store.put(first, "home")
+    assert new
+    assert store.put(first, "home again")[1] is False
+    assert store.load()["blobs"][path.stem]["width"] == 8
+    assert store.pin("home") == path
+
+    # Over max_bytes: the unpinned older blob would go first, the pinned one stays
+    store.put(second, "settings")
+    store.put(mock_module.make_png(8, 4, b"third"), "profile")
+    index = store.load()
+    assert path.stem in index["blobs"]
+    assert path.exists()
+    assert store.resolve("settings") is None
+    assert store.resolve(path.stem[:8])[1] == path
+
+    store.pin(path.stem[:8], pinned=False)
+    store.prune(max_bytes=0)
+    assert not path.exists()
+
+
+def test_screenshot_store_adopt_moves_loose_files(tmp_path, mock_module):
+    (tmp_path / "screenshot_1.png").write_bytes(mock_module.make_png(2, 2, b"a"))
+    (tmp_path / "other.png").write_bytes(mock_module.make_png(2, 2, b"b"))
+    store = pm.ScreenshotStore(tmp_path / "store")
+    assert store.adopt(tmp_path) == 1
+    assert not (tmp_path / "screenshot_1.png").exists()
+    assert (tmp_path / "other.png").exists()
+    assert store.resolve("screenshot_1.png") is not None
+
+
+# ===== TAB LOOKUP =====
+
+def test_normalize_url():
+    assert pm.normalize_url("HTTP://LocalHost:5173/") == ("http://localhost:5173", "/")
+    assert pm.normalize_url("http://localhost:5173/users/?page=2") == ("http://localhost:5173", "/users")
+    assert pm.normalize_url("http://localhost:5173/#/settings/") == ("http://localhost:5173", "/#/settings")
+    assert pm.normalize_url("http://localhost:5173/page#section") == ("http://localhost:5173", "/page")
+
+
+def test_target_registry_lookup_and_updates(tmp_path):
+    registry = pm.TargetRegistry(pin_path=tmp_path / "pin.json")
+    registry.load([
+        {"id": "home", "type": "page", "url": "http://localhost:5173/"},
+        {"id": "users", "type": "page", "url": "http://localhost:5173/users?page=1"},
+        {"id": "worker", "type": "service_worker", "url": "http://localhost:5173/sw.js"},
+    ])
+    assert registry.find("http://localhost:5173")["id"] == "home"
+    assert registry.find("http://localhost:5173/users/")["id"] == "users"
+    assert registry.find("http://localhost:5173/sw.js") is None
+    assert registry.find("http://localhost:4000/") is None
+
+    registry.update({"targetId": "home", "type": "page", "url": "http://localhost:5173/#/settings"})
+    assert registry.find("http://localhost:5173/#/settings")["id"] == "home"
+    # A bare origin still falls back to any tab on it
+    assert registry.find("http://localhost:5173/")["id"] in ("home", "users")
+
+    registry.remove("users")
+    registry.remove("home")
+    assert registry.find("http://localhost:5173/") is None
+    assert not registry.by_origin and not registry.by_location
+
+    registry.pin("users")
+    assert pm.TargetRegistry(pin_path=tmp_path / "pin.json").pinned == "users"
+    registry.pin(None)
+    assert pm.TargetRegistry(pin_path=tmp_path / "pin.json").pinned is None
+
+
+# ===== SMALL HELPERS =====
+
+def test_percentile_interpolates():
+    assert pm.percentile([5], 0.9) == 5
+    assert pm.percentile([4, 1, 3, 2], 0.5) == 2.5
+    assert pm.percentile([0, 10], 0.9) == 9
+
+
+def test_runs_locally_accepts_flag_prefixes():
+    assert runs_locally(["--no-daemon", "--verify"])
+    assert runs_locally(["--no-d"])
+    assert runs_locally(["--bench-client=3"])
+    assert not runs_locally(["--verify"])
+    assert not runs_locally(["--click", "#app"])
+
+
+# ===== CLI AGAINST THE MOCK =====
+
+# Scripts and stylesheets seen before and after the coverage run's navigation
+# (only the live document's counts, and a script loaded twice counts once),
+# and an Input.insertText that fails
+MOCK_SCENARIO = {
+    "events": {
+        "CSS.enable": [{"method": "CSS.styleSheetAdded", "params": {"header": {
+            "styleSheetId": "old", "sourceURL": "http://localhost:5173/app.css", "length": 1000,
+            "isInline": False, "startLine": 0, "startColumn": 0}}}],
+        "Debugger.enable": [{"method": "Debugger.scriptParsed",
+                             "params": {"scriptId": "10", "url": "http://localhost:5173/app.js"}}],
+        "Page.navigate": [
+            {"method": "Runtime.executionContextsCleared", "params": {}},
+            {"method": "CSS.styleSheetAdded", "params": {"header": {
+                "styleSheetId": "new", "sourceURL": "http://localhost:5173/app.css", "length": 1000,
+                "isInline": False, "startLine": 0, "startColumn": 0}}},
+            {"method": "Debugger.scriptParsed", "params": {"scriptId": "20", "url": "http://localhost:5173/app.js"}},
+            {"method": "Debugger.scriptParsed", "params": {"scriptId": "21", "url": "http://localhost:5173/app.js"}}]
+    },
+    "replies": {
+        "Profiler.takePreciseCoverage": {"result": [
+            {"scriptId": script_id, "url": "http://localhost:5173/app.js", "functions": [{"ranges": [
+                {"startOffset": 0, "endOffset": 400, "count": 1},
+                {"startOffset": 100, "endOffset": 200, "count": 0}]}]}
+            for script_id in ("10", "20", "21")]},
+        "CSS.stopRuleUsageTracking": {"ruleUsage": [
+            {"styleSheetId": "new", "startOffset": 0, "endOffset": 250, "used": True}]},
+        "Input.insertText": {"error": {"code": -32000, "message": "Input rejected"}}
+    }
+}
+
+
+@pytest.fixture(scope="module")
+def project(tmp_path_factory):
+    """A copy of the scripts in a scratch project, with a mock CDP server to talk to"""
+    pytest.importorskip("websockets")
+    pytest.importorskip("requests")
+    root = tmp_path_factory.mktemp("project")
+    (root / "scripts").mkdir()
+    for name in ("project-manager.py", "project_manager.py", "daemon_client.py", "mock-cdp-server.py"):
+        shutil.copy(SCRIPTS_DIR / name, root / "scripts" / name)
+    scenario = root / "scenario.json"
+    scenario.write_text(json.dumps(MOCK_SCENARIO))
+
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        port = probe.getsockname()[1]
+    mock = subprocess.Popen([sys.executable, str(root / "scripts" / "mock-cdp-server.py"), "--port", str(port),
+                             "--scenario", str(scenario)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 10
+        while True:
+            try:
+                socket.create_connection(("localhost", port), timeout=1).close()
+                break
+            except OSError:
+                if mock.poll() is not None or time.time() > deadline:
+                    pytest.fail("Mock CDP server did not start")
+                time.sleep(0.05)
+        yield root, port
+    finally:
+        mock.terminate()
+        mock.wait(timeout=10)
+
+
+def run_cli(project, *argv):
+    root, port = project
+    return subprocess.run([sys.executable, str(root / "scripts" / "project-manager.py"), "--no-daemon", *argv],
+                          cwd=root, env=dict(os.environ, APEX_CDP_PORTS=str(port)),
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_cli_verify(project):
+    result = run_cli(project, "--verify")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert f"port {project[1]}" in result.stdout
+    assert "Active tabs: 1" in result.stdout
+
+
+def test_cli_click_and_evaluate(project):
+    result = run_cli(project, "--click", "#app")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "✅ Clicked at" in result.stdout
+
+    result = run_cli(project, "--evaluate", "42")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "✅ Result: 42" in result.stdout
+
+
+def test_cli_navigate_exit_code_follows_the_wait(project):
+    result = run_cli(project, "--navigate", "http://localhost:5173/")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    # The mock fires load events 20ms after the navigation reply
+    result = run_cli(project, "--navigate", "http://localhost:5173/", "--timeout", "0.001")
+    assert result.returncode == 1
+    assert "timed out" in result.stdout
+
+
+def test_cli_screenshot_is_stored_once(project):
+    first = run_cli(project, "--screenshot")
+    second = run_cli(project, "--screenshot")
+    assert first.returncode == 0 and second.returncode == 0, first.stdout + second.stdout
+    store = pm.ScreenshotStore(project[0] / ".claude" / "screenshots")
+    assert store.stats()["blobs"] == 1
+    assert store.stats()["entries"] == 2
+
+
+def test_cli_coverage_counts_the_live_document_once(project):
+    result = run_cli(project, "--coverage", "http://localhost:5173/")
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = max((project[0] / ".claude").glob("coverage_*.json"), key=lambda path: path.stat().st_mtime)
+    totals = json.loads(report.read_text())["totals"]
+    assert totals["css"] == {"total": 1000, "unused": 750}
+    assert totals["js"] == {"total": 400, "unused": 100}
+
+
+def test_flow_input_group_failure_drops_unawaited_replies(project):
+    root, port = project
+    client = pm.AsyncApexProjectManager(root)
+    client.discovery = pm.BrowserDiscovery(ports=[port])
+    steps = [{"action": "type", "text": "hello"}, {"action": "key", "key": "Enter"},
+             {"action": "key", "key": "Tab"}]
+
+    async def run():
+        try:
+            results = await client.run_flow(steps, quiet=True)
+            return results, [len(session._pending) for session in client.sessions.values()]
+        finally:
+            await client.close_sessions()
+
+    results, pending = asyncio.run(run())
+    assert [result["ok"] for result in results] == [False]
+    assert "Input rejected" in results[0]["error"]
+    assert "steps 2-3 were already sent" in results[0]["error"]
+    assert pending == [0]
+
+
+def test_cli_rejects_unknown_flags(project):
+    result = run_cli(project, "--no-such-flag")
+    assert result.returncode == 2